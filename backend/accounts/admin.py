@@ -1,7 +1,11 @@
-from django.contrib import admin
+import numpy as np
+from django.contrib import admin, messages
 from .models import UserProfile, ModelOutput
 from .models import WasteReport
 from .models import CivicIssue
+from .models import Incident
+from .models import ValidationJob
+from .utils import distance_matrix
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -21,6 +25,7 @@ class WasteReportAdmin(admin.ModelAdmin):
     list_filter = ('issue_type', 'status', 'category', 'severity', 'created_at')
     search_fields = ('user__username', 'description', 'location')
     readonly_fields = ('created_at', 'updated_at')
+    actions = ['show_nearest_selected']
     fieldsets = (
         (None, {
             'fields': ('user', 'description', 'issue_type', 'status')
@@ -36,8 +41,34 @@ class WasteReportAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description="Show the nearest other selected report for each")
+    def show_nearest_selected(self, request, queryset):
+        reports = list(queryset.filter(latitude__isnull=False, longitude__isnull=False).order_by('id'))
+        if len(reports) < 2:
+            self.message_user(request, "Select at least two reports with coordinates.", messages.WARNING)
+            return
+
+        # All pairwise distances in one vectorized pass
+        distances = distance_matrix([r.latitude for r in reports], [r.longitude for r in reports])
+        np.fill_diagonal(distances, np.inf)
+        for report, row in zip(reports, distances):
+            nearest = int(row.argmin())
+            self.message_user(request, f"Report {report.id}: nearest is report {reports[nearest].id}, {row[nearest]:.2f} km")
+
 @admin.register(CivicIssue)
 class CivicIssueAdmin(admin.ModelAdmin):
-    list_display = ("id", "issue", "name", "phone", "address", "created_at")
+    list_display = ("id", "issue", "name", "phone", "address", "latitude", "longitude", "created_at")
     search_fields = ("issue", "name", "phone", "address")
-    list_filter = ("issue", "created_at")
\ No newline at end of file
+    list_filter = ("issue", "created_at")
+
+@admin.register(Incident)
+class IncidentAdmin(admin.ModelAdmin):
+    list_display = ("id", "category", "severity", "member_count", "first_reported_at", "last_reported_at")
+    list_filter = ("category", "severity", "last_reported_at")
+    readonly_fields = ("created_at",)
+
+@admin.register(ValidationJob)
+class ValidationJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "report", "status", "attempts", "run_after", "created_at", "finished_at")
+    list_filter = ("status", "created_at")
+    readonly_fields = ("created_at", "started_at", "finished_at", "locked_at", "locked_by", "last_error")
@@ -0,0 +1,165 @@
+"""
+Tile-keyed cache of nearby alert results in the default (Redis) cache.
+
+Requests from roughly the same place share one cached candidate list: the
+alerts around the centre of their coarse tile, for the smallest radius
+bucket covering their radius, widened by half the tile's diagonal. Each
+request then re-filters the shared list for its own point, radius and user,
+so answers are exactly what an uncached query would return.
+
+Writes invalidate only the (tile, bucket) entries whose area contains the
+changed report.
+"""
+import logging
+import math
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .utils import KM_PER_DEG_LAT, grid_cells_within, grid_index, haversine_many
+
+logger = logging.getLogger(__name__)
+
+TILE_DEG = 0.05
+
+# Radii (km) requests are rounded up to; larger radii are not cached
+RADIUS_BUCKETS_KM = (1, 2, 5, 10)
+
+CACHE_TTL_SECONDS = 300
+ALERT_WINDOW_HOURS = 24
+
+KEY_PREFIX = "nearby:"
+HITS_KEY = "nearby:stats:hits"
+MISSES_KEY = "nearby:stats:misses"
+
+
+def _tile(lat, lon):
+    return grid_index(lat, lon, TILE_DEG)
+
+
+def _tile_center(row, col):
+    return (row + 0.5) * TILE_DEG, (col + 0.5) * TILE_DEG
+
+
+def _tile_half_diagonal_km(center_lat):
+    height = TILE_DEG * KM_PER_DEG_LAT
+    width = height * math.cos(math.radians(min(abs(center_lat) + TILE_DEG, 90.0)))
+    return math.hypot(height, width) / 2
+
+
+def _radius_bucket(radius_km):
+    for bucket in RADIUS_BUCKETS_KM:
+        if radius_km <= bucket:
+            return bucket
+    return None
+
+
+def _key(row, col, bucket):
+    return f"{KEY_PREFIX}{row}:{col}:{bucket}"
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def nearby_alerts(lat, lon, radius_km, user_id, loader):
+    """
+    Alerts within radius_km of the point, excluding user_id's own reports,
+    newest first. `loader(lat, lon, radius_km)` computes uncached alert
+    payloads (see views.find_recent_alerts).
+    """
+    bucket = _radius_bucket(radius_km)
+    if bucket is None:
+        return loader(lat, lon, radius_km, exclude_user_id=user_id)
+
+    row, col = _tile(lat, lon)
+    key = _key(row, col, bucket)
+
+    try:
+        candidates = cache.get(key)
+        _count(MISSES_KEY if candidates is None else HITS_KEY)
+    except Exception as e:
+        logger.warning("Nearby alerts cache unavailable: %s", e)
+        return loader(lat, lon, radius_km, exclude_user_id=user_id)
+
+    if candidates is None:
+        center_lat, center_lon = _tile_center(row, col)
+        candidates = loader(center_lat, center_lon, bucket + _tile_half_diagonal_km(center_lat))
+        try:
+            cache.set(key, candidates, CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning("Could not cache nearby alerts for %s: %s", key, e)
+
+    # Narrow the shared tile result down to this user and point
+    time_threshold = timezone.now() - timedelta(hours=ALERT_WINDOW_HOURS)
+    candidates = [
+        alert for alert in candidates
+        if alert["user_id"] != user_id and alert["created_at"] >= time_threshold
+    ]
+    distances = haversine_many(
+        lat, lon,
+        [alert["latitude"] for alert in candidates],
+        [alert["longitude"] for alert in candidates]
+    )
+
+    alerts = []
+    for alert, distance in zip(candidates, distances):
+        if distance <= radius_km:
+            alerts.append(dict(alert, distance_km=round(float(distance), 2)))
+    return alerts
+
+
+def _keys_around(lat, lon):
+    reach_km = RADIUS_BUCKETS_KM[-1] + _tile_half_diagonal_km(lat)
+    tiles = grid_cells_within(lat, lon, reach_km, TILE_DEG, max_cells=None)
+
+    tiles = [tuple(int(part) for part in tile.split(':')) for tile in tiles]
+    centers = [_tile_center(row, col) for row, col in tiles]
+    distances = haversine_many(
+        lat, lon,
+        [center[0] for center in centers],
+        [center[1] for center in centers]
+    )
+
+    keys = [
+        _key(row, col, bucket)
+        for (row, col), (center_lat, _), distance in zip(tiles, centers, distances)
+        for bucket in RADIUS_BUCKETS_KM
+        if distance <= bucket + _tile_half_diagonal_km(center_lat)
+    ]
+    return keys
+
+
+def invalidate(lat, lon):
+    """Drop every cached (tile, bucket) entry whose area contains the point."""
+    invalidate_many([(lat, lon)])
+
+
+def invalidate_many(points):
+    """Drop the cached entries around many (lat, lon) points in one round trip."""
+    keys = set()
+    for lat, lon in points:
+        if lat is not None and lon is not None:
+            keys.update(_keys_around(lat, lon))
+    if not keys:
+        return
+    try:
+        cache.delete_many(list(keys))
+    except Exception as e:
+        logger.warning("Could not invalidate nearby alerts cache: %s", e)
+
+
+def stats():
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,230 @@
+"""
+Push delivery of nearby alerts to long-lived ASGI subscribers.
+
+Clients open one Server-Sent Events stream with their location and radius
+instead of polling check_nearby_alerts. Each ASGI process keeps its
+subscribers in an AlertBroker indexed by coarse grid cell, so publishing an
+alert only looks at subscribers whose area can contain it.
+
+Reports are published on the GEODATA Redis "alerts:live" channel so every
+web process sees them; each process runs a single listener task that feeds
+its local broker. Without Redis delivery is degraded: an alert only reaches
+subscribers of the process that saved the report, which is usually not
+the one holding the streams.
+
+New reports are published by the submission code once their files are
+saved (publish_report), so the alert carries the photo URL; reports that
+pass validation later are published by a post_save signal.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .utils import grid_cell, grid_cells_within, haversine_many
+
+logger = logging.getLogger(__name__)
+
+LIVE_CHANNEL = "alerts:live"
+
+# Subscribers are bucketed on a coarser grid than WasteReport.grid_cell
+SUBSCRIBER_CELL_DEG = 0.1
+
+# Alerts queued for a slow client beyond this are dropped, not buffered
+SUBSCRIBER_QUEUE_SIZE = 100
+
+HEARTBEAT_SECONDS = 15
+
+# Delay the browser's EventSource waits before reconnecting a dropped stream
+RECONNECT_MILLISECONDS = 5000
+
+# How long to wait before reconnecting a failed Redis listener
+LISTENER_RETRY_SECONDS = 30
+
+
+class Subscription:
+    __slots__ = ("lat", "lon", "radius_km", "user_id", "cells", "queue", "loop")
+
+    def __init__(self, lat, lon, radius_km, user_id, loop):
+        self.lat = lat
+        self.lon = lon
+        self.radius_km = radius_km
+        self.user_id = user_id
+        self.cells = grid_cells_within(lat, lon, radius_km, SUBSCRIBER_CELL_DEG)
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.loop = loop
+
+
+class AlertBroker:
+    """
+    Registry of live subscriptions for one process. subscribe/unsubscribe
+    run on the event loop; dispatch may be called from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._by_cell = {}
+        # Subscriptions whose radius covers too many cells to list
+        self._wide = set()
+        self._listener = None
+        self._listener_retry_at = 0.0
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, lat, lon, radius_km, user_id=None):
+        subscription = Subscription(lat, lon, radius_km, user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if subscription.cells is None:
+                self._wide.add(subscription)
+            else:
+                for cell in subscription.cells:
+                    self._by_cell.setdefault(cell, set()).add(subscription)
+        self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            if subscription.cells is None:
+                self._wide.discard(subscription)
+                return
+            for cell in subscription.cells:
+                subs = self._by_cell.get(cell)
+                if subs is not None:
+                    subs.discard(subscription)
+                    if not subs:
+                        del self._by_cell[cell]
+
+    def dispatch(self, payload):
+        """Queue an alert payload on every subscription whose area contains it."""
+        cell = grid_cell(payload["latitude"], payload["longitude"], SUBSCRIBER_CELL_DEG)
+        with self._lock:
+            candidates = list(self._by_cell.get(cell, ())) + list(self._wide)
+        # Never alert users about their own reports
+        candidates = [sub for sub in candidates if sub.user_id != payload["user_id"]]
+        if not candidates:
+            return 0
+
+        distances = haversine_many(
+            [sub.lat for sub in candidates],
+            [sub.lon for sub in candidates],
+            [payload["latitude"]],
+            [payload["longitude"]],
+        )[:, 0]
+
+        delivered = 0
+        for subscription, distance in zip(candidates, distances):
+            if distance <= subscription.radius_km:
+                alert = dict(payload, distance_km=round(float(distance), 2))
+                subscription.loop.call_soon_threadsafe(_offer, subscription.queue, alert)
+                delivered += 1
+        return delivered
+
+    def _ensure_listener(self):
+        if self._listener is not None and not self._listener.done():
+            return
+        loop = asyncio.get_running_loop()
+        if loop.time() < self._listener_retry_at:
+            return
+        self._listener_retry_at = loop.time() + LISTENER_RETRY_SECONDS
+        self._listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        """Feed alerts published by any process into this broker."""
+        try:
+            import redis.asyncio as aioredis
+            client = aioredis.from_url(settings.CACHES["GEODATA"]["LOCATION"])
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(LIVE_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(json.loads(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Live alert listener stopped, delivering in-process only: %s", e)
+
+
+def _offer(queue, alert):
+    try:
+        queue.put_nowait(alert)
+    except asyncio.QueueFull:
+        pass
+
+
+broker = AlertBroker()
+
+
+def publish(payload):
+    """
+    Fan an alert payload (geo_index.alert_payload) out to every process.
+    Returns False when Redis is unavailable: the alert then only reaches
+    this process' subscribers.
+    """
+    try:
+        from django_redis import get_redis_connection
+        get_redis_connection("GEODATA").publish(LIVE_CHANNEL, json.dumps(payload))
+        return True
+    except Exception as e:
+        local = broker.dispatch(payload)
+        logger.warning(
+            "Live alert delivery degraded: could not publish report %s (%s); "
+            "delivered to %s subscribers of this process only",
+            payload.get("id"), e, local,
+        )
+        return False
+
+
+def publish_report(report):
+    """Publish a newly submitted report once it is committed with its files."""
+    from .geo_index import alert_payload
+
+    if report.status == 'invalid' or report.latitude is None or report.longitude is None:
+        return
+    payload = alert_payload(report)
+    transaction.on_commit(lambda: publish(payload))
+
+
+def _format_event(alert):
+    """Render an alert as an SSE message with the check_nearby_alerts item shape."""
+    event = {
+        "id": alert["id"],
+        "type": "Waste Report",
+        "issue_type": alert["issue_type"],
+        "description": alert["description"],
+        "severity": alert["severity"],
+        "distance_km": alert["distance_km"],
+        "latitude": alert["latitude"],
+        "longitude": alert["longitude"],
+        "created_at": alert["created_at"],
+        "image_url": alert["image_url"],
+    }
+    # Match DRF's rendering of UTC datetimes in the polling endpoint
+    if event["created_at"].endswith("+00:00"):
+        event["created_at"] = event["created_at"][:-6] + "Z"
+    return f"id: {event['id']}\nevent: alert\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(lat, lon, radius_km, user_id=None, heartbeat=HEARTBEAT_SECONDS):
+    """
+    Async iterator of Server-Sent Events for one subscriber. Sends a
+    comment line every `heartbeat` seconds so proxies keep the stream open.
+    """
+    subscription = broker.subscribe(lat, lon, radius_km, user_id)
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        while True:
+            try:
+                alert = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield _format_event(alert)
+    finally:
+        broker.unsubscribe(subscription)
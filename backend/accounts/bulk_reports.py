@@ -0,0 +1,219 @@
+"""
+Bulk submission of WasteReports, e.g. a field agent's backlog after working
+offline.
+
+Two request formats are accepted:
+
+- multipart/form-data (or JSON): a "reports" field holding a JSON array of
+  report objects. Each object names its uploaded files in "photo" and
+  "voice_note", defaulting to the fields photo_<index> and voice_note_<index>.
+- application/x-ndjson: one report object per line.
+
+In both formats a file may instead be sent inline as base64 in
+"photo_base64" / "voice_note_base64", with an optional "photo_name" /
+"voice_note_name". A report object otherwise looks like the fields of
+create_waste_report, validated by the same rules
+(accounts.report_fields): description, issue_type and location ({lat, lon,
+address} or an address string).
+
+Valid items are inserted with one bulk_create. bulk_create bypasses save()
+and post_save, so the side effects the signal handlers perform for single
+reports are applied here in batches: profile counters once per user, one
+insert of validation jobs, combined heatmap updates, incident clustering,
+and after commit the live alert index, live push and nearby-alerts cache.
+
+Invalid items do not stop the others; every item gets its own result.
+"""
+import base64
+import binascii
+import json
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+
+from . import alert_cache, alert_stream, geo_index, heatmap, image_pipeline, incidents, validation_queue
+from .models import UserProfile, WasteReport
+from .report_fields import ReportFieldError, clean_report_fields
+
+logger = logging.getLogger(__name__)
+
+BULK_REPORT_MAX_ITEMS = getattr(settings, 'BULK_REPORT_MAX_ITEMS', 100)
+# Upper bound on a request body (NDJSON is read outside Django's upload limits)
+BULK_REPORT_MAX_BYTES = getattr(settings, 'BULK_REPORT_MAX_BYTES', 100 * 1024 * 1024)
+
+FILE_FIELDS = ('photo', 'voice_note')
+
+
+class BulkRequestError(Exception):
+    """The request as a whole cannot be processed."""
+
+
+class BulkItemError(Exception):
+    """One item of the request is invalid; the others are still processed."""
+
+
+def items_from_form(data, files):
+    """
+    Yield (item, uploaded files) pairs from a multipart or JSON request whose
+    "reports" field holds a JSON array of report objects.
+    """
+    raw = data.get('reports')
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError as e:
+            raise BulkRequestError(f"reports is not valid JSON: {e}")
+    if not isinstance(raw, list):
+        raise BulkRequestError("reports must be a JSON array of report objects")
+    if len(raw) > BULK_REPORT_MAX_ITEMS:
+        raise BulkRequestError(f"At most {BULK_REPORT_MAX_ITEMS} reports per request")
+
+    for index, item in enumerate(raw):
+        uploads = {}
+        if isinstance(item, dict):
+            for field in FILE_FIELDS:
+                name = item.get(field) or f"{field}_{index}"
+                if isinstance(name, str) and name in files:
+                    uploads[field] = files[name]
+        yield item, uploads
+
+
+def items_from_ndjson(stream):
+    """Yield (item, {}) pairs from an NDJSON body, one report object per line."""
+    if stream is None:
+        return
+
+    count = 0
+    size = 0
+    for line in iter(stream.readline, b''):
+        size += len(line)
+        if size > BULK_REPORT_MAX_BYTES:
+            raise BulkRequestError(f"Request body exceeds {BULK_REPORT_MAX_BYTES} bytes")
+        line = line.strip()
+        if not line:
+            continue
+
+        count += 1
+        if count > BULK_REPORT_MAX_ITEMS:
+            raise BulkRequestError(f"At most {BULK_REPORT_MAX_ITEMS} reports per request")
+        try:
+            yield json.loads(line), {}
+        except ValueError as e:
+            yield BulkItemError(f"Invalid JSON: {e}"), {}
+
+
+def _inline_file(item, field):
+    encoded = item.get(f"{field}_base64")
+    if not encoded:
+        return None
+    try:
+        content = base64.b64decode(encoded, validate=True)
+    except (binascii.Error, TypeError, ValueError):
+        raise BulkItemError(f"{field}_base64 is not valid base64")
+    return ContentFile(content, name=item.get(f"{field}_name") or f"{field}.bin")
+
+
+def build_report(user, item, uploads):
+    """
+    Validate one item and return an unsaved WasteReport for it, with its
+    files already written to storage. Raises BulkItemError or
+    ReportFieldError for an invalid item.
+    """
+    if isinstance(item, BulkItemError):
+        raise item
+    if not isinstance(item, dict):
+        raise BulkItemError("Each report must be a JSON object")
+
+    fields = clean_report_fields(item)
+
+    files = {}
+    for field in FILE_FIELDS:
+        upload = uploads.get(field) or _inline_file(item, field)
+        if upload is not None:
+            if not upload.size:
+                raise BulkItemError(f"{field} is empty")
+            files[field] = upload
+
+    report = WasteReport(user=user, status='pending', **fields)
+    report.refresh_grid_cell()
+    if 'photo' in files:
+        files['photo'], original_photo = image_pipeline.prepare_photo(files['photo'])
+        if original_photo is not None:
+            files['original_photo'] = original_photo
+    for field, upload in files.items():
+        getattr(report, field).save(upload.name, upload, save=False)
+    return report
+
+
+def _delete_files(reports):
+    for report in reports:
+        for field in FILE_FIELDS + ('original_photo',):
+            stored = getattr(report, field)
+            if stored:
+                try:
+                    stored.delete(save=False)
+                except Exception as e:
+                    logger.warning("Could not delete %s after failed bulk insert: %s", stored.name, e)
+
+
+def _after_commit(reports):
+    for report in reports:
+        geo_index.index_report(report)
+        if report.latitude is not None and report.longitude is not None:
+            alert_stream.publish(geo_index.alert_payload(report))
+    alert_cache.invalidate_many((report.latitude, report.longitude) for report in reports)
+
+
+def submit(user, entries):
+    """
+    Create a report for every valid (item, uploads) entry and return
+    (per-item results, created reports). Results are in request order.
+    """
+    results = []
+    reports = []
+    try:
+        for index, (item, uploads) in enumerate(entries):
+            try:
+                report = build_report(user, item, uploads)
+            except (BulkItemError, ReportFieldError) as e:
+                results.append({"index": index, "status": "error", "error": str(e)})
+                continue
+            results.append({"index": index, "status": "created", "report": report})
+            reports.append(report)
+
+        if reports:
+            with transaction.atomic():
+                WasteReport.objects.bulk_create(reports)
+                for report in reports:
+                    report._loaded_values = {name: getattr(report, name) for name in WasteReport.TRACKED_FIELDS}
+                    report._loaded_values.update(
+                        (name, getattr(report, name).name) for name in WasteReport.TRACKED_FILE_FIELDS
+                    )
+
+                for user_id, count in Counter(report.user_id for report in reports).items():
+                    UserProfile.objects.filter(user_id=user_id).update(
+                        issues_reported=F('issues_reported') + count
+                    )
+
+                validation_queue.enqueue_many(
+                    (report, report.description) for report in reports if report.photo
+                )
+                heatmap.adjust_many(
+                    heatmap.bucket_key(report.latitude, report.longitude, report.category,
+                                       report.severity, report.created_at)
+                    for report in reports
+                )
+                # One by one: later reports may join incidents opened by earlier ones
+                for report in reports:
+                    incidents.assign_incident(report)
+
+                transaction.on_commit(lambda: _after_commit(reports))
+    except BaseException:
+        _delete_files(reports)
+        raise
+
+    return results, reports
@@ -0,0 +1,268 @@
+"""
+Shared HTTP client for the FastAPI classifier service (/classify, /validate).
+
+All calls go through one requests.Session per process whose connection
+pool keeps connections to the service alive, so a validation pays for TCP
+setup once per pooled connection instead of once per call. The adapter
+retries connection failures and 502/503/504 answers with a short backoff;
+a read timeout is never retried, since the service may still be making the
+(metered) model call. Other non-200 answers raise ClassifierError straight
+away and callers decide whether to retry (the validation queue does, with
+its own backoff). max_call_seconds() bounds one call including retries.
+
+Every call records its latency per endpoint in this process; metrics()
+returns call and error counts, latency percentiles of the most recent
+calls and how many connections the pool has opened, which stays flat once
+the pool is warm.
+
+When the classifier shares the media volume (CLASSIFIER_SHARED_STORAGE),
+classify_stored/validate_stored send only the stored file's name and the
+service memory-maps the file itself, so the photo is neither read back
+here nor sent over HTTP. If the service cannot find the file (no shared
+volume, wrong mount) the call falls back to a multipart upload.
+
+aclassify/avalidate and their _stored variants run the same pooled calls
+on a worker thread for async views.
+"""
+import logging
+import mimetypes
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_URL = getattr(settings, 'CLASSIFIER_URL', "http://localhost:8001").rstrip('/')
+CLASSIFIER_CONNECT_TIMEOUT_SECONDS = getattr(settings, 'CLASSIFIER_CONNECT_TIMEOUT_SECONDS', 3)
+CLASSIFIER_READ_TIMEOUT_SECONDS = getattr(settings, 'CLASSIFIER_READ_TIMEOUT_SECONDS', 120)
+CLASSIFIER_RETRIES = getattr(settings, 'CLASSIFIER_RETRIES', 2)
+CLASSIFIER_POOL_SIZE = getattr(settings, 'CLASSIFIER_POOL_SIZE', 10)
+CLASSIFIER_SHARED_STORAGE = getattr(settings, 'CLASSIFIER_SHARED_STORAGE', False)
+
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_STATUSES = (502, 503, 504)
+
+# Latencies kept per endpoint for percentiles
+LATENCY_WINDOW = 500
+
+
+class ClassifierError(Exception):
+    """
+    A classifier call that did not return a result. status is the HTTP
+    status, or None when the service could not be reached.
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def retryable(self):
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+class _Stats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _new_session():
+    retry = Retry(
+        total=CLASSIFIER_RETRIES,
+        connect=CLASSIFIER_RETRIES,
+        # A request that timed out may still be running a paid model call
+        read=0,
+        status=CLASSIFIER_RETRIES,
+        status_forcelist=RETRY_STATUSES,
+        # Connection failures and 502/503/504 never reached a model call, so POSTs are retried too
+        allowed_methods=None,
+        backoff_factor=RETRY_BACKOFF_SECONDS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=CLASSIFIER_POOL_SIZE,
+        max_retries=retry,
+    )
+    http = requests.Session()
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    return http
+
+
+def max_call_seconds():
+    """Longest one classifier call can take, counting every retry and its backoff."""
+    attempts = CLASSIFIER_RETRIES + 1
+    backoff = sum(RETRY_BACKOFF_SECONDS * 2 ** attempt for attempt in range(CLASSIFIER_RETRIES))
+    return attempts * (CLASSIFIER_CONNECT_TIMEOUT_SECONDS + CLASSIFIER_READ_TIMEOUT_SECONDS) + backoff
+
+
+def session():
+    """The process-wide pooled session, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _new_session()
+    return _session
+
+
+def _record(endpoint, seconds, failed):
+    with _stats_lock:
+        stats = _stats.setdefault(endpoint, _Stats())
+        stats.calls += 1
+        stats.errors += failed
+        stats.latencies.append(seconds)
+
+
+def _image_part(image):
+    """requests file tuple for a file object, keeping its name and content type."""
+    name = os.path.basename(getattr(image, 'name', None) or 'image.jpg')
+    content_type = (getattr(image, 'content_type', None)
+                    or mimetypes.guess_type(name)[0] or 'image/jpeg')
+    return (name, image, content_type)
+
+
+def _post(endpoint, files=None, data=None):
+    started = time.perf_counter()
+    failed = True
+    try:
+        try:
+            response = session().post(
+                f"{CLASSIFIER_URL}{endpoint}",
+                files=files,
+                data=data,
+                timeout=(CLASSIFIER_CONNECT_TIMEOUT_SECONDS, CLASSIFIER_READ_TIMEOUT_SECONDS),
+            )
+        except requests.RequestException as e:
+            raise ClassifierError(f"Classifier unreachable: {e}")
+
+        # 207: a batch with per-image failures, reported in its results
+        if response.status_code not in (200, 207):
+            raise ClassifierError(
+                f"Classifier error {response.status_code}: {response.text[:500]}",
+                status=response.status_code,
+            )
+        try:
+            result = response.json()
+        except ValueError:
+            raise ClassifierError(f"Classifier returned invalid JSON: {response.text[:500]}", status=502)
+        failed = False
+        return result
+    finally:
+        seconds = time.perf_counter() - started
+        _record(endpoint, seconds, failed)
+        logger.debug("Classifier %s took %.0f ms%s", endpoint, seconds * 1000, " (failed)" if failed else "")
+
+
+def classify(image):
+    """Category, severity and response_time of the issue in an image file."""
+    return _post("/classify", files={'image': _image_part(image)})
+
+
+def validate(image, description=''):
+    """Whether an image shows a civic issue matching description, with its category and severity."""
+    return _post("/validate", files={'image': _image_part(image)}, data={'description': description or ''})
+
+
+def classify_batch(images):
+    """
+    classify() for several image files in one request. Returns the
+    service's per-image entries in order: the result plus "ok": True, or
+    "ok": False with "error" and "status".
+    """
+    files = [('images', _image_part(image)) for image in images]
+    return _post("/classify/batch", files=files)["results"]
+
+
+def validate_batch(images, descriptions):
+    """validate() for several image files, each with its description; entries as for classify_batch()."""
+    files = [('images', _image_part(image)) for image in images]
+    return _post("/validate/batch", files=files, data={'descriptions': list(descriptions)})["results"]
+
+
+def _post_stored(endpoint, field_file, upload, data=None):
+    if CLASSIFIER_SHARED_STORAGE:
+        try:
+            return _post(endpoint, data={**(data or {}), 'path': field_file.name})
+        except ClassifierError as e:
+            # 400: shared storage disabled on the service; 404: file not on its volume
+            if e.status not in (400, 404):
+                raise
+            logger.warning("Classifier could not read %s from shared storage, uploading it: %s", field_file.name, e)
+
+    with field_file.open('rb') as image:
+        return upload(image)
+
+
+def classify_stored(field_file):
+    """classify() for a file already in media storage, e.g. report.photo."""
+    return _post_stored("/classify", field_file, classify)
+
+
+def validate_stored(field_file, description=''):
+    """validate() for a file already in media storage, e.g. report.photo."""
+    return _post_stored(
+        "/validate", field_file,
+        lambda image: validate(image, description),
+        data={'description': description or ''},
+    )
+
+
+aclassify = sync_to_async(classify, thread_sensitive=False)
+avalidate = sync_to_async(validate, thread_sensitive=False)
+aclassify_stored = sync_to_async(classify_stored, thread_sensitive=False)
+avalidate_stored = sync_to_async(validate_stored, thread_sensitive=False)
+
+
+def _connections_opened():
+    if _session is None:
+        return 0
+    opened = 0
+    for adapter in _session.adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+    return opened
+
+
+def metrics():
+    """Call counts and latency per endpoint in this process, plus pool connections opened."""
+    def ms(value):
+        return round(value * 1000, 1)
+
+    endpoints = {}
+    with _stats_lock:
+        for endpoint, stats in _stats.items():
+            latencies = sorted(stats.latencies)
+            endpoints[endpoint] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "p50_ms": ms(statistics.median(latencies)) if latencies else None,
+                "p95_ms": ms(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]) if latencies else None,
+                "max_ms": ms(latencies[-1]) if latencies else None,
+            }
+    return {
+        "base_url": CLASSIFIER_URL,
+        "pool_size": CLASSIFIER_POOL_SIZE,
+        "connections_opened": _connections_opened(),
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,238 @@
+"""
+Live alert index backed by the GEODATA Redis cache.
+
+Every non-invalid WasteReport with coordinates is written into a Redis GEO
+set so check_nearby_alerts can answer with a radius search instead of
+scanning the database. Reports are bucketed into one GEO set per hour and
+each bucket expires 24 hours after it closes, so the index never holds more
+than a day of reports.
+
+Signals only index reports as they are saved, so an empty Redis (first
+deploy, flush, failover) would silently miss every older report. The
+index is therefore trusted only once POPULATED_KEY is set, which
+backfill() (`manage.py backfill_geo_index`) does after indexing every
+report of the window; until then search_nearby answers None and callers
+use the database. Run the backfill again after Redis loses data.
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from .models import WasteReport
+from .utils import haversine_many
+
+logger = logging.getLogger(__name__)
+
+GEODATA_CACHE_ALIAS = "GEODATA"
+ALERT_WINDOW_HOURS = 24
+
+GEO_BUCKET_PREFIX = "alerts:geo:"
+PAYLOAD_PREFIX = "alerts:report:"
+# Set once the index holds every report of the window (see backfill)
+POPULATED_KEY = "alerts:populated"
+
+# Redis GEO cannot index points closer to the poles than this
+MAX_GEO_LATITUDE = 85.05112878
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection(GEODATA_CACHE_ALIAS)
+
+
+def _hour_bucket(dt):
+    return int(dt.timestamp()) // 3600
+
+
+def _bucket_key(bucket):
+    return f"{GEO_BUCKET_PREFIX}{bucket}"
+
+
+def _payload_key(report_id):
+    return f"{PAYLOAD_PREFIX}{report_id}"
+
+
+def _bucket_expiry(bucket):
+    """Unix time at which an hour bucket no longer holds reports inside the window."""
+    return (bucket + 1) * 3600 + ALERT_WINDOW_HOURS * 3600
+
+
+def _window_buckets(now):
+    first = _hour_bucket(now - timedelta(hours=ALERT_WINDOW_HOURS))
+    last = _hour_bucket(now)
+    return list(range(first, last + 1))
+
+
+def _is_indexable(report):
+    return (
+        report.latitude is not None
+        and report.longitude is not None
+        and abs(report.latitude) <= MAX_GEO_LATITUDE
+        and report.status != 'invalid'
+        and report.created_at is not None
+    )
+
+
+def alert_payload(report):
+    """JSON-safe alert fields for a report, shared with the live alert stream."""
+    return {
+        "id": report.id,
+        "user_id": report.user_id,
+        "issue_type": report.issue_type,
+        "description": report.description,
+        "severity": report.severity,
+        "latitude": report.latitude,
+        "longitude": report.longitude,
+        "created_at": report.created_at.isoformat(),
+        "image_url": report.photo.url if report.photo else None,
+    }
+
+
+def index_report(report):
+    """
+    Add, refresh or drop a report in the live alert index to match its
+    current state. Errors are logged and swallowed: the index is only an
+    accelerator and the database stays the source of truth.
+    """
+    try:
+        if not _is_indexable(report):
+            remove_report(report)
+            return
+
+        pipe = _redis().pipeline()
+        if _add_to_pipeline(pipe, report, int(timezone.now().timestamp())):
+            pipe.execute()
+    except Exception as e:
+        logger.warning("Could not index report %s in GEODATA: %s", report.id, e)
+
+
+def _add_to_pipeline(pipe, report, now):
+    """Queue the commands indexing an indexable report; False if it is already outside the window."""
+    bucket = _hour_bucket(report.created_at)
+    expires_at = _bucket_expiry(bucket)
+    ttl = expires_at - now
+    if ttl <= 0:
+        return False
+
+    key = _bucket_key(bucket)
+    pipe.geoadd(key, (report.longitude, report.latitude, report.id))
+    pipe.expireat(key, expires_at)
+    pipe.set(_payload_key(report.id), json.dumps(alert_payload(report)), ex=ttl)
+    return True
+
+
+def backfill(chunk_size=500):
+    """
+    Index every report of the alert window from the database, then mark the
+    index populated so search_nearby trusts it. Returns how many reports
+    were indexed. Safe to run while reports keep arriving.
+    """
+    client = _redis()
+    now = timezone.now()
+    reports = WasteReport.objects.filter(
+        created_at__gte=now - timedelta(hours=ALERT_WINDOW_HOURS),
+        latitude__isnull=False,
+        longitude__isnull=False,
+    ).exclude(status='invalid').order_by('id')
+
+    indexed = 0
+    pipe = client.pipeline(transaction=False)
+    for report in reports.iterator(chunk_size=chunk_size):
+        if _is_indexable(report) and _add_to_pipeline(pipe, report, int(now.timestamp())):
+            indexed += 1
+            if indexed % chunk_size == 0:
+                pipe.execute()
+    pipe.execute()
+
+    client.set(POPULATED_KEY, now.isoformat())
+    return indexed
+
+
+def is_populated():
+    """Whether the index has been backfilled since Redis last lost its data."""
+    try:
+        return bool(_redis().exists(POPULATED_KEY))
+    except Exception as e:
+        logger.warning("Could not reach GEODATA: %s", e)
+        return False
+
+
+def remove_report(report):
+    """Drop a report from the live alert index."""
+    try:
+        if report.created_at is None:
+            return
+        pipe = _redis().pipeline()
+        pipe.zrem(_bucket_key(_hour_bucket(report.created_at)), report.id)
+        pipe.delete(_payload_key(report.id))
+        pipe.execute()
+    except Exception as e:
+        logger.warning("Could not remove report %s from GEODATA: %s", report.id, e)
+
+
+def search_nearby(lat, lon, radius_km, exclude_user_id=None):
+    """
+    Return alert payloads (with "distance_km" filled in) for indexed reports
+    within radius_km of the point created in the last 24 hours, newest first.
+
+    Returns None when the index has not been backfilled (see backfill) or
+    is unreachable so the caller can fall back to the database.
+    """
+    if abs(lat) > MAX_GEO_LATITUDE:
+        return None
+
+    try:
+        client = _redis()
+        now = timezone.now()
+        keys = [_bucket_key(bucket) for bucket in _window_buckets(now)]
+
+        # A bucket can exist while older reports are missing (e.g. after a
+        # flush); only the backfill marker says the index is complete
+        if not client.exists(POPULATED_KEY):
+            return None
+
+        # Search slightly wider than asked: Redis uses a different earth
+        # radius than haversine_many, which makes the final decision
+        pipe = client.pipeline()
+        for key in keys:
+            pipe.geosearch(key, longitude=lon, latitude=lat, radius=radius_km * 1.01 + 0.01, unit="km")
+        member_lists = pipe.execute()
+
+        ids = {int(member) for members in member_lists for member in members}
+        if not ids:
+            return []
+
+        raw_payloads = client.mget([_payload_key(report_id) for report_id in ids])
+    except Exception as e:
+        logger.warning("GEODATA search failed, falling back to database: %s", e)
+        return None
+
+    time_threshold = now - timedelta(hours=ALERT_WINDOW_HOURS)
+    candidates = []
+    for raw in raw_payloads:
+        if raw is None:
+            continue
+        payload = json.loads(raw)
+        if exclude_user_id is not None and payload["user_id"] == exclude_user_id:
+            continue
+
+        payload["created_at"] = datetime.fromisoformat(payload["created_at"])
+        if payload["created_at"] >= time_threshold:
+            candidates.append(payload)
+
+    distances = haversine_many(
+        lat, lon,
+        [payload["latitude"] for payload in candidates],
+        [payload["longitude"] for payload in candidates]
+    )
+
+    alerts = []
+    for payload, distance in zip(candidates, distances):
+        if distance <= radius_km:
+            payload["distance_km"] = round(float(distance), 2)
+            alerts.append(payload)
+
+    alerts.sort(key=lambda alert: (alert["created_at"], alert["id"]), reverse=True)
+    return alerts
@@ -0,0 +1,117 @@
+"""
+Offline geocoding of free-text addresses against a local gazetteer.
+
+The gazetteer is a CSV file at settings.GAZETTEER_PATH with a header row
+and the columns name, latitude, longitude - one row per locality, landmark
+or street name. No network lookups are made.
+
+An address resolves to the most specific gazetteer name it contains: the
+longest run of consecutive words that matches a name exactly. Results,
+including misses, are cached per normalized address in an in-process LRU
+and in the GeocodeCache table, so repeated places never hit the gazetteer.
+"""
+import csv
+import hashlib
+import logging
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import IntegrityError
+
+from .models import GeocodeCache
+
+logger = logging.getLogger(__name__)
+
+# Longest place name, in words, looked up in the gazetteer
+MAX_NAME_WORDS = 6
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_address(address):
+    """Lowercase, drop punctuation and collapse whitespace."""
+    address = _NON_WORD.sub(" ", (address or "").lower())
+    return _SPACES.sub(" ", address).strip()
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """Return {normalized name: (latitude, longitude)} from the gazetteer file."""
+    path = getattr(settings, 'GAZETTEER_PATH', None)
+    places = {}
+    if not path:
+        return places
+
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                try:
+                    name = normalize_address(row['name'])
+                    places.setdefault(name, (float(row['latitude']), float(row['longitude'])))
+                except (KeyError, TypeError, ValueError):
+                    continue
+    except FileNotFoundError:
+        logger.warning("Gazetteer not found at %s; addresses will not be geocoded", path)
+    return places
+
+
+def lookup_gazetteer(normalized):
+    """Return (matched name, latitude, longitude) for a normalized address, or None."""
+    places = load_gazetteer()
+    if not places or not normalized:
+        return None
+
+    if normalized in places:
+        return (normalized, *places[normalized])
+
+    words = normalized.split(" ")
+    for size in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            name = " ".join(words[start:start + size])
+            if name in places:
+                return (name, *places[name])
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _geocode_normalized(normalized):
+    address_key = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    cached = GeocodeCache.objects.filter(address_key=address_key).first()
+    if cached is not None:
+        return cached.latitude, cached.longitude
+
+    if not load_gazetteer():
+        # Without a gazetteer every address would be cached as a miss
+        return None, None
+
+    match = lookup_gazetteer(normalized)
+    matched_name, latitude, longitude = match if match else (None, None, None)
+    try:
+        GeocodeCache.objects.create(
+            address_key=address_key,
+            normalized_address=normalized,
+            matched_name=matched_name,
+            latitude=latitude,
+            longitude=longitude,
+        )
+    except IntegrityError:
+        # Cached concurrently by another request
+        pass
+    return latitude, longitude
+
+
+def geocode(address):
+    """Return (latitude, longitude) for a free-text address, or (None, None)."""
+    normalized = normalize_address(address)
+    if not normalized:
+        return None, None
+    return _geocode_normalized(normalized)
+
+
+def clear_caches():
+    """Forget the loaded gazetteer and in-process results, e.g. after editing the file."""
+    load_gazetteer.cache_clear()
+    _geocode_normalized.cache_clear()
@@ -0,0 +1,95 @@
+"""
+Pre-aggregated report density for the map heatmap.
+
+Counts live in HeatmapCell, one row per (zoom level, grid cell, category,
+severity, hour). They are adjusted by +1/-1 from signal handlers whenever a
+report is counted, moves or stops counting, so reading the heatmap never
+touches the report tables.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import HeatmapCell
+from .utils import grid_index
+
+# Cell size in degrees per level; each level is 4x coarser than the last
+HEATMAP_LEVELS = (0.01, 0.04, 0.16, 0.64, 2.56, 10.24)
+
+# Responses are coarsened until they fit in this many cells
+MAX_HEATMAP_CELLS = 2500
+
+
+def hour_bucket(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_key(latitude, longitude, category, severity, created_at):
+    """Identify the heatmap buckets a report counts towards, or None."""
+    if latitude is None or longitude is None or created_at is None:
+        return None
+    return (latitude, longitude, category or '', severity or '', hour_bucket(created_at))
+
+
+def adjust(key, delta):
+    """Add delta to the count of every level's bucket for key."""
+    if key is None or delta == 0:
+        return
+    adjust_many([key], delta)
+
+
+def adjust_many(keys, delta=1):
+    """
+    Add delta per key for many reports at once, e.g. after a bulk insert.
+    Reports sharing a bucket are combined into one update.
+    """
+    if delta == 0:
+        return
+
+    totals = Counter()
+    for key in keys:
+        if key is None:
+            continue
+        latitude, longitude, category, severity, hour = key
+        for level, cell_deg in enumerate(HEATMAP_LEVELS):
+            row, col = grid_index(latitude, longitude, cell_deg)
+            totals[(level, row, col, category, severity, hour)] += delta
+
+    for (level, row, col, category, severity, hour), count in totals.items():
+        lookup = dict(level=level, row=row, col=col, category=category, severity=severity, hour=hour)
+        updated = HeatmapCell.objects.filter(**lookup).update(count=F('count') + count)
+        if updated or count < 0:
+            continue
+        try:
+            with transaction.atomic():
+                HeatmapCell.objects.create(count=count, **lookup)
+        except IntegrityError:
+            # Another writer created the bucket first
+            HeatmapCell.objects.filter(**lookup).update(count=F('count') + count)
+
+
+def move(old_key, new_key):
+    """Move one report's contribution from old_key to new_key."""
+    if old_key == new_key:
+        return
+    adjust(old_key, -1)
+    adjust(new_key, 1)
+
+
+def level_for_zoom(zoom):
+    """
+    Pick the finest level whose cells are at least ~1/32 of a web map tile
+    at the given zoom, i.e. a few pixels across on screen.
+    """
+    wanted = 360.0 / (2 ** zoom) / 32
+    for level, cell_deg in enumerate(HEATMAP_LEVELS):
+        if cell_deg >= wanted:
+            return level
+    return len(HEATMAP_LEVELS) - 1
+
+
+def cells_spanned(level, min_lat, max_lat, min_lon, max_lon):
+    min_row, min_col = grid_index(min_lat, min_lon, HEATMAP_LEVELS[level])
+    max_row, max_col = grid_index(max_lat, max_lon, HEATMAP_LEVELS[level])
+    return min_row, max_row, min_col, max_col
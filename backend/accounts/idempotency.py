@@ -0,0 +1,219 @@
+"""
+Idempotency-Key support for submission endpoints.
+
+Clients (the mobile app, the Vapi relay) may send an Idempotency-Key header
+with a POST. The first request with a key runs normally and, if it
+succeeds, its response is stored in an IdempotencyRecord for
+IDEMPOTENCY_TTL_HOURS. Repeats of the key get that response back, marked
+with an Idempotent-Replayed header, without creating anything again.
+
+A key is bound to the request it was first used with: a fingerprint of the
+method, path and body. Reusing it for a different request is answered 422
+rather than with the first request's response. The body is hashed while
+the view reads it, so streamed uploads are not buffered for this, and
+multipart boundaries are left out, so a client that re-encodes the same
+form on retry still matches.
+
+A repeat that arrives while the first request is still running is answered
+409 with Retry-After straight away; holding a worker to wait for the
+original would let duplicate retries tie up the server. Failed requests
+(errors and non-2xx responses) release the key so the client can retry.
+
+Keys are scoped per endpoint and per user (anonymous callers share one
+scope). Run `manage.py purge_idempotency_keys` to delete expired records.
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.http import parse_header_parameters
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL_HOURS = getattr(settings, 'IDEMPOTENCY_TTL_HOURS', 24)
+
+# A request holding a key for longer than this is assumed to have crashed
+IDEMPOTENCY_LOCK_SECONDS = 120
+MAX_KEY_LENGTH = 255
+# Bytes read per call when hashing the rest of a request body
+READ_BUFFER_BYTES = 64 * 1024
+# Attempts at claiming a key that keeps being released under us
+CLAIM_ATTEMPTS = 3
+
+
+def _scope_key(endpoint, request, key):
+    caller = f"user:{request.user.pk}" if request.user.is_authenticated else "anonymous"
+    return hashlib.sha256(f"{endpoint}\n{caller}\n{key}".encode('utf-8')).hexdigest()
+
+
+class _RequestFingerprint:
+    """
+    SHA-256 of a request's method, path and body, fed as the body is read.
+    Multipart boundaries are replaced by a fixed marker before hashing.
+    """
+
+    def __init__(self, request):
+        self._digest = hashlib.sha256(f"{request.method} {request.path}\n".encode('utf-8'))
+        _, params = parse_header_parameters(request.META.get('CONTENT_TYPE', ''))
+        boundary = params.get('boundary')
+        self._delimiter = f"--{boundary}".encode('latin-1') if boundary else None
+        # Tail of the body held back in case a delimiter straddles two reads
+        self._pending = b''
+
+    def update(self, data):
+        if self._delimiter is None:
+            self._digest.update(data)
+            return
+        data = (self._pending + data).replace(self._delimiter, b'--boundary')
+        keep = len(self._delimiter) - 1
+        self._digest.update(data[:-keep])
+        self._pending = data[-keep:]
+
+    def hexdigest(self):
+        self._digest.update(self._pending)
+        self._pending = b''
+        return self._digest.hexdigest()
+
+
+class _FingerprintingStream:
+    """Wraps a request's body stream, passing everything read to a _RequestFingerprint."""
+
+    def __init__(self, stream, fingerprint):
+        self._stream = stream
+        self._fingerprint = fingerprint
+
+    def read(self, *args, **kwargs):
+        data = self._stream.read(*args, **kwargs)
+        self._fingerprint.update(data)
+        return data
+
+    def readline(self, *args, **kwargs):
+        data = self._stream.readline(*args, **kwargs)
+        self._fingerprint.update(data)
+        return data
+
+    def drain(self):
+        """Read, and so hash, whatever the view left unread."""
+        while self.read(READ_BUFFER_BYTES):
+            pass
+        return self._fingerprint.hexdigest()
+
+
+def _fingerprint_body(request):
+    """
+    Route the Django request's body through a fingerprint as it is read.
+    Returns the wrapping stream; call its drain() for the final hash.
+    """
+    django_request = getattr(request, '_request', request)
+    stream = _FingerprintingStream(django_request._stream, _RequestFingerprint(django_request))
+    django_request._stream = stream
+    return stream
+
+
+def _claim(scope_key, endpoint):
+    """
+    Return (record, claimed). claimed is True when this request now owns
+    the key and must run; otherwise record belongs to an earlier request.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    try:
+        with transaction.atomic():
+            return IdempotencyRecord.objects.create(
+                scope_key=scope_key, endpoint=endpoint, expires_at=expires_at
+            ), True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyRecord.objects.filter(scope_key=scope_key).first()
+    if record is None:
+        # Released by a failed request in the meantime; the caller tries again
+        return None, False
+
+    abandoned = record.status == 'in_progress' and record.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    if record.expires_at <= now or abandoned:
+        # Take the key over, unless another request just did
+        taken = IdempotencyRecord.objects.filter(
+            pk=record.pk, status=record.status, created_at=record.created_at
+        ).update(
+            status='in_progress', created_at=now, expires_at=expires_at,
+            request_hash='', response_status=None, response_body=None,
+        )
+        if taken:
+            record.refresh_from_db()
+            return record, True
+    return record, False
+
+
+def _replay(record):
+    return Response(
+        record.response_body,
+        status=record.response_status,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def idempotent(endpoint):
+    """
+    Make a DRF function view honour the Idempotency-Key header. Apply it
+    below @api_view/@permission_classes so the user is authenticated.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({"error": f"{IDEMPOTENCY_HEADER} may be at most {MAX_KEY_LENGTH} characters"}, status=400)
+
+            scope_key = _scope_key(endpoint, request, key)
+            body = _fingerprint_body(request)
+            for _ in range(CLAIM_ATTEMPTS):
+                record, claimed = _claim(scope_key, endpoint)
+                if claimed or record is not None:
+                    break
+
+            if not claimed:
+                if record is None or record.status != 'done':
+                    return Response(
+                        {"error": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"},
+                        status=409, headers={'Retry-After': '1'},
+                    )
+                if body.drain() != record.request_hash:
+                    return Response(
+                        {"error": f"This {IDEMPOTENCY_HEADER} was already used for a different request"},
+                        status=422,
+                    )
+                return _replay(record)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                IdempotencyRecord.objects.filter(pk=record.pk, status='in_progress').delete()
+                raise
+
+            if 200 <= response.status_code < 300 and hasattr(response, 'data'):
+                IdempotencyRecord.objects.filter(pk=record.pk).update(
+                    status='done',
+                    request_hash=body.drain(),
+                    response_status=response.status_code,
+                    response_body=response.data,
+                )
+            else:
+                IdempotencyRecord.objects.filter(pk=record.pk, status='in_progress').delete()
+            return response
+
+        return wrapper
+    return decorator
+
+
+def purge_expired():
+    """Delete expired records. Returns how many were removed."""
+    deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
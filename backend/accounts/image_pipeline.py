@@ -0,0 +1,171 @@
+"""
+Ingest-time optimization of WasteReport photos.
+
+Phone photos (4-12 MB) are rewritten once on upload: EXIF orientation is
+applied to the pixels, all metadata (EXIF, GPS, ICC, XMP) is dropped, the
+image is downscaled to REPORT_PHOTO_MAX_DIMENSION on its longest side and
+re-encoded as REPORT_PHOTO_FORMAT. The stored photo is what the validator
+receives, so this shrinks both storage and classifier payloads.
+
+The image is decoded once: JPEGs are decoded straight at a reduced scale
+(Image.draft) and every later step works on that bitmap. With
+REPORT_PHOTO_PROCESS_WORKERS > 0 the work runs in a process pool instead of
+the request thread.
+
+The untouched upload is kept in WasteReport.original_photo only when
+REPORT_PHOTO_KEEP_ORIGINAL is set. Files Pillow cannot decode are stored
+as uploaded.
+"""
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+REPORT_PHOTO_MAX_DIMENSION = getattr(settings, 'REPORT_PHOTO_MAX_DIMENSION', 1600)
+REPORT_PHOTO_FORMAT = getattr(settings, 'REPORT_PHOTO_FORMAT', 'WEBP')
+REPORT_PHOTO_QUALITY = getattr(settings, 'REPORT_PHOTO_QUALITY', 80)
+REPORT_PHOTO_KEEP_ORIGINAL = getattr(settings, 'REPORT_PHOTO_KEEP_ORIGINAL', False)
+REPORT_PHOTO_PROCESS_WORKERS = getattr(settings, 'REPORT_PHOTO_PROCESS_WORKERS', 0)
+
+# Refuse to decode anything larger; guards against decompression bombs
+MAX_INPUT_PIXELS = 80_000_000
+
+EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg', 'PNG': '.png'}
+
+
+class OptimizedImage:
+    """Result of optimize_image: the encoded bytes plus before/after measurements."""
+
+    def __init__(self, data, original_bytes, original_size, size, seconds):
+        self.data = data
+        self.original_bytes = original_bytes
+        self.original_size = original_size
+        self.size = size
+        self.seconds = seconds
+
+    @property
+    def saved_bytes(self):
+        return self.original_bytes - len(self.data)
+
+
+def optimize_image(source, max_dimension=REPORT_PHOTO_MAX_DIMENSION,
+                   image_format=REPORT_PHOTO_FORMAT, quality=REPORT_PHOTO_QUALITY):
+    """
+    Orient, strip, downscale and re-encode an image given as encoded bytes
+    or a file path (large uploads already on disk are not read into memory).
+    Module-level with picklable arguments so it can run in a worker process.
+    Raises UnidentifiedImageError (or OSError) for data Pillow cannot decode.
+    """
+    started = time.perf_counter()
+    if isinstance(source, bytes):
+        original_bytes = len(source)
+        source = io.BytesIO(source)
+    else:
+        original_bytes = os.path.getsize(source)
+
+    output = io.BytesIO()
+    # Closing the opened file also releases the descriptor of on-disk uploads
+    with Image.open(source) as image:
+        if image.width * image.height > MAX_INPUT_PIXELS:
+            raise UnidentifiedImageError(f"Image is too large ({image.width}x{image.height})")
+        original_size = image.size
+
+        # Let the JPEG decoder skip straight to the smallest DCT scale that still
+        # covers max_dimension; a square box keeps this right after rotation
+        image.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+        if image_format == 'JPEG' and image.mode == 'RGBA':
+            image = image.convert('RGB')
+
+        # No exif/icc_profile arguments: the re-encoded file carries no metadata
+        save_options = {'quality': quality}
+        if image_format == 'WEBP':
+            save_options['method'] = 4
+        elif image_format == 'JPEG':
+            save_options.update(optimize=True, progressive=True)
+        image.save(output, format=image_format, **save_options)
+        size = image.size
+
+    return OptimizedImage(
+        data=output.getvalue(),
+        original_bytes=original_bytes,
+        original_size=original_size,
+        size=size,
+        seconds=time.perf_counter() - started,
+    )
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=REPORT_PHOTO_PROCESS_WORKERS)
+    return _pool
+
+
+def _run(source):
+    if REPORT_PHOTO_PROCESS_WORKERS > 0:
+        try:
+            return _process_pool().submit(optimize_image, source).result()
+        except BrokenProcessPool:
+            global _pool
+            logger.warning("Photo process pool died; optimizing in the request thread")
+            with _pool_lock:
+                _pool = None
+    return optimize_image(source)
+
+
+def prepare_photo(upload):
+    """
+    Return (photo, original) for an uploaded report photo: the optimized
+    file to store as WasteReport.photo, and the untouched upload to store
+    as original_photo, or None when originals are not kept.
+    """
+    if getattr(upload, 'image_info', False) is None:
+        # Streamed uploads sniff the header on arrival (accounts.upload_handlers)
+        logger.warning("Storing photo %s unoptimized: not a recognizable image", upload.name)
+        return upload, None
+
+    if hasattr(upload, 'temporary_file_path'):
+        source = upload.temporary_file_path()
+    else:
+        upload.seek(0)
+        source = upload.read()
+    name = os.path.splitext(os.path.basename(upload.name or 'photo'))[0] or 'photo'
+
+    try:
+        result = _run(source)
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        logger.warning("Storing photo %s unoptimized: %s", upload.name, e)
+        upload.seek(0)
+        return upload, None
+
+    logger.info(
+        "Optimized photo %s: %sx%s %s B -> %sx%s %s B in %.0f ms",
+        upload.name, *result.original_size, result.original_bytes,
+        *result.size, len(result.data), result.seconds * 1000
+    )
+
+    photo = ContentFile(result.data, name=name + EXTENSIONS.get(REPORT_PHOTO_FORMAT, '.img'))
+    original = None
+    if REPORT_PHOTO_KEEP_ORIGINAL:
+        upload.seek(0)
+        original = upload
+    return photo, original
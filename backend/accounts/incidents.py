@@ -0,0 +1,136 @@
+"""
+Incremental clustering of duplicate WasteReports into Incidents.
+
+A report joins the nearest Incident of the same category whose centroid is
+within INCIDENT_RADIUS_METERS and whose latest report is at most
+INCIDENT_WINDOW_HOURS older than it; otherwise it starts a new Incident.
+Until a report has been classified, its normalized issue_type stands in for
+the category, and it is re-clustered once validation assigns one.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Incident, WasteReport
+from .utils import grid_cells_within, haversine_many
+
+INCIDENT_RADIUS_METERS = getattr(settings, 'INCIDENT_RADIUS_METERS', 50)
+INCIDENT_WINDOW_HOURS = getattr(settings, 'INCIDENT_WINDOW_HOURS', 72)
+
+SEVERITY_RANK = {'low': 1, 'medium': 2, 'high': 3}
+
+
+def cluster_key(report):
+    if report.category:
+        return report.category
+    return (report.issue_type or '').strip().lower()[:100]
+
+
+def _worse_severity(a, b):
+    return a if SEVERITY_RANK.get(a, 0) >= SEVERITY_RANK.get(b, 0) else b
+
+
+def _find_incident(report, category):
+    """Nearest open incident of the same category that the report belongs to, or None."""
+    if report.latitude is None or report.longitude is None:
+        return None
+
+    radius_km = INCIDENT_RADIUS_METERS / 1000
+    candidates = Incident.objects.select_for_update().filter(
+        category=category,
+        last_reported_at__gte=report.created_at - timedelta(hours=INCIDENT_WINDOW_HOURS),
+        latitude__isnull=False,
+        longitude__isnull=False,
+    )
+    cells = grid_cells_within(report.latitude, report.longitude, radius_km)
+    if cells is not None:
+        candidates = candidates.filter(grid_cell__in=cells)
+    candidates = list(candidates)
+    if not candidates:
+        return None
+
+    distances = haversine_many(
+        report.latitude, report.longitude,
+        [incident.latitude for incident in candidates],
+        [incident.longitude for incident in candidates]
+    )
+    distance, incident = min(zip(distances, candidates), key=lambda pair: pair[0])
+    return incident if distance <= radius_km else None
+
+
+@transaction.atomic
+def assign_incident(report):
+    """
+    Attach a report to a matching Incident, or open a new one, and return it.
+    Invalid reports are not clustered.
+    """
+    if report.status == 'invalid':
+        return None
+
+    category = cluster_key(report)
+    incident = _find_incident(report, category)
+
+    if incident is None:
+        incident = Incident.objects.create(
+            category=category,
+            severity=report.severity,
+            latitude=report.latitude,
+            longitude=report.longitude,
+            member_count=1,
+            first_reported_at=report.created_at,
+            last_reported_at=report.created_at,
+        )
+    else:
+        # Fold the report into the running centroid
+        n = incident.member_count
+        incident.latitude = (incident.latitude * n + report.latitude) / (n + 1)
+        incident.longitude = (incident.longitude * n + report.longitude) / (n + 1)
+        incident.member_count = n + 1
+        incident.severity = _worse_severity(incident.severity, report.severity)
+        incident.first_reported_at = min(incident.first_reported_at, report.created_at)
+        incident.last_reported_at = max(incident.last_reported_at, report.created_at)
+        incident.save()
+
+    WasteReport.objects.filter(pk=report.pk).update(incident=incident)
+    report.incident = incident
+    return incident
+
+
+@transaction.atomic
+def detach_incident(report):
+    """Remove a report from its Incident, deleting the Incident once empty."""
+    if report.incident_id is None:
+        return
+
+    incident = Incident.objects.select_for_update().filter(pk=report.incident_id).first()
+    WasteReport.objects.filter(pk=report.pk).update(incident=None)
+    report.incident = None
+    if incident is None:
+        return
+
+    if incident.member_count <= 1:
+        incident.delete()
+        return
+
+    n = incident.member_count
+    if report.latitude is not None and incident.latitude is not None:
+        incident.latitude = (incident.latitude * n - report.latitude) / (n - 1)
+        incident.longitude = (incident.longitude * n - report.longitude) / (n - 1)
+    incident.member_count = n - 1
+    incident.save()
+
+
+def recluster(report):
+    """
+    Re-evaluate a report's Incident after its category or status changed,
+    e.g. once AI validation classified it or marked it invalid.
+    """
+    current = report.incident
+    if current is not None and report.status != 'invalid' and current.category == cluster_key(report):
+        if current.severity != _worse_severity(current.severity, report.severity):
+            Incident.objects.filter(pk=current.pk).update(severity=report.severity)
+        return
+
+    detach_incident(report)
+    assign_incident(report)
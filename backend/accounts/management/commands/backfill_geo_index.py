@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts import geo_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Index the last day of reports in the GEODATA Redis alert index and mark it "
+        "populated. Run after deploying and whenever Redis loses its data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        indexed = geo_index.backfill(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} reports; alert index marked populated"))
@@ -0,0 +1,49 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from accounts.utils import calculate_distance, haversine_many
+
+
+class Command(BaseCommand):
+    help = "Benchmark haversine_many against a calculate_distance loop"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000],
+            help="Number of destination points per run"
+        )
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the best is reported")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        origin_lat, origin_lon = 19.0760, 72.8777
+
+        self.stdout.write(f"{'points':>10} {'scalar loop':>14} {'vectorized':>14} {'speedup':>9} {'max diff (km)':>14}")
+        for size in options['sizes']:
+            lats = origin_lat + rng.uniform(-0.5, 0.5, size)
+            lons = origin_lon + rng.uniform(-0.5, 0.5, size)
+            lat_list, lon_list = lats.tolist(), lons.tolist()
+
+            scalar_time = float('inf')
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                scalar = [
+                    calculate_distance(origin_lat, origin_lon, lat, lon)
+                    for lat, lon in zip(lat_list, lon_list)
+                ]
+                scalar_time = min(scalar_time, time.perf_counter() - start)
+
+            vector_time = float('inf')
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                vector = haversine_many(origin_lat, origin_lon, lats, lons)
+                vector_time = min(vector_time, time.perf_counter() - start)
+
+            max_diff = float(np.max(np.abs(vector - np.asarray(scalar))))
+            self.stdout.write(
+                f"{size:>10} {scalar_time * 1000:>12.2f}ms {vector_time * 1000:>12.2f}ms "
+                f"{scalar_time / vector_time:>8.1f}x {max_diff:>14.2e}"
+            )
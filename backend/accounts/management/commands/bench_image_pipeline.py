@@ -0,0 +1,95 @@
+import io
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageFilter
+
+from accounts import image_pipeline
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.heic', '.bmp', '.tif', '.tiff')
+
+
+def synthetic_photo(rng, width=4000, height=3000):
+    """A phone-sized JPEG with camera-like noise and a rotated EXIF orientation."""
+    small = Image.effect_noise((width // 8, height // 8), 64).convert('RGB')
+    image = small.resize((width, height), Image.BICUBIC).filter(ImageFilter.GaussianBlur(1))
+    tint = Image.new('RGB', image.size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    image = Image.blend(image, tint, 0.3)
+
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=92, exif=exif)
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Measure storage and validator payload reduction of the report photo pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help="Directory of sample photos (default: stored report photos)")
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help="Use this many generated 12 MP phone photos instead of files")
+        parser.add_argument('--processes', type=int, default=0,
+                            help="Also time the batch through a process pool of this size")
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        samples = self._samples(options)
+        if not samples:
+            self.stdout.write("No sample photos found")
+            return
+
+        results = []
+        started = time.perf_counter()
+        for name, data in samples:
+            try:
+                results.append(image_pipeline.optimize_image(data))
+            except Exception as e:
+                self.stdout.write(f"skipped {name}: {e}")
+        inline_seconds = time.perf_counter() - started
+        if not results:
+            return
+
+        before = sum(result.original_bytes for result in results)
+        after = sum(len(result.data) for result in results)
+        per_image_ms = [result.seconds * 1000 for result in results]
+
+        self.stdout.write(f"photos:                 {len(results)}")
+        self.stdout.write(f"format / max dimension: {image_pipeline.REPORT_PHOTO_FORMAT} "
+                          f"q{image_pipeline.REPORT_PHOTO_QUALITY} / {image_pipeline.REPORT_PHOTO_MAX_DIMENSION}px")
+        self.stdout.write(f"stored bytes:           {before / 1024 / 1024:.1f} MiB -> {after / 1024 / 1024:.1f} MiB "
+                          f"({100 * (1 - after / before):.1f}% smaller)")
+        self.stdout.write(f"validator payload avg:  {before / len(results) / 1024:.0f} KiB -> "
+                          f"{after / len(results) / 1024:.0f} KiB per report")
+        self.stdout.write(f"time per photo p50/max: {statistics.median(per_image_ms):.0f} / {max(per_image_ms):.0f} ms")
+        self.stdout.write(f"inline throughput:      {len(results) / inline_seconds:.1f} photos/s")
+
+        if options['processes'] > 0:
+            with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+                # Warm the workers up so start-up is not counted
+                list(pool.map(image_pipeline.optimize_image, [samples[0][1]] * options['processes']))
+                started = time.perf_counter()
+                list(pool.map(image_pipeline.optimize_image, [data for _, data in samples]))
+                pool_seconds = time.perf_counter() - started
+            self.stdout.write(f"pool throughput ({options['processes']}):    "
+                              f"{len(samples) / pool_seconds:.1f} photos/s")
+
+    def _samples(self, options):
+        if options['synthetic']:
+            rng = random.Random(options['seed'])
+            return [(f"synthetic-{i}", synthetic_photo(rng)) for i in range(options['synthetic'])]
+
+        path = options['path'] or os.path.join(settings.MEDIA_ROOT, 'waste_reports')
+        samples = []
+        for root, _, names in os.walk(path):
+            for name in sorted(names):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    with open(os.path.join(root, name), 'rb') as f:
+                        samples.append((name, f.read()))
+        return samples
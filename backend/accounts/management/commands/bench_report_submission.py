@@ -0,0 +1,109 @@
+import asyncio
+import io
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import validation_queue
+from accounts.models import WasteReport
+
+BENCH_USERNAME = "bench-report-submission"
+
+# Cheap sync view polled during each run: shows how long other requests
+# wait for the thread Django runs sync views on under ASGI
+PROBE_PATH = "/auth/report-stats/"
+PROBE_INTERVAL_SECONDS = 0.05
+
+ENDPOINTS = {
+    "sync": "/auth/report/",
+    "async": "/auth/report/async/",
+}
+
+
+def sample_photo(size):
+    image = Image.effect_noise((size, size * 3 // 4), 48).convert('RGB')
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=90)
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent report submission throughput of the sync and async views under ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=60, help="Submissions per endpoint and concurrency")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--photo-size', type=int, default=1600, help="Width in pixels of the test photo")
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        token = str(RefreshToken.for_user(user).access_token)
+        photo = sample_photo(options['photo_size'])
+
+        # Measure submission only, not validation
+        in_process_workers = validation_queue._wake_local_pool
+        validation_queue._wake_local_pool = lambda: None
+        try:
+            self.stdout.write(f"photo: {len(photo) / 1024:.0f} KiB, {options['requests']} submissions per run")
+            self.stdout.write(f"{'view':<6} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+                              f"{'errors':>7} {'other req p50 ms':>17}")
+            for concurrency in options['concurrency']:
+                for label, path in ENDPOINTS.items():
+                    rate, p50, p99, errors, probe_p50 = asyncio.run(
+                        self._run(path, token, photo, options['requests'], concurrency)
+                    )
+                    self.stdout.write(f"{label:<6} {concurrency:>11} {rate:>8.1f} {p50:>8.0f} {p99:>8.0f} "
+                                      f"{errors:>7} {probe_p50:>17.0f}")
+        finally:
+            validation_queue._wake_local_pool = in_process_workers
+            WasteReport.objects.filter(user=user).delete()
+            user.delete()
+
+    async def _run(self, path, token, photo, total, concurrency):
+        client = AsyncClient()
+        headers = {"Authorization": f"Bearer {token}"}
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def submit(index):
+            nonlocal errors
+            upload = io.BytesIO(photo)
+            upload.name = f"bench-{index}.jpg"
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(path, {
+                    "description": "Overflowing garbage bin",
+                    "location": '{"lat": 19.076, "lon": 72.8777}',
+                    "photo": upload,
+                }, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 201:
+                    errors += 1
+
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get(PROBE_PATH, headers=headers)
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(submit(index) for index in range(total)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        probe_p50 = statistics.median(probe_latencies) * 1000 if probe_latencies else 0.0
+        return total / elapsed, statistics.median(latencies) * 1000, p99 * 1000, errors, probe_p50
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from accounts import geocoding
+from accounts.models import CivicIssue, GeocodeCache
+
+
+class Command(BaseCommand):
+    help = "Backfill CivicIssue latitude/longitude from the offline gazetteer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-geocode issues that already have coordinates")
+        parser.add_argument(
+            '--retry-misses', action='store_true',
+            help="Forget cached unresolved addresses first, e.g. after extending the gazetteer"
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_misses']:
+            deleted, _ = GeocodeCache.objects.filter(latitude__isnull=True).delete()
+            self.stdout.write(f"Forgot {deleted} cached misses")
+        geocoding.clear_caches()
+
+        if not geocoding.load_gazetteer():
+            self.stderr.write(self.style.ERROR("Gazetteer is empty or missing; see settings.GAZETTEER_PATH"))
+            return
+
+        issues = CivicIssue.objects.all()
+        if not options['all']:
+            issues = issues.filter(latitude__isnull=True)
+
+        resolved = unresolved = 0
+        for issue in issues.iterator(chunk_size=500):
+            latitude, longitude = geocoding.geocode(issue.address)
+            if latitude is None:
+                unresolved += 1
+                continue
+            if (issue.latitude, issue.longitude) != (latitude, longitude):
+                issue.latitude, issue.longitude = latitude, longitude
+                # Goes through save() so the heatmap picks the issue up
+                issue.save(update_fields=['latitude', 'longitude'])
+            resolved += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {resolved} issues, {unresolved} unresolved"))
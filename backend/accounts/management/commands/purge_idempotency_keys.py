@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records"
+
+    def handle(self, *args, **options):
+        removed = idempotency.purge_expired()
+        self.stdout.write(f"Removed {removed} expired idempotency records")
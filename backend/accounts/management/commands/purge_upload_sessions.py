@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts import resumable_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete expired resumable upload sessions and their partial files"
+
+    def handle(self, *args, **options):
+        removed = resumable_uploads.purge_expired()
+        self.stdout.write(f"Removed {removed} expired upload sessions")
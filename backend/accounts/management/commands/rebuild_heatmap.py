@@ -0,0 +1,53 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts import heatmap
+from accounts.models import CivicIssue, HeatmapCell, WasteReport
+from accounts.signals import civic_issue_heatmap_key, waste_report_heatmap_key
+from accounts.utils import grid_index
+
+
+def add_to_counts(counts, key):
+    if key is None:
+        return
+    latitude, longitude, category, severity, hour = key
+    for level, cell_deg in enumerate(heatmap.HEATMAP_LEVELS):
+        row, col = grid_index(latitude, longitude, cell_deg)
+        counts[(level, row, col, category, severity, hour)] += 1
+
+
+class Command(BaseCommand):
+    help = "Recount the HeatmapCell aggregates from scratch"
+
+    def handle(self, *args, **options):
+        counts = Counter()
+        reports = WasteReport.objects.exclude(status='invalid').filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).only('id', 'status', 'category', 'severity', 'latitude', 'longitude', 'created_at')
+
+        for report in reports.iterator(chunk_size=2000):
+            values = {name: getattr(report, name) for name in WasteReport.TRACKED_FIELDS}
+            add_to_counts(counts, waste_report_heatmap_key(report, values))
+
+        issues = CivicIssue.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).only('id', 'issue', 'latitude', 'longitude', 'created_at')
+
+        for issue in issues.iterator(chunk_size=2000):
+            values = {name: getattr(issue, name) for name in CivicIssue.TRACKED_FIELDS}
+            add_to_counts(counts, civic_issue_heatmap_key(issue, values))
+
+        with transaction.atomic():
+            HeatmapCell.objects.all().delete()
+            HeatmapCell.objects.bulk_create(
+                (
+                    HeatmapCell(level=level, row=row, col=col, category=category,
+                                severity=severity, hour=hour, count=count)
+                    for (level, row, col, category, severity, hour), count in counts.items()
+                ),
+                batch_size=2000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(counts)} heatmap buckets"))
@@ -0,0 +1,34 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from accounts import classifier_client, validation_queue
+
+
+class Command(BaseCommand):
+    help = "Run background report validation workers outside the web process"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Number of worker threads")
+        parser.add_argument(
+            '--poll-interval', type=float, default=validation_queue.POLL_INTERVAL_SECONDS,
+            help="Seconds an idle worker waits before checking for due jobs again"
+        )
+
+    def handle(self, *args, **options):
+        pool = validation_queue.WorkerPool(options['workers'], poll_interval=options['poll_interval'])
+        stopping = threading.Event()
+
+        def request_stop(signum, frame):
+            stopping.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        pool.start()
+        self.stdout.write(f"Validation workers running: {options['workers']} threads ({pool.name})")
+        stopping.wait()
+
+        self.stdout.write("Stopping; in-flight jobs finish or are re-queued after their lock expires")
+        pool.stop(timeout=classifier_client.CLASSIFIER_READ_TIMEOUT_SECONDS)
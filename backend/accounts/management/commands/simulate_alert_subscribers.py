@@ -0,0 +1,105 @@
+import asyncio
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from accounts import alert_stream
+
+
+class Command(BaseCommand):
+    help = "Simulate many idle live-alert stream subscribers and measure fan-out cost"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=5000)
+        parser.add_argument('--events', type=int, default=500, help="Alerts published during the run")
+        parser.add_argument('--radius', type=float, default=5.0, help="Subscriber radius in km")
+        parser.add_argument('--spread', type=float, default=0.3, help="Half-width in degrees of the simulated city")
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options))
+
+    async def _run(self, options):
+        rng = random.Random(options['seed'])
+        center_lat, center_lon, spread = 19.0760, 72.8777, options['spread']
+        broker = alert_stream.broker
+
+        sent_at = {}
+        latencies = []
+        received = 0
+
+        async def consume(stream):
+            nonlocal received
+            async for message in stream:
+                if message.startswith("id: "):
+                    alert_id = int(message.split("\n", 1)[0][4:])
+                    latencies.append(time.perf_counter() - sent_at[alert_id])
+                    received += 1
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+        tasks = []
+        for user_id in range(1, options['subscribers'] + 1):
+            stream = alert_stream.event_stream(
+                center_lat + rng.uniform(-spread, spread),
+                center_lon + rng.uniform(-spread, spread),
+                options['radius'],
+                user_id=user_id,
+                heartbeat=3600,
+            )
+            tasks.append(asyncio.create_task(consume(stream)))
+
+        while len(broker) < options['subscribers']:
+            await asyncio.sleep(0.01)
+
+        idle_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        # Publish from a plain thread, as post_save handlers would
+        dispatch_times = []
+        expected = 0
+
+        def publish():
+            nonlocal expected
+            for alert_id in range(1, options['events'] + 1):
+                payload = {
+                    "id": alert_id,
+                    "user_id": 0,
+                    "issue_type": "General Waste Issue",
+                    "description": "simulated",
+                    "severity": "medium",
+                    "latitude": center_lat + rng.uniform(-spread, spread),
+                    "longitude": center_lon + rng.uniform(-spread, spread),
+                    "created_at": "2025-01-01T00:00:00+00:00",
+                    "image_url": None,
+                }
+                sent_at[alert_id] = time.perf_counter()
+                expected += broker.dispatch(payload)
+                dispatch_times.append(time.perf_counter() - sent_at[alert_id])
+
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        while publisher.is_alive() or received < expected:
+            await asyncio.sleep(0.01)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        def ms(values, q):
+            return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else 0.0
+
+        self.stdout.write(f"subscribers:            {options['subscribers']}")
+        self.stdout.write(f"idle memory:            {idle_bytes / 1024 / 1024:.1f} MiB "
+                          f"({idle_bytes / options['subscribers']:.0f} B/subscriber)")
+        self.stdout.write(f"alerts published:       {options['events']}")
+        self.stdout.write(f"deliveries:             {received} "
+                          f"({received / max(options['events'], 1):.1f} subscribers/alert)")
+        self.stdout.write(f"dispatch time p50/p99:  {ms(dispatch_times, 50):.3f} / {ms(dispatch_times, 99):.3f} ms")
+        self.stdout.write(f"delivery lag p50/p99:   {ms(latencies, 50):.3f} / {ms(latencies, 99):.3f} ms")
+        self.stdout.write(f"subscribers left:       {len(broker)}")
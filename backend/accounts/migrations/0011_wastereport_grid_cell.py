@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-16 10:12
+
+from django.db import migrations, models
+
+from accounts.utils import grid_cell
+
+
+def backfill_grid_cells(apps, schema_editor):
+    WasteReport = apps.get_model("accounts", "WasteReport")
+    reports = WasteReport.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).only("id", "latitude", "longitude")
+
+    batch = []
+    for report in reports.iterator():
+        report.grid_cell = grid_cell(report.latitude, report.longitude)
+        batch.append(report)
+        if len(batch) >= 1000:
+            WasteReport.objects.bulk_update(batch, ["grid_cell"])
+            batch = []
+    if batch:
+        WasteReport.objects.bulk_update(batch, ["grid_cell"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0010_delete_appnotification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wastereport",
+            name="grid_cell",
+            field=models.CharField(blank=True, db_index=True, max_length=32, null=True),
+        ),
+        migrations.RunPython(backfill_grid_cells, migrations.RunPython.noop),
+    ]
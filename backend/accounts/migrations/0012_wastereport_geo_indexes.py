@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_wastereport_grid_cell'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wastereport',
+            index=models.Index(fields=['created_at', 'latitude', 'longitude'], name='wastereport_recent_geo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastereport',
+            index=models.Index(condition=models.Q(('status', 'invalid'), _negated=True), fields=['created_at', 'latitude', 'longitude'], name='wastereport_live_geo_idx'),
+        ),
+    ]
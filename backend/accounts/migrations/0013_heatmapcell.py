@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_wastereport_geo_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeatmapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('row', models.IntegerField()),
+                ('col', models.IntegerField()),
+                ('category', models.CharField(blank=True, default='', max_length=50)),
+                ('severity', models.CharField(blank=True, default='', max_length=20)),
+                ('hour', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['level', 'hour', 'row', 'col'], name='heatmap_level_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('level', 'row', 'col', 'category', 'severity', 'hour'), name='unique_heatmap_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_heatmapcell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Incident',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('severity', models.CharField(blank=True, max_length=20, null=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('grid_cell', models.CharField(blank=True, db_index=True, max_length=32, null=True)),
+                ('member_count', models.IntegerField(default=0)),
+                ('first_reported_at', models.DateTimeField()),
+                ('last_reported_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-last_reported_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='wastereport',
+            name='incident',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reports', to='accounts.incident'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_validationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wastereport',
+            name='original_photo',
+            field=models.FileField(blank=True, null=True, upload_to='waste_reports/originals/'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_wastereport_original_photo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='wastereport',
+            name='original_photo',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='waste_reports/originals/'),
+        ),
+        migrations.AlterField(
+            model_name='wastereport',
+            name='photo',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to='waste_reports/'),
+        ),
+        migrations.AlterField(
+            model_name='wastereport',
+            name='voice_note',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='voice_notes/'),
+        ),
+    ]
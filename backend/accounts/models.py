@@ -1,5 +1,10 @@
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import User
+from .storage import content_hash
+from .utils import grid_cell
 
 class UserProfile(models.Model):
     ROLE_CHOICES = (
@@ -43,7 +48,72 @@ class ModelOutput(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.severity}"
 
-class WasteReport(models.Model):
+class TrackedFieldsMixin:
+    """
+    Remember the values of TRACKED_FIELDS, and the stored names of
+    TRACKED_FILE_FIELDS, as last loaded or saved, in `_loaded_values`, so
+    signal handlers can see what a save changed. Deferred fields and fields
+    a save left out of update_fields keep their previous entry.
+    """
+    TRACKED_FIELDS = ()
+    TRACKED_FILE_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        tracked = cls.TRACKED_FIELDS + cls.TRACKED_FILE_FIELDS
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if name in tracked
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        skipped = self.get_deferred_fields()
+        loaded = dict(getattr(self, '_loaded_values', {}))
+        for name in self.TRACKED_FIELDS + self.TRACKED_FILE_FIELDS:
+            if name in skipped or (update_fields is not None and name not in update_fields):
+                continue
+            value = getattr(self, name)
+            # FieldFiles change in place when a new file is saved; keep the name
+            loaded[name] = value.name if name in self.TRACKED_FILE_FIELDS else value
+        self._loaded_values = loaded
+
+
+class Incident(models.Model):
+    """
+    One real-world problem reported by one or more WasteReports that are
+    close in space and time and share a category (see accounts.incidents).
+    """
+    # Report category, or the normalized issue_type until reports are classified
+    category = models.CharField(max_length=100)
+    severity = models.CharField(max_length=20, blank=True, null=True)
+    # Running centroid of the member reports
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    grid_cell = models.CharField(max_length=32, blank=True, null=True, db_index=True)
+    member_count = models.IntegerField(default=0)
+    first_reported_at = models.DateTimeField()
+    last_reported_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_reported_at']
+
+    def __str__(self):
+        return f"Incident {self.id} - {self.category} ({self.member_count} reports)"
+
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.grid_cell = grid_cell(self.latitude, self.longitude)
+        else:
+            self.grid_cell = None
+        super().save(*args, **kwargs)
+
+
+class WasteReport(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
         ('in-progress', 'In Progress'),
@@ -72,9 +142,15 @@ class WasteReport(models.Model):
     location = models.CharField(max_length=255, blank=True, null=True)
     latitude = models.FloatField(blank=True, null=True)
     longitude = models.FloatField(blank=True, null=True)
-    photo = models.ImageField(upload_to='waste_reports/', blank=True, null=True)
-    voice_note = models.FileField(upload_to='voice_notes/', blank=True, null=True)
+    # Spatial index cell derived from latitude/longitude (see utils.grid_cell)
+    grid_cell = models.CharField(max_length=32, blank=True, null=True, db_index=True)
+    # Stored by content hash (see accounts.storage), hence the longer names
+    photo = models.ImageField(upload_to='waste_reports/', max_length=255, blank=True, null=True)
+    # Upload as received, kept only with REPORT_PHOTO_KEEP_ORIGINAL (see accounts.image_pipeline)
+    original_photo = models.FileField(upload_to='waste_reports/originals/', max_length=255, blank=True, null=True)
+    voice_note = models.FileField(upload_to='voice_notes/', max_length=255, blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    incident = models.ForeignKey(Incident, on_delete=models.SET_NULL, blank=True, null=True, related_name='reports')
     
     # AI Classification fields
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, blank=True, null=True)
@@ -86,17 +162,209 @@ class WasteReport(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Recent reports inside a latitude/longitude box (nearby alerts)
+            models.Index(fields=['created_at', 'latitude', 'longitude'], name='wastereport_recent_geo_idx'),
+            # Same lookup restricted to reports that can still raise an alert
+            models.Index(
+                fields=['created_at', 'latitude', 'longitude'],
+                condition=~models.Q(status='invalid'),
+                name='wastereport_live_geo_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.issue_type} - {self.status}"
+
+    # Fields whose previous value signal handlers compare against on save
+    TRACKED_FIELDS = ('status', 'category', 'severity', 'latitude', 'longitude')
+    # Replaced files release their reference in content-addressed storage
+    TRACKED_FILE_FIELDS = ('photo', 'original_photo', 'voice_note')
+
+    @property
+    def photo_sha256(self):
+        """Content hash of the stored photo, or None (no photo, or stored before hashing)."""
+        return content_hash(self.photo.name) if self.photo else None
+
+    @property
+    def voice_note_sha256(self):
+        return content_hash(self.voice_note.name) if self.voice_note else None
+
+    def refresh_grid_cell(self):
+        """Recompute grid_cell from the coordinates; save() does this, bulk_create callers must."""
+        if self.latitude is not None and self.longitude is not None:
+            self.grid_cell = grid_cell(self.latitude, self.longitude)
+        else:
+            self.grid_cell = None
+
+    def save(self, *args, **kwargs):
+        # Keep the spatial index cell in sync with the coordinates
+        self.refresh_grid_cell()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ('latitude' in update_fields or 'longitude' in update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'grid_cell'}
+
+        super().save(*args, **kwargs)
     
-class CivicIssue(models.Model):
+class ValidationJob(models.Model):
+    """
+    Durable unit of work for the background AI validation of one report's
+    photo, processed by accounts.validation_queue workers.
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    report = models.ForeignKey(WasteReport, on_delete=models.CASCADE, related_name='validation_jobs')
+    description = models.TextField(blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    # Not picked up before this time (retry backoff)
+    run_after = models.DateTimeField()
+    locked_at = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='validationjob_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Validation of report {self.report_id} - {self.status} ({self.attempts} attempts)"
+
+
+class CivicIssue(TrackedFieldsMixin, models.Model):
     issue = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
     name = models.CharField(max_length=255)
     phone = models.CharField(max_length=50)
     address = models.TextField()
+    # Filled in from the address by the offline geocoder (accounts.geocoding)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    TRACKED_FIELDS = ('issue', 'latitude', 'longitude')
+
+    def __str__(self):
+        return f"{self.issue} - {self.name}"
+
+
+class GeocodeCache(models.Model):
+    """
+    Result of geocoding one normalized address against the gazetteer.
+    Misses are cached too (latitude/longitude left empty).
+    """
+    address_key = models.CharField(max_length=64, unique=True)  # sha256 of normalized_address
+    normalized_address = models.TextField()
+    matched_name = models.CharField(max_length=255, blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.normalized_address} -> {self.matched_name or 'unresolved'}"
+
+
+class HeatmapCell(models.Model):
+    """
+    Incrementally maintained report counts per grid cell, zoom level,
+    category, severity and hour, backing the heatmap endpoint.
+    """
+    level = models.PositiveSmallIntegerField()
+    row = models.IntegerField()
+    col = models.IntegerField()
+    category = models.CharField(max_length=50, blank=True, default='')
+    severity = models.CharField(max_length=20, blank=True, default='')
+    hour = models.DateTimeField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['level', 'row', 'col', 'category', 'severity', 'hour'],
+                name='unique_heatmap_bucket',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['level', 'hour', 'row', 'col'], name='heatmap_level_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"L{self.level} {self.row}:{self.col} {self.category or '-'} = {self.count}"
+
+
+class StoredMedia(models.Model):
+    """
+    One file in content-addressed media storage (accounts.storage) and the
+    number of file fields referencing it. Byte-identical uploads share it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} x{self.ref_count}"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload of one report file (see accounts.resumable_uploads).
+    Chunks are written straight into a part file at their offsets;
+    received_ranges lists the [start, end) byte ranges stored so far.
+    """
+    FIELD_CHOICES = (
+        ('photo', 'Photo'),
+        ('voice_note', 'Voice Note'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    # Optional checksum the client expects the assembled file to have
+    sha256 = models.CharField(max_length=64, blank=True, null=True)
+    received_ranges = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.field} - {self.filename}"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    The outcome of a request sent with an Idempotency-Key header, replayed
+    for repeats of the key until expires_at (see accounts.idempotency).
+    """
+    STATUS_CHOICES = (
+        ('in_progress', 'In Progress'),
+        ('done', 'Done'),
+    )
+
+    # sha256 of endpoint, caller and client key
+    scope_key = models.CharField(max_length=64, unique=True)
+    endpoint = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    # sha256 of the first request's method, path and body; repeats must match it
+    request_hash = models.CharField(max_length=64, blank=True, default='')
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
 
     def __str__(self):
-        return f"{self.issue} - {self.name}"
\ No newline at end of file
+        return f"{self.endpoint} {self.scope_key[:12]} ({self.status})"
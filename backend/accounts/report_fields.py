@@ -0,0 +1,70 @@
+"""
+Parsing and validation of the fields clients send to create a WasteReport.
+
+Shared by create_waste_report, its async twin, resumable uploads and bulk
+submission, so every path accepts and rejects the same input:
+
+- description: required, non-blank
+- issue_type: optional string, defaults to 'General Waste Issue'
+- location: {lat, lon, address} (as an object or a JSON string) or a plain
+  address string; lat and lon come together, as finite numbers in range
+"""
+import json
+import math
+
+DEFAULT_ISSUE_TYPE = 'General Waste Issue'
+
+
+class ReportFieldError(ValueError):
+    """A submitted report field is missing or invalid."""
+
+
+def parse_location(location_data):
+    """Return (latitude, longitude, address) from a report's 'location' field."""
+    if isinstance(location_data, str):
+        try:
+            location_data = json.loads(location_data)
+        except ValueError:
+            # A bare address
+            return None, None, location_data
+
+    if not isinstance(location_data, dict):
+        return None, None, None
+
+    latitude = location_data.get('lat')
+    longitude = location_data.get('lon')
+    if (latitude is None) != (longitude is None):
+        raise ReportFieldError("location needs both lat and lon")
+    if latitude is not None:
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            raise ReportFieldError("lat and lon must be numbers")
+        if not (math.isfinite(latitude) and math.isfinite(longitude)
+                and -90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ReportFieldError("lat/lon out of range")
+    return latitude, longitude, location_data.get('address')
+
+
+def clean_report_fields(data):
+    """
+    Validate a report's request fields (a dict or QueryDict) and return the
+    WasteReport field values: description, issue_type, location, latitude
+    and longitude.
+    """
+    description = data.get('description')
+    if not isinstance(description, str) or not description.strip():
+        raise ReportFieldError("description is required")
+
+    issue_type = data.get('issue_type') or DEFAULT_ISSUE_TYPE
+    if not isinstance(issue_type, str):
+        raise ReportFieldError("issue_type must be a string")
+
+    latitude, longitude, address = parse_location(data.get('location', {}))
+    return {
+        'description': description,
+        'issue_type': issue_type[:100],
+        'location': address,
+        'latitude': latitude,
+        'longitude': longitude,
+    }
@@ -0,0 +1,233 @@
+"""
+Resumable, chunked uploads of report photos and voice notes.
+
+A client opens an UploadSession for each file (declaring its size), PUTs
+the bytes in chunks with a Content-Range header, and finalizes one or more
+complete sessions into a WasteReport. Each chunk is written straight into
+the session's part file at its offset and recorded in received_ranges only
+once it arrived whole, so after a dropped connection the client asks which
+ranges are missing and sends just those. Chunks may arrive in any order.
+
+The part file already is the assembled file: finalizing hashes it in
+fixed-size reads and hands it to storage as a file on disk, which moves it
+into place instead of copying it through memory.
+
+Sessions expire UPLOAD_SESSION_TTL_HOURS after their last chunk; run
+`manage.py purge_upload_sessions` to remove them and their part files.
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UploadSession
+
+UPLOAD_SESSION_DIR = getattr(settings, 'UPLOAD_SESSION_DIR', os.path.join(settings.MEDIA_ROOT, 'upload_sessions'))
+UPLOAD_SESSION_TTL_HOURS = getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24)
+RESUMABLE_UPLOAD_MAX_BYTES = getattr(settings, 'RESUMABLE_UPLOAD_MAX_BYTES', 50 * 1024 * 1024)
+
+# Largest chunk accepted in one PUT, and the size suggested to clients
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+RECOMMENDED_CHUNK_BYTES = 1024 * 1024
+
+# Bytes copied per read while streaming a chunk or hashing a part file
+COPY_BUFFER_BYTES = 64 * 1024
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    """A request the upload session cannot accept; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def part_path(session):
+    return os.path.join(UPLOAD_SESSION_DIR, f"{session.id}.part")
+
+
+def open_session(user, field, filename, total_size, sha256=None):
+    """Start a resumable upload of one file of total_size bytes."""
+    if field not in dict(UploadSession.FIELD_CHOICES):
+        raise UploadError("field must be 'photo' or 'voice_note'")
+    try:
+        total_size = int(total_size)
+    except (TypeError, ValueError):
+        raise UploadError("size must be an integer")
+    if not 0 < total_size <= RESUMABLE_UPLOAD_MAX_BYTES:
+        raise UploadError(f"size must be between 1 and {RESUMABLE_UPLOAD_MAX_BYTES} bytes")
+    if sha256:
+        sha256 = str(sha256).lower()
+        if not _SHA256.match(sha256):
+            raise UploadError("sha256 must be a hex SHA-256 digest")
+
+    session = UploadSession.objects.create(
+        user=user,
+        field=field,
+        filename=os.path.basename(filename or field)[:255] or field,
+        total_size=total_size,
+        sha256=sha256 or None,
+        expires_at=timezone.now() + timedelta(hours=UPLOAD_SESSION_TTL_HOURS),
+    )
+    os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    open(part_path(session), 'wb').close()
+    return session
+
+
+def parse_content_range(header, total_size):
+    """Return (start, end) with end exclusive from a 'bytes start-last/total' header."""
+    match = _CONTENT_RANGE.match((header or '').strip())
+    if not match:
+        raise UploadError("Content-Range must look like 'bytes <start>-<last>/<total>'")
+    start, last, total = match.groups()
+    start, end = int(start), int(last) + 1
+    if total != '*' and int(total) != total_size:
+        raise UploadError(f"Content-Range total does not match the session size {total_size}")
+    if start >= end or end > total_size:
+        raise UploadError("Content-Range is outside the file", status=416)
+    return start, end
+
+
+def merge_range(ranges, start, end):
+    """Add [start, end) to a sorted list of disjoint [start, end) ranges."""
+    merged = []
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
+
+
+def missing_ranges(session):
+    missing = []
+    position = 0
+    for start, end in session.received_ranges:
+        if start > position:
+            missing.append([position, start])
+        position = max(position, end)
+    if position < session.total_size:
+        missing.append([position, session.total_size])
+    return missing
+
+
+def is_complete(session):
+    return session.received_ranges == [[0, session.total_size]]
+
+
+def describe(session):
+    """Session state for API responses."""
+    return {
+        "upload_id": str(session.id),
+        "field": session.field,
+        "filename": session.filename,
+        "size": session.total_size,
+        "received_bytes": sum(end - start for start, end in session.received_ranges),
+        "received_ranges": session.received_ranges,
+        "missing_ranges": missing_ranges(session),
+        "complete": is_complete(session),
+        "recommended_chunk_bytes": RECOMMENDED_CHUNK_BYTES,
+        "expires_at": session.expires_at,
+    }
+
+
+def write_chunk(session, start, end, stream):
+    """
+    Copy bytes [start, end) of the file from stream into the part file and
+    record them as received. A chunk that arrives short is not recorded and
+    has to be sent again.
+    """
+    length = end - start
+    if length > MAX_CHUNK_BYTES:
+        raise UploadError(f"Chunks may be at most {MAX_CHUNK_BYTES} bytes", status=413)
+    if session.expires_at <= timezone.now():
+        raise UploadError("Upload session expired", status=410)
+
+    path = part_path(session)
+    try:
+        fd = os.open(path, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+    except FileNotFoundError:
+        raise UploadError("Upload session data is gone; start a new upload", status=410)
+
+    try:
+        offset = start
+        while offset < end:
+            data = stream.read(min(COPY_BUFFER_BYTES, end - offset))
+            if not data:
+                raise UploadError(f"Chunk ended after {offset - start} of {length} bytes")
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                offset += written
+                view = view[written:]
+    finally:
+        os.close(fd)
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        session.received_ranges = merge_range(session.received_ranges, start, end)
+        session.expires_at = timezone.now() + timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+        session.save(update_fields=['received_ranges', 'expires_at', 'updated_at'])
+    return session
+
+
+class AssembledUpload(File):
+    """
+    A finished upload's part file. temporary_file_path() lets storage and
+    the image pipeline work on the file in place; sha256 spares storage a
+    second hashing pass.
+    """
+
+    def __init__(self, path, name, sha256, size):
+        super().__init__(open(path, 'rb'), name=name)
+        self._path = path
+        self.sha256 = sha256
+        self.size = size
+
+    def temporary_file_path(self):
+        return self._path
+
+
+def assemble(session):
+    """Return the complete upload as an AssembledUpload, verifying its checksum."""
+    if not is_complete(session):
+        raise UploadError(f"Upload {session.id} is incomplete", status=409)
+
+    path = part_path(session)
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_BYTES), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        raise UploadError("Upload session data is gone; start a new upload", status=410)
+
+    sha256 = digest.hexdigest()
+    if session.sha256 and session.sha256 != sha256:
+        raise UploadError(f"Upload {session.id} does not match its sha256", status=422)
+    return AssembledUpload(path, session.filename, sha256, session.total_size)
+
+
+def discard(session):
+    """Delete a session and whatever is left of its part file."""
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def purge_expired():
+    """Remove expired sessions and their part files. Returns how many were removed."""
+    expired = list(UploadSession.objects.filter(expires_at__lte=timezone.now()))
+    for session in expired:
+        discard(session)
+    return len(expired)
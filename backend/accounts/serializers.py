@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import UserProfile, ModelOutput, WasteReport, CivicIssue
+from .models import UserProfile, ModelOutput, WasteReport, CivicIssue, Incident
 from django.contrib.auth.models import User
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -21,13 +21,20 @@ class WasteReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = WasteReport
         fields = ['id', 'username', 'description', 'issue_type', 'location', 'latitude', 
-                  'longitude', 'photo', 'voice_note', 'status', 'category', 'severity', 
-                  'response_time', 'created_at', 'updated_at']
+                  'longitude', 'photo', 'voice_note', 'photo_sha256', 'voice_note_sha256', 'status',
+                  'category', 'severity', 'response_time', 'incident', 'created_at', 'updated_at']
         read_only_fields = ('user', 'created_at', 'updated_at', 'status', 'category', 
-                           'severity', 'response_time')
+                           'severity', 'response_time', 'incident')
 
 class CivicIssueSerializer(serializers.ModelSerializer):
     class Meta:
         model = CivicIssue
-        fields = ['id', 'issue', 'description', 'name', 'phone', 'address', 'created_at']
-        read_only_fields = ('created_at',)
+        fields = ['id', 'issue', 'description', 'name', 'phone', 'address', 'latitude', 'longitude', 'created_at']
+        read_only_fields = ('created_at', 'latitude', 'longitude')
+
+class IncidentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Incident
+        fields = ['id', 'category', 'severity', 'latitude', 'longitude', 'member_count',
+                  'first_reported_at', 'last_reported_at', 'created_at']
+        read_only_fields = fields
@@ -98,4 +98,234 @@ def update_user_score_on_resolution(sender, instance, created, **kwargs):
                 profile.civic_score = max(0, profile.civic_score)
                 
                 # Save the updated profile
-                profile.save()
\ No newline at end of file
+                profile.save()
+
+def may_have_changed(instance, created, update_fields, fields):
+    """
+    Whether a save may have changed any of `fields`. TRACKED_FIELDS are
+    compared with their loaded values; other fields count as changed when
+    the save wrote them.
+    """
+    if created or not hasattr(instance, '_loaded_values'):
+        return True
+    previous = instance._loaded_values
+    untracked = set()
+    for name in fields:
+        if name not in instance.TRACKED_FIELDS:
+            untracked.add(name)
+        elif previous.get(name, getattr(instance, name)) != getattr(instance, name):
+            return True
+    if not untracked:
+        return False
+    return update_fields is None or not untracked.isdisjoint(update_fields)
+
+# --- Live alert index (GEODATA Redis cache) ---
+from django.db.models.signals import post_delete
+from . import geo_index
+
+@receiver(post_save, sender=WasteReport)
+def sync_live_alert_index(sender, instance, **kwargs):
+    """
+    Keep the Redis GEO alert index in step with new, validated and
+    invalidated reports once the write is committed.
+    """
+    transaction.on_commit(lambda: geo_index.index_report(instance))
+
+@receiver(post_delete, sender=WasteReport)
+def drop_from_live_alert_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: geo_index.remove_report(instance))
+
+
+# --- Live alert push (ASGI event streams) ---
+from . import alert_stream
+
+@receiver(post_save, sender=WasteReport)
+def push_live_alert(sender, instance, created, **kwargs):
+    """
+    Push reports that just passed AI validation to the subscribers of the
+    live alert stream. New reports are pushed by the submission code once
+    their photo is saved (alert_stream.publish_report).
+    """
+    if created or instance.status == 'invalid' or instance.latitude is None or instance.longitude is None:
+        return
+
+    previous = getattr(instance, '_loaded_values', {})
+    if instance.category is not None and previous.get('category') != instance.category:
+        payload = geo_index.alert_payload(instance)
+        transaction.on_commit(lambda: alert_stream.publish(payload))
+
+
+# --- Heatmap aggregates ---
+from .models import CivicIssue
+from . import heatmap
+
+def waste_report_heatmap_key(report, values):
+    """Heatmap bucket of a WasteReport given its tracked field values."""
+    if values['status'] == 'invalid':
+        return None
+    return heatmap.bucket_key(
+        values['latitude'], values['longitude'],
+        values['category'], values['severity'], report.created_at
+    )
+
+@receiver(post_save, sender=WasteReport)
+def update_heatmap_on_save(sender, instance, created, **kwargs):
+    """
+    Move the report's heatmap contribution when it is created, relocated,
+    classified or invalidated.
+    """
+    if not may_have_changed(instance, created, kwargs.get('update_fields'), WasteReport.TRACKED_FIELDS):
+        return
+
+    current = {name: getattr(instance, name) for name in WasteReport.TRACKED_FIELDS}
+    new_key = waste_report_heatmap_key(instance, current)
+
+    if created:
+        old_key = None
+    else:
+        previous = dict(current, **getattr(instance, '_loaded_values', {}))
+        old_key = waste_report_heatmap_key(instance, previous)
+
+    with transaction.atomic():
+        heatmap.move(old_key, new_key)
+
+@receiver(post_delete, sender=WasteReport)
+def update_heatmap_on_delete(sender, instance, **kwargs):
+    current = {name: getattr(instance, name) for name in WasteReport.TRACKED_FIELDS}
+    heatmap.adjust(waste_report_heatmap_key(instance, current), -1)
+
+def civic_issue_heatmap_key(issue, values):
+    """Heatmap bucket of a geocoded CivicIssue; its issue text stands in for the category."""
+    category = (values['issue'] or '').strip().lower()[:50]
+    return heatmap.bucket_key(values['latitude'], values['longitude'], category, '', issue.created_at)
+
+@receiver(post_save, sender=CivicIssue)
+def update_civic_issue_heatmap_on_save(sender, instance, created, **kwargs):
+    if not may_have_changed(instance, created, kwargs.get('update_fields'), CivicIssue.TRACKED_FIELDS):
+        return
+
+    current = {name: getattr(instance, name) for name in CivicIssue.TRACKED_FIELDS}
+    new_key = civic_issue_heatmap_key(instance, current)
+
+    if created:
+        old_key = None
+    else:
+        previous = dict(current, **getattr(instance, '_loaded_values', {}))
+        old_key = civic_issue_heatmap_key(instance, previous)
+
+    with transaction.atomic():
+        heatmap.move(old_key, new_key)
+
+@receiver(post_delete, sender=CivicIssue)
+def update_civic_issue_heatmap_on_delete(sender, instance, **kwargs):
+    current = {name: getattr(instance, name) for name in CivicIssue.TRACKED_FIELDS}
+    heatmap.adjust(civic_issue_heatmap_key(instance, current), -1)
+
+
+# --- Incident clustering ---
+from . import incidents
+
+@receiver(post_save, sender=WasteReport)
+def recluster_on_classification(sender, instance, created, **kwargs):
+    """
+    Move a report to the right Incident once validation gives it a
+    category, or take it out of its Incident when it turns invalid.
+    """
+    if created:
+        return
+
+    previous = getattr(instance, '_loaded_values', {})
+    category_changed = 'category' in previous and previous['category'] != instance.category
+    validity_changed = 'status' in previous and (previous['status'] == 'invalid') != (instance.status == 'invalid')
+
+    if category_changed or validity_changed:
+        transaction.on_commit(lambda: incidents.recluster(instance))
+
+@receiver(post_delete, sender=WasteReport)
+def leave_incident_on_delete(sender, instance, **kwargs):
+    incidents.detach_incident(instance)
+
+
+# --- Nearby alerts tile cache ---
+from . import alert_cache
+
+# Fields that show up in cached nearby alerts
+NEARBY_ALERT_FIELDS = WasteReport.TRACKED_FIELDS + ('description', 'issue_type', 'photo')
+
+@receiver(post_save, sender=WasteReport)
+def invalidate_nearby_alerts_cache(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Drop the cached nearby-alert tiles around a report whenever a save
+    changes what its alert shows (created, photo attached, validated,
+    resolved, ...), at both its previous and current position.
+    """
+    if not may_have_changed(instance, created, update_fields, NEARBY_ALERT_FIELDS):
+        return
+
+    previous = getattr(instance, '_loaded_values', {})
+    positions = {
+        (previous.get('latitude'), previous.get('longitude')),
+        (instance.latitude, instance.longitude),
+    }
+
+    def invalidate():
+        for lat, lon in positions:
+            alert_cache.invalidate(lat, lon)
+
+    transaction.on_commit(invalidate)
+
+@receiver(post_delete, sender=WasteReport)
+def invalidate_nearby_alerts_cache_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: alert_cache.invalidate(instance.latitude, instance.longitude))
+
+
+# --- Media references (content-addressed storage) ---
+from django.db.models.signals import pre_save
+
+@receiver(pre_save, sender=WasteReport)
+def note_new_media(sender, instance, update_fields=None, **kwargs):
+    """Remember which file fields this save writes a new file for."""
+    instance._new_media = {
+        name for name in WasteReport.TRACKED_FILE_FIELDS
+        if (update_fields is None or name in update_fields)
+        and getattr(instance, name) and not getattr(instance, name)._committed
+    }
+
+@receiver(post_save, sender=WasteReport)
+def release_replaced_media(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Drop the reference a save replaced: the previous file of a field that
+    now names another file, or that took a new reference to the same one.
+    """
+    if created:
+        return
+    previous = getattr(instance, '_loaded_values', {})
+    new_media = getattr(instance, '_new_media', set())
+    replaced = []
+    for name in WasteReport.TRACKED_FILE_FIELDS:
+        if update_fields is not None and name not in update_fields:
+            continue
+        old_name = previous.get(name)
+        if old_name and (name in new_media or old_name != getattr(instance, name).name):
+            replaced.append((getattr(instance, name).storage, old_name))
+
+    def release():
+        for storage, old_name in replaced:
+            storage.delete(old_name)
+
+    if replaced:
+        transaction.on_commit(release)
+
+@receiver(post_delete, sender=WasteReport)
+def release_report_media(sender, instance, **kwargs):
+    """
+    Drop the deleted report's references to its files; shared files stay
+    on disk until the last report using them is gone.
+    """
+    files = [f for f in (instance.photo, instance.original_photo, instance.voice_note) if f]
+
+    def release():
+        for stored in files:
+            stored.storage.delete(stored.name)
+
+    transaction.on_commit(release)
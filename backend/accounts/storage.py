@@ -0,0 +1,123 @@
+"""
+Content-addressed, deduplicated media storage.
+
+Files are stored under the directory their field's upload_to names, at a
+path derived from the SHA-256 of their bytes:
+
+    waste_reports/3f/a9/3fa9...e1.webp
+
+Two levels of two hex digits keep every directory to at most 256 entries
+(plus files), however many reports exist. Byte-identical uploads map to the
+same name and are written once; a StoredMedia row counts how many file
+fields reference each file, and the file is only removed from disk when
+the last reference is deleted.
+
+The hash is part of the name, so content_hash(name) returns it without
+reading the file; later stages use it to skip media they have already
+processed. Callers that hashed the bytes already (e.g. while streaming an
+upload) can set a `sha256` attribute on the content to skip hashing here.
+"""
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+HASHED_NAME = re.compile(r"(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(?:\.[^/]*)?$")
+
+
+def content_hash(name):
+    """SHA-256 of a stored file from its name, or None for names not stored by hash."""
+    match = HASHED_NAME.search(name or '')
+    return match.group('sha256') if match else None
+
+
+def hash_content(content):
+    """Return (sha256 hex digest, size) of a Django File, leaving it rewound."""
+    digest = hashlib.sha256()
+    size = 0
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        digest.update(chunk)
+        size += len(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest(), size
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names, deduplicates and reference-counts files by content."""
+
+    # Longer "extensions" are dropped rather than risk overflowing max_length
+    MAX_EXTENSION_LENGTH = 10
+
+    def hashed_name(self, name, sha256):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        if len(extension) > self.MAX_EXTENSION_LENGTH:
+            extension = ''
+        return os.path.join(directory, sha256[:2], sha256[2:4], sha256 + extension).replace("\\", "/")
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save, and an existing
+        # file under that name already holds the same bytes
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredMedia
+
+        sha256 = getattr(content, 'sha256', None)
+        if sha256 and getattr(content, 'size', None) is not None:
+            size = content.size
+        else:
+            sha256, size = hash_content(content)
+        name = self.hashed_name(name, sha256)
+
+        with transaction.atomic():
+            # Take the reference first: a deleter that already dropped the
+            # last one has removed the row, so the file is written again
+            self._add_reference(name, sha256, size)
+            if not self.exists(name):
+                # Write under a unique temporary name, then move into place
+                # atomically so readers never see a partial file
+                directory, filename = os.path.split(name)
+                temporary = super()._save(os.path.join(directory, f".{uuid.uuid4().hex}.{filename}.part"), content)
+                os.replace(self.path(temporary), self.path(name))
+        return name
+
+    @staticmethod
+    def _add_reference(name, sha256, size):
+        from .models import StoredMedia
+
+        # Single conditional statements rather than read-then-write under
+        # select_for_update, which SQLite ignores
+        while not StoredMedia.objects.filter(name=name).update(ref_count=F('ref_count') + 1):
+            try:
+                with transaction.atomic():
+                    StoredMedia.objects.create(name=name, sha256=sha256, size=size, ref_count=1)
+                return
+            except IntegrityError:
+                # Created concurrently; count on it
+                continue
+
+    def delete(self, name):
+        """Drop one reference to name; the file goes once nothing references it."""
+        from .models import StoredMedia
+
+        if not name:
+            raise ValueError("The name must be given to delete().")
+
+        with transaction.atomic():
+            media = StoredMedia.objects.filter(name=name)
+            while not media.filter(ref_count__gt=1).update(ref_count=F('ref_count') - 1):
+                if media.filter(ref_count__lte=1).delete()[0] or not media.exists():
+                    # Last reference, or a file stored before deduplication
+                    super().delete(name)
+                    return
+                # Referenced again in between; drop one of those references
@@ -0,0 +1,18 @@
+from ..models import WasteReport
+
+# No Redis server in tests: Django caches in memory, the GEODATA index on fakeredis
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "GEODATA": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "geodata"},
+}
+
+
+def make_report(user, lat, lon, **fields):
+    return WasteReport.objects.create(
+        user=user,
+        description=fields.pop('description', 'Overflowing bin'),
+        issue_type=fields.pop('issue_type', 'General Waste Issue'),
+        latitude=lat,
+        longitude=lon,
+        **fields
+    )
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .. import alert_cache
+from ..views import find_recent_alerts
+from .helpers import TEST_CACHES, make_report
+
+# Two places ~150 km apart, plus one far from both
+MUMBAI = (19.0760, 72.8777)
+PUNE = (18.5204, 73.8567)
+DELHI = (28.6139, 77.2090)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class NearbyAlertsCacheTests(TestCase):
+    """Per-tile nearby alert cache and its invalidation (accounts.alert_cache)."""
+
+    def setUp(self):
+        cache.clear()
+        for patcher in (
+            # Answer from the database, not the Redis GEO index
+            mock.patch('accounts.geo_index.search_nearby', return_value=None),
+            mock.patch('accounts.geo_index.index_report'),
+            mock.patch('accounts.geo_index.remove_report'),
+            mock.patch('accounts.alert_stream.publish'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.reporter = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+        self.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def alert_ids(self, lat, lon, radius=5):
+        response = self.client.get('/auth/api/notifications/nearby/', {'lat': lat, 'lon': lon, 'radius': radius})
+        self.assertEqual(response.status_code, 200)
+        return [alert['id'] for alert in response.data['alerts']]
+
+    def warm(self, *points):
+        loader = mock.Mock(side_effect=find_recent_alerts)
+        for lat, lon in points:
+            alert_cache.nearby_alerts(lat, lon, 5, self.viewer.id, loader)
+        return loader
+
+    def test_cached_answers_match_uncached(self):
+        near = make_report(self.reporter, 19.0800, 72.8800)
+        make_report(self.reporter, 19.3000, 73.2000)
+        make_report(self.viewer, 19.0770, 72.8790)
+
+        expected = [alert['id'] for alert in find_recent_alerts(*MUMBAI, 5, exclude_user_id=self.viewer.id)]
+        self.assertEqual(expected, [near.id])
+        # Miss, then hit
+        self.assertEqual(self.alert_ids(*MUMBAI), expected)
+        self.assertEqual(self.alert_ids(*MUMBAI), expected)
+        self.assertEqual(alert_cache.stats()['hits'], 1)
+
+    def test_move_invalidates_old_and_new_position(self):
+        report = make_report(self.reporter, *MUMBAI)
+        self.assertEqual(self.alert_ids(*MUMBAI), [report.id])
+        self.assertEqual(self.alert_ids(*PUNE), [])
+        self.warm(DELHI)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report.latitude, report.longitude = PUNE
+            report.save()
+
+        self.assertEqual(self.alert_ids(*MUMBAI), [])
+        self.assertEqual(self.alert_ids(*PUNE), [report.id])
+        # Tiles far from both positions stay cached
+        self.assertEqual(self.warm(DELHI).call_count, 0)
+
+    def test_status_change_invalidates(self):
+        report = make_report(self.reporter, *MUMBAI)
+        self.assertEqual(self.alert_ids(*MUMBAI), [report.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report.status = 'invalid'
+            report.save()
+        self.assertEqual(self.alert_ids(*MUMBAI), [])
+
+    def test_delete_invalidates(self):
+        report = make_report(self.reporter, *MUMBAI)
+        self.assertEqual(self.alert_ids(*MUMBAI), [report.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report.delete()
+        self.assertEqual(self.alert_ids(*MUMBAI), [])
+
+    def test_invalidation_covers_every_bucket_reaching_the_point(self):
+        lat, lon = MUMBAI
+        # Queries within their radius of the point, from other tiles
+        nearby = [(lat + 0.04, lon), (lat, lon - 0.04), (lat - 0.03, lon + 0.03)]
+        self.assertEqual(self.warm(*nearby).call_count, 3)
+
+        alert_cache.invalidate(lat, lon)
+        self.assertEqual(self.warm(*nearby).call_count, 3)
@@ -0,0 +1,139 @@
+import asyncio
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from .. import alert_stream, geo_index
+from ..views import submit_waste_report
+from .helpers import TEST_CACHES
+
+
+def alert(lat, lon, user_id=1, report_id=1):
+    return {
+        "id": report_id,
+        "user_id": user_id,
+        "issue_type": "General Waste Issue",
+        "description": "Overflowing bin",
+        "severity": None,
+        "latitude": lat,
+        "longitude": lon,
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "image_url": None,
+    }
+
+
+class AlertBrokerTests(SimpleTestCase):
+    """Per-cell dispatch of live alerts to the subscribers of one process."""
+
+    def setUp(self):
+        self.broker = alert_stream.AlertBroker()
+        # No Redis listener: payloads are dispatched by hand
+        patcher = mock.patch.object(self.broker, '_ensure_listener')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_dispatch(self, subscriptions, payload):
+        """Subscribe, dispatch one payload and return (delivered, alerts per subscription)."""
+        async def scenario():
+            subs = [self.broker.subscribe(*args) for args in subscriptions]
+            delivered = self.broker.dispatch(payload)
+            # Deliveries are handed to the loop with call_soon_threadsafe
+            await asyncio.sleep(0)
+            return delivered, [[sub.queue.get_nowait() for _ in range(sub.queue.qsize())] for sub in subs]
+
+        return asyncio.run(scenario())
+
+    def test_delivers_within_radius_only(self):
+        delivered, queues = self.run_dispatch(
+            [(19.0760, 72.8777, 5, 2), (19.3000, 73.2000, 5, 3)],
+            alert(19.0800, 72.8800),
+        )
+        self.assertEqual(delivered, 1)
+        self.assertEqual(len(queues[0]), 1)
+        self.assertEqual(queues[0][0]["id"], 1)
+        self.assertAlmostEqual(queues[0][0]["distance_km"], 0.5, delta=0.1)
+        self.assertEqual(queues[1], [])
+
+    def test_same_cell_outside_radius_is_not_delivered(self):
+        # Both points sit in the same 0.1 degree cell, 1.1 km apart
+        delivered, queues = self.run_dispatch([(19.01, 72.81, 1, 2)], alert(19.02, 72.81))
+        self.assertEqual(delivered, 0)
+        self.assertEqual(queues, [[]])
+
+    def test_neighbouring_cell_is_delivered(self):
+        # The subscriber's radius spills over into the report's cell
+        delivered, queues = self.run_dispatch([(19.099, 72.85, 2, 2)], alert(19.101, 72.85))
+        self.assertEqual(delivered, 1)
+        self.assertEqual(len(queues[0]), 1)
+
+    def test_own_reports_are_not_delivered(self):
+        delivered, queues = self.run_dispatch([(19.0760, 72.8777, 5, 1)], alert(19.0760, 72.8777, user_id=1))
+        self.assertEqual(delivered, 0)
+        self.assertEqual(queues, [[]])
+
+    def test_wide_subscription_is_delivered(self):
+        delivered, queues = self.run_dispatch([(19.0760, 72.8777, 500, 2)], alert(18.5204, 73.8567))
+        self.assertEqual(delivered, 1)
+        self.assertEqual(len(queues[0]), 1)
+
+    def test_unsubscribe_stops_delivery(self):
+        async def scenario():
+            sub = self.broker.subscribe(19.0760, 72.8777, 5, 2)
+            self.broker.unsubscribe(sub)
+            return self.broker.dispatch(alert(19.0760, 72.8777)), len(self.broker), self.broker._by_cell
+
+        delivered, subscribers, by_cell = asyncio.run(scenario())
+        self.assertEqual(delivered, 0)
+        self.assertEqual(subscribers, 0)
+        self.assertEqual(by_cell, {})
+
+    def test_publish_without_redis_is_degraded(self):
+        with mock.patch('django_redis.get_redis_connection', side_effect=ConnectionError("down")), \
+                mock.patch.object(alert_stream.broker, 'dispatch', return_value=0) as dispatch, \
+                self.assertLogs('accounts.alert_stream', 'WARNING') as logs:
+            self.assertFalse(alert_stream.publish(alert(19.0760, 72.8777)))
+        dispatch.assert_called_once()
+        self.assertIn("degraded", logs.output[0])
+
+
+@override_settings(CACHES=TEST_CACHES, VALIDATION_WORKERS_IN_PROCESS=0)
+class NewReportAlertTests(TestCase):
+    """The live alert for a new report is published once its photo is saved."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        settings_patch = override_settings(MEDIA_ROOT=media_root)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+
+        for patcher in (
+            mock.patch.object(geo_index, 'index_report'),
+            mock.patch('accounts.validation_queue.enqueue'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+
+    def photo(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 48), 'green').save(buffer, 'JPEG')
+        return SimpleUploadedFile('bin.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_new_report_alert_carries_photo(self):
+        data = {'description': 'Overflowing bin', 'location': {'lat': 19.0760, 'lon': 72.8777}}
+        with mock.patch.object(alert_stream, 'publish') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            report = submit_waste_report(self.user, data, photo=self.photo())
+
+        publish.assert_called_once()
+        payload = publish.call_args.args[0]
+        self.assertEqual(payload["id"], report.id)
+        self.assertEqual(payload["image_url"], report.photo.url)
+        self.assertIsNotNone(payload["image_url"])
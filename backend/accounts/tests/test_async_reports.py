@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import UserProfile, ValidationJob, WasteReport
+from .helpers import TEST_CACHES
+from .test_image_pipeline import phone_photo
+
+# Fields that legitimately differ between two otherwise identical reports
+PER_RECORD_FIELDS = {'id', 'created_at', 'updated_at', 'incident'}
+
+
+@override_settings(CACHES=TEST_CACHES, VALIDATION_WORKERS_IN_PROCESS=0)
+class AsyncSubmissionTests(TransactionTestCase):
+    """
+    create_waste_report_async stores the same report as create_waste_report.
+    Transactional: the async view writes files, and so media references, on
+    another thread and connection.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        settings_patch = override_settings(MEDIA_ROOT=media_root)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+
+        for patcher in (
+            mock.patch('accounts.geo_index.index_report'),
+            mock.patch('accounts.alert_stream.publish'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def submit(self, url):
+        response = self.client.post(url, {
+            'description': 'Overflowing bin',
+            'issue_type': 'Overflowing Bin',
+            'location': '{"lat": 19.0760, "lon": 72.8777, "address": "MG Road"}',
+            'photo': SimpleUploadedFile('IMG_0001.JPG', phone_photo(), content_type='image/jpeg'),
+            'voice_note': SimpleUploadedFile('note.webm', b'voice note', content_type='audio/webm'),
+        }, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['report']
+
+    def test_sync_and_async_reports_match(self):
+        sync_data = self.submit('/auth/report/')
+        async_data = self.submit('/auth/report/async/')
+
+        for key in PER_RECORD_FIELDS:
+            sync_data.pop(key, None)
+            async_data.pop(key, None)
+        self.assertEqual(async_data, sync_data)
+
+        sync_report, async_report = WasteReport.objects.order_by('id')
+        for field in WasteReport._meta.concrete_fields:
+            if field.name not in PER_RECORD_FIELDS:
+                with self.subTest(field=field.name):
+                    self.assertEqual(
+                        getattr(async_report, field.attname), getattr(sync_report, field.attname)
+                    )
+        # Identical content lands on the same stored files
+        self.assertEqual(async_report.photo.name, sync_report.photo.name)
+        self.assertTrue(async_report.photo.name.endswith('.webp'))
+
+        # Both are grouped, counted and queued for validation
+        self.assertIsNotNone(sync_report.incident_id)
+        self.assertEqual(async_report.incident_id, sync_report.incident_id)
+        self.assertEqual(UserProfile.objects.get(user=self.user).issues_reported, 2)
+        self.assertEqual(
+            sorted(ValidationJob.objects.values_list('report_id', flat=True)),
+            [sync_report.id, async_report.id],
+        )
+
+    def test_async_view_rejects_what_the_sync_view_rejects(self):
+        for url in ('/auth/report/', '/auth/report/async/'):
+            with self.subTest(url=url):
+                response = self.client.post(
+                    url, {'description': ' '}, content_type='application/json',
+                    HTTP_AUTHORIZATION=f'Bearer {self.token}',
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'description is required')
+        self.assertFalse(WasteReport.objects.exists())
@@ -0,0 +1,120 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .. import bulk_reports
+from ..models import UserProfile, WasteReport
+from ..report_fields import ReportFieldError, clean_report_fields, parse_location
+from .helpers import TEST_CACHES
+
+VALID = {"description": "Overflowing bin", "location": {"lat": 19.0760, "lon": 72.8777, "address": "MG Road"}}
+
+
+class ReportFieldTests(TestCase):
+    """The report field rules shared by every submission path (accounts.report_fields)."""
+
+    def test_location_forms(self):
+        self.assertEqual(parse_location({"lat": "19.5", "lon": 72}), (19.5, 72.0, None))
+        self.assertEqual(parse_location('{"lat": 19.5, "lon": 72, "address": "x"}'), (19.5, 72.0, "x"))
+        self.assertEqual(parse_location("MG Road, Mumbai"), (None, None, "MG Road, Mumbai"))
+        self.assertEqual(parse_location({}), (None, None, None))
+
+    def test_invalid_locations_rejected(self):
+        for location in ({"lat": 19.5}, {"lat": "north", "lon": 72}, {"lat": 95, "lon": 72},
+                         {"lat": 19.5, "lon": 181}, '{"lat": "NaN", "lon": 72}'):
+            with self.subTest(location=location), self.assertRaises(ReportFieldError):
+                parse_location(location)
+
+    def test_description_required(self):
+        for description in (None, "", "   ", 42):
+            with self.subTest(description=description), self.assertRaises(ReportFieldError):
+                clean_report_fields(dict(VALID, description=description))
+
+    def test_defaults(self):
+        fields = clean_report_fields(VALID)
+        self.assertEqual(fields['issue_type'], 'General Waste Issue')
+        self.assertEqual(fields['location'], 'MG Road')
+
+
+@override_settings(CACHES=TEST_CACHES, VALIDATION_WORKERS_IN_PROCESS=0)
+class SubmissionTests(TestCase):
+    """Single and bulk submissions apply the same rules."""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch('accounts.geo_index.index_report'),
+            mock.patch('accounts.alert_stream.publish'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('agent', 'agent@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_ndjson(self, items):
+        body = b"".join(
+            (item if isinstance(item, bytes) else json.dumps(item).encode()) + b"\n" for item in items
+        )
+        return self.client.post('/auth/report/bulk/', body, content_type='application/x-ndjson')
+
+    def test_single_submission_validates_location(self):
+        response = self.client.post('/auth/report/', dict(VALID, location={"lat": 95, "lon": 72}), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('out of range', response.data['error'])
+
+        response = self.client.post('/auth/report/', dict(VALID, description=''), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WasteReport.objects.exists())
+
+        response = self.client.post('/auth/report/', VALID, format='json')
+        self.assertEqual(response.status_code, 201)
+        report = WasteReport.objects.get()
+        self.assertEqual((report.latitude, report.longitude, report.location), (19.0760, 72.8777, 'MG Road'))
+
+    def test_partial_failure_is_207_with_per_item_results(self):
+        response = self.post_ndjson([
+            VALID,
+            dict(VALID, location={"lat": 19.0760}),
+            b"{not json",
+            dict(VALID, description=" "),
+            dict(VALID, location="Near the station"),
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 3))
+
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3, 4])
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['created', 'error', 'error', 'error', 'created'],
+        )
+        self.assertEqual(results[1]['error'], 'location needs both lat and lon')
+        self.assertTrue(results[2]['error'].startswith('Invalid JSON'))
+        self.assertEqual(results[3]['error'], 'description is required')
+        self.assertEqual(results[4]['report']['location'], 'Near the station')
+        self.assertEqual(WasteReport.objects.count(), 2)
+        self.assertEqual(UserProfile.objects.get(user=self.user).issues_reported, 2)
+
+    def test_all_valid_is_201_and_all_invalid_is_400(self):
+        self.assertEqual(self.post_ndjson([VALID, VALID]).status_code, 201)
+        self.assertEqual(self.post_ndjson([{"description": ""}]).status_code, 400)
+
+    def test_ndjson_byte_cap(self):
+        line = json.dumps(VALID).encode() + b"\n"
+        with mock.patch.object(bulk_reports, 'BULK_REPORT_MAX_BYTES', len(line) * 2):
+            self.assertEqual(self.post_ndjson([VALID, VALID]).status_code, 201)
+            response = self.post_ndjson([VALID, VALID, VALID])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exceeds', response.data['error'])
+        # Nothing from the rejected request is kept
+        self.assertEqual(WasteReport.objects.count(), 2)
+
+    def test_ndjson_item_cap(self):
+        with mock.patch.object(bulk_reports, 'BULK_REPORT_MAX_ITEMS', 2):
+            response = self.post_ndjson([VALID, VALID, VALID])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WasteReport.objects.exists())
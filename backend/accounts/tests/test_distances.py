@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from ..admin import WasteReportAdmin
+from ..models import WasteReport
+from ..utils import calculate_distance, distance_matrix, haversine_many
+from .helpers import TEST_CACHES, make_report
+
+POINTS = [(19.0760, 72.8777), (28.6139, 77.2090), (-33.8688, 151.2093), (51.5074, -0.1278), (0.0, 179.999)]
+
+
+class HaversineTests(TestCase):
+    def test_batch_matches_scalar(self):
+        lats = [lat for lat, _ in POINTS]
+        lons = [lon for _, lon in POINTS]
+        distances = haversine_many(19.0760, 72.8777, lats, lons)
+        for (lat, lon), distance in zip(POINTS, distances):
+            self.assertAlmostEqual(distance, calculate_distance(19.0760, 72.8777, lat, lon), places=9)
+
+    def test_distance_matrix_is_symmetric(self):
+        matrix = distance_matrix([lat for lat, _ in POINTS], [lon for _, lon in POINTS])
+        self.assertEqual(matrix.shape, (len(POINTS), len(POINTS)))
+        for i in range(len(POINTS)):
+            self.assertAlmostEqual(matrix[i, i], 0.0)
+            for j in range(len(POINTS)):
+                self.assertAlmostEqual(matrix[i, j], matrix[j, i], places=9)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class NearestSelectedAdminActionTests(TestCase):
+    def test_reports_nearest_selected_report(self):
+        user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+        first = make_report(user, 19.00, 72.0)
+        second = make_report(user, 19.01, 72.0)
+        make_report(user, 19.50, 72.0)
+
+        model_admin = WasteReportAdmin(WasteReport, admin.site)
+        with mock.patch.object(model_admin, 'message_user') as message_user:
+            model_admin.show_nearest_selected(None, WasteReport.objects.all())
+
+        messages = [call.args[1] for call in message_user.call_args_list]
+        self.assertEqual(len(messages), 3)
+        self.assertEqual(messages[0], f"Report {first.id}: nearest is report {second.id}, 1.11 km")
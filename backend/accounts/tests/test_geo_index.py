@@ -0,0 +1,93 @@
+from unittest import mock
+
+import fakeredis
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from .. import geo_index
+from ..views import find_recent_alerts
+from .helpers import TEST_CACHES, make_report
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GeoIndexTests(TestCase):
+    """The Redis GEO alert index against the database it accelerates."""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        for patcher in (
+            mock.patch.object(geo_index, '_redis', return_value=self.redis),
+            # Live pushes go through Redis pub/sub, which the test caches lack
+            mock.patch('accounts.alert_stream.publish'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+        self.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pw')
+
+    def make_reports(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [
+                make_report(self.user, 19.0760, 72.8777),
+                make_report(self.user, 19.0800, 72.8800, status='in-progress'),
+                make_report(self.user, 19.1000, 72.9000),
+                make_report(self.user, 19.0765, 72.8780, status='invalid'),
+                make_report(self.viewer, 19.0770, 72.8790),
+                # Outside a 5 km radius
+                make_report(self.user, 19.3000, 73.2000),
+            ]
+
+    def test_not_trusted_until_backfilled(self):
+        # Reports indexed by signals alone, as after a Redis flush
+        self.make_reports()
+        self.assertTrue(self.redis.keys(geo_index.GEO_BUCKET_PREFIX + '*'))
+        self.assertIsNone(geo_index.search_nearby(19.0760, 72.8777, 5))
+
+        geo_index.backfill()
+        self.assertIsNotNone(geo_index.search_nearby(19.0760, 72.8777, 5))
+
+    def test_flush_falls_back_to_database(self):
+        self.make_reports()
+        geo_index.backfill()
+        self.redis.flushall()
+
+        # One new report recreates a bucket, but the marker is gone with the rest
+        with self.captureOnCommitCallbacks(execute=True):
+            make_report(self.user, 19.0761, 72.8778)
+        self.assertIsNone(geo_index.search_nearby(19.0760, 72.8777, 5))
+        self.assertEqual(len(find_recent_alerts(19.0760, 72.8777, 5)), 5)
+
+    def test_backfill_indexes_reports_missing_from_redis(self):
+        self.make_reports()
+        self.redis.flushall()
+
+        self.assertEqual(geo_index.backfill(), 5)
+        ids = {alert['id'] for alert in geo_index.search_nearby(19.0760, 72.8777, 5)}
+        self.assertEqual(len(ids), 4)
+
+    def test_index_matches_database(self):
+        reports = self.make_reports()
+
+        for exclude_user_id in (None, self.viewer.id):
+            with self.subTest(exclude_user_id=exclude_user_id):
+                self.redis.delete(geo_index.POPULATED_KEY)
+                from_db = find_recent_alerts(19.0760, 72.8777, 5, exclude_user_id=exclude_user_id)
+                geo_index.backfill()
+                from_index = geo_index.search_nearby(19.0760, 72.8777, 5, exclude_user_id=exclude_user_id)
+
+                self.assertEqual(
+                    {alert['id']: alert['distance_km'] for alert in from_index},
+                    {alert['id']: alert['distance_km'] for alert in from_db},
+                )
+                self.assertNotIn(reports[3].id, {alert['id'] for alert in from_index})
+
+    def test_invalidated_report_leaves_index(self):
+        reports = self.make_reports()
+        geo_index.backfill()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reports[0].status = 'invalid'
+            reports[0].save()
+        ids = {alert['id'] for alert in geo_index.search_nearby(19.0760, 72.8777, 5)}
+        self.assertNotIn(reports[0].id, ids)
@@ -0,0 +1,69 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from .. import geocoding
+from ..models import GeocodeCache
+
+GAZETTEER = """name,latitude,longitude
+Andheri,19.1136,72.8697
+Andheri West,19.1364,72.8296
+Lokhandwala Complex Andheri West,19.1425,72.8258
+Bandra,19.0596,72.8295
+broken,not-a-number,72.0
+"""
+
+
+class GazetteerTests(TestCase):
+    """Offline geocoding against the gazetteer CSV (accounts.geocoding)."""
+
+    def setUp(self):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            f.write(GAZETTEER)
+        self.addCleanup(os.remove, path)
+
+        settings_patch = override_settings(GAZETTEER_PATH=path)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+        geocoding.clear_caches()
+        self.addCleanup(geocoding.clear_caches)
+
+    def test_normalize_address(self):
+        self.assertEqual(geocoding.normalize_address("  Shop 4,  ANDHERI (West)! "), "shop 4 andheri west")
+
+    def test_longest_match_wins(self):
+        self.assertEqual(geocoding.geocode("12, Lokhandwala Complex, Andheri West"), (19.1425, 72.8258))
+        self.assertEqual(geocoding.geocode("Station Road, Andheri West, Mumbai"), (19.1364, 72.8296))
+        self.assertEqual(geocoding.geocode("Andheri East"), (19.1136, 72.8697))
+
+    def test_malformed_rows_are_skipped(self):
+        self.assertNotIn("broken", geocoding.load_gazetteer())
+        self.assertEqual(geocoding.geocode("broken"), (None, None))
+
+    def test_hits_and_misses_are_cached(self):
+        self.assertEqual(geocoding.geocode("Near Bandra station"), (19.0596, 72.8295))
+        self.assertEqual(geocoding.geocode("Somewhere unknown"), (None, None))
+
+        miss = GeocodeCache.objects.get(normalized_address="somewhere unknown")
+        self.assertIsNone(miss.matched_name)
+        self.assertIsNone(miss.latitude)
+        self.assertEqual(GeocodeCache.objects.get(normalized_address="near bandra station").matched_name, "bandra")
+
+        # Repeats are answered in-process without touching the table...
+        with self.assertNumQueries(0):
+            self.assertEqual(geocoding.geocode("somewhere  UNKNOWN"), (None, None))
+            self.assertEqual(geocoding.geocode("Near Bandra Station"), (19.0596, 72.8295))
+
+        # ...and by the table once the in-process cache is gone
+        geocoding.clear_caches()
+        with self.assertNumQueries(1):
+            self.assertEqual(geocoding.geocode("Somewhere unknown"), (None, None))
+
+    def test_missing_gazetteer_caches_nothing(self):
+        with override_settings(GAZETTEER_PATH=os.path.join(tempfile.gettempdir(), 'no-such-gazetteer.csv')):
+            geocoding.clear_caches()
+            with self.assertLogs('accounts.geocoding', 'WARNING'):
+                self.assertEqual(geocoding.geocode("Bandra"), (None, None))
+        self.assertFalse(GeocodeCache.objects.exists())
@@ -0,0 +1,115 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import alert_cache, heatmap
+from ..models import CivicIssue, HeatmapCell, WasteReport
+from ..utils import grid_index
+from .helpers import TEST_CACHES, make_report
+
+
+def heatmap_counts():
+    return {
+        (cell.level, cell.row, cell.col, cell.category, cell.severity, cell.hour): cell.count
+        for cell in HeatmapCell.objects.exclude(count=0)
+    }
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HeatmapSignalTests(TestCase):
+    """HeatmapCell counts follow reports through their signal handlers."""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch('accounts.geo_index.index_report'),
+            mock.patch('accounts.geo_index.remove_report'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+
+    def count_at(self, lat, lon, level=0):
+        row, col = grid_index(lat, lon, heatmap.HEATMAP_LEVELS[level])
+        return sum(
+            cell.count for cell in HeatmapCell.objects.filter(level=level, row=row, col=col)
+        )
+
+    def test_counts_follow_status_changes(self):
+        report = make_report(self.user, 19.0760, 72.8777)
+        self.assertEqual(self.count_at(19.0760, 72.8777), 1)
+
+        report.status = 'invalid'
+        report.save()
+        self.assertEqual(self.count_at(19.0760, 72.8777), 0)
+
+        report.status = 'pending'
+        report.save()
+        self.assertEqual(self.count_at(19.0760, 72.8777), 1)
+
+        report.delete()
+        self.assertEqual(self.count_at(19.0760, 72.8777), 0)
+
+    def test_counts_follow_position_changes(self):
+        report = make_report(self.user, 19.0760, 72.8777)
+
+        report.latitude, report.longitude = 18.5204, 73.8567
+        report.save()
+        self.assertEqual(self.count_at(19.0760, 72.8777), 0)
+        self.assertEqual(self.count_at(18.5204, 73.8567), 1)
+
+        # Reloaded instances know their stored position too
+        report = WasteReport.objects.get(pk=report.pk)
+        report.latitude, report.longitude = 19.0760, 72.8777
+        report.save()
+        self.assertEqual(self.count_at(19.0760, 72.8777), 1)
+        self.assertEqual(self.count_at(18.5204, 73.8567), 0)
+
+    def test_classification_moves_bucket(self):
+        report = make_report(self.user, 19.0760, 72.8777)
+        report.category, report.severity = 'plastic', 'high'
+        report.save()
+
+        cells = HeatmapCell.objects.filter(level=0).exclude(count=0)
+        self.assertEqual([(cell.category, cell.severity, cell.count) for cell in cells], [('plastic', 'high', 1)])
+
+    def test_untracked_saves_skip_heatmap_and_alert_cache(self):
+        report = make_report(self.user, 19.0760, 72.8777)
+        report.description = 'Still overflowing'
+
+        with mock.patch.object(heatmap, 'move') as move, \
+                mock.patch.object(alert_cache, 'invalidate') as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            report.save(update_fields=['updated_at'])
+        move.assert_not_called()
+        invalidate.assert_not_called()
+
+        with mock.patch.object(heatmap, 'move') as move, \
+                mock.patch.object(alert_cache, 'invalidate') as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            report.save(update_fields=['description', 'updated_at'])
+        # The description shows in cached alerts, but not on the heatmap
+        move.assert_not_called()
+        invalidate.assert_called()
+
+    def test_rebuild_matches_incremental_counts(self):
+        reports = [
+            make_report(self.user, 19.0760, 72.8777),
+            make_report(self.user, 19.0800, 72.8800, category='plastic', severity='low'),
+            make_report(self.user, 18.5204, 73.8567),
+            make_report(self.user, 28.6139, 77.2090),
+        ]
+        reports[0].status = 'invalid'
+        reports[0].save()
+        reports[2].latitude, reports[2].longitude = 18.5300, 73.8600
+        reports[2].save()
+        reports[3].delete()
+        CivicIssue.objects.create(
+            name='Resident', phone='0', issue='Broken streetlight', address='MG Road',
+            latitude=19.0700, longitude=72.8700,
+        )
+
+        incremental = heatmap_counts()
+        call_command('rebuild_heatmap', stdout=mock.MagicMock())
+        self.assertEqual(heatmap_counts(), incremental)
@@ -0,0 +1,145 @@
+import hashlib
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.client import encode_multipart
+from rest_framework.test import APIClient
+
+from .. import idempotency
+from ..models import CivicIssue, IdempotencyRecord, WasteReport
+from .helpers import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class IdempotencyTests(TestCase):
+    """Idempotency-Key replay on submission endpoints (accounts.idempotency)."""
+
+    ISSUE = {
+        "issue": "Pothole", "description": "Deep pothole", "name": "Asha",
+        "phone": "9999999999", "address": "MG Road",
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def post(self, data, key):
+        return self.client.post('/auth/api/save-issue/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_repeat_replays_first_response(self):
+        first = self.post(self.ISSUE, 'key-1')
+        second = self.post(self.ISSUE, 'key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(CivicIssue.objects.count(), 1)
+
+    def test_different_keys_create_separately(self):
+        self.post(self.ISSUE, 'key-1')
+        self.post(self.ISSUE, 'key-2')
+        self.assertEqual(CivicIssue.objects.count(), 2)
+
+    def test_failed_request_releases_key(self):
+        failed = self.post({"issue": "Pothole"}, 'key-1')
+        self.assertEqual(failed.status_code, 400)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+        retried = self.post(self.ISSUE, 'key-1')
+        self.assertEqual(retried.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', retried)
+        self.assertEqual(CivicIssue.objects.count(), 1)
+
+    def test_key_reused_for_a_different_body_is_422(self):
+        self.assertEqual(self.post(self.ISSUE, 'key-1').status_code, 201)
+
+        response = self.post(dict(self.ISSUE, description="Two potholes"), 'key-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(CivicIssue.objects.count(), 1)
+
+    def test_repeat_while_in_progress_is_409_at_once(self):
+        self.post(self.ISSUE, 'key-1')
+        IdempotencyRecord.objects.update(status='in_progress', response_status=None, response_body=None)
+
+        with mock.patch('time.sleep') as sleep:
+            response = self.post(self.ISSUE, 'key-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        sleep.assert_not_called()
+        self.assertEqual(CivicIssue.objects.count(), 1)
+
+
+@override_settings(CACHES=TEST_CACHES, VALIDATION_WORKERS_IN_PROCESS=0)
+class MultipartIdempotencyTests(TestCase):
+    """Streamed multipart submissions are fingerprinted without their boundary."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        settings_patch = override_settings(MEDIA_ROOT=media_root)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+
+        for patcher in (
+            mock.patch('accounts.geo_index.index_report'),
+            mock.patch('accounts.alert_stream.publish'),
+            mock.patch('accounts.upload_handlers.STREAMING_UPLOAD_DIR', media_root),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, boundary, voice_note=b'voice note'):
+        body = encode_multipart(boundary, {
+            'description': 'Overflowing bin',
+            'voice_note': SimpleUploadedFile('note.webm', voice_note, content_type='audio/webm'),
+        })
+        return self.client.generic(
+            'POST', '/auth/report/', body,
+            content_type=f'multipart/form-data; boundary={boundary}',
+            HTTP_IDEMPOTENCY_KEY='key-1',
+        )
+
+    def test_reencoded_form_replays(self):
+        first = self.post('BoundaryOfTheFirstAttempt')
+        self.assertEqual(first.status_code, 201)
+
+        second = self.post('xYz-retry-0123456789')
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(WasteReport.objects.count(), 1)
+
+        self.assertEqual(self.post('xYz-retry-0123456789', voice_note=b'other note').status_code, 422)
+        self.assertEqual(WasteReport.objects.count(), 1)
+
+
+class RequestFingerprintTests(SimpleTestCase):
+
+    def fingerprint(self, body, content_type, read_size):
+        request = RequestFactory().generic('POST', '/auth/report/', body, content_type=content_type)
+        stream = idempotency._fingerprint_body(request)
+        while request.read(read_size):
+            pass
+        return stream.drain()
+
+    def test_boundary_split_across_reads_is_still_replaced(self):
+        for boundary in ('short-one', 'a-much-longer-boundary-0123456789'):
+            body = f'--{boundary}\r\npart\r\n--{boundary}--\r\n'.encode()
+            content_type = f'multipart/form-data; boundary={boundary}'
+            expected = hashlib.sha256(b'POST /auth/report/\n--boundary\r\npart\r\n--boundary--\r\n').hexdigest()
+            for read_size in (1, 3, 7, 64):
+                with self.subTest(boundary=boundary, read_size=read_size):
+                    self.assertEqual(self.fingerprint(body, content_type, read_size), expected)
+
+    def test_other_bodies_are_hashed_as_sent(self):
+        first = self.fingerprint(b'{"a": 1}', 'application/json', 3)
+        self.assertEqual(first, hashlib.sha256(b'POST /auth/report/\n{"a": 1}').hexdigest())
+        self.assertNotEqual(first, self.fingerprint(b'{"a": 2}', 'application/json', 3))
@@ -0,0 +1,101 @@
+import gc
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from PIL import Image
+
+from .. import image_pipeline
+
+# EXIF tags
+ORIENTATION = 0x0112
+GPS_INFO = 0x8825
+ROTATED_90_CW = 6
+
+
+def phone_photo(width=400, height=200):
+    """A JPEG whose left half is red and right half blue, stored sideways with EXIF and GPS data."""
+    image = Image.new('RGB', (width, height), 'red')
+    image.paste((0, 0, 255), (width // 2, 0, width, height))
+    exif = Image.Exif()
+    exif[ORIENTATION] = ROTATED_90_CW
+    exif[GPS_INFO] = {1: 'N', 2: (19.0, 4.0, 33.6)}
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif, quality=95)
+    return buffer.getvalue()
+
+
+class OptimizeImageTests(SimpleTestCase):
+    """Ingest-time photo optimization (accounts.image_pipeline)."""
+
+    def optimize(self, source, **options):
+        options.setdefault('image_format', 'JPEG')
+        result = image_pipeline.optimize_image(source, **options)
+        return result, Image.open(io.BytesIO(result.data))
+
+    def test_orientation_is_applied(self):
+        result, image = self.optimize(phone_photo())
+        self.assertEqual(result.original_size, (400, 200))
+        # Displayed upright: the stored left (red) half ends up on top
+        self.assertEqual(image.size, (200, 400))
+        top, bottom = image.getpixel((100, 50)), image.getpixel((100, 350))
+        self.assertGreater(top[0], 200)
+        self.assertLess(top[2], 60)
+        self.assertGreater(bottom[2], 200)
+        self.assertLess(bottom[0], 60)
+
+    def test_metadata_is_stripped(self):
+        _, image = self.optimize(phone_photo())
+        self.assertEqual(dict(image.getexif()), {})
+        self.assertNotIn('icc_profile', image.info)
+
+    def test_longest_edge_is_capped(self):
+        result, image = self.optimize(phone_photo(1000, 600), max_dimension=300)
+        # 600x1000 upright, scaled to fit 300
+        self.assertEqual(result.size, (180, 300))
+        self.assertEqual(image.size, (180, 300))
+
+        # Smaller images are not enlarged
+        result, _ = self.optimize(phone_photo(120, 80), max_dimension=300)
+        self.assertEqual(result.size, (80, 120))
+
+    def test_default_format_is_webp(self):
+        _, image = self.optimize(phone_photo(), image_format=image_pipeline.REPORT_PHOTO_FORMAT)
+        self.assertEqual(image.format, image_pipeline.REPORT_PHOTO_FORMAT)
+
+    def test_oversized_images_are_refused(self):
+        with mock.patch.object(image_pipeline, 'MAX_INPUT_PIXELS', 1000):
+            with self.assertRaises(image_pipeline.UnidentifiedImageError):
+                self.optimize(phone_photo())
+
+    @unittest.skipUnless(os.path.isdir('/proc/self/fd'), "needs /proc to count open files")
+    def test_file_source_is_closed(self):
+        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as f:
+            f.write(phone_photo())
+        self.addCleanup(os.remove, f.name)
+
+        gc.collect()
+        gc.disable()
+        self.addCleanup(gc.enable)
+        before = len(os.listdir('/proc/self/fd'))
+        self.optimize(f.name)
+        self.assertEqual(len(os.listdir('/proc/self/fd')), before)
+
+
+class PreparePhotoTests(SimpleTestCase):
+
+    def test_photo_is_replaced_by_optimized_file(self):
+        photo, original = image_pipeline.prepare_photo(SimpleUploadedFile('IMG_0001.JPG', phone_photo()))
+        self.assertEqual(photo.name, 'IMG_0001' + image_pipeline.EXTENSIONS[image_pipeline.REPORT_PHOTO_FORMAT])
+        self.assertIsNone(original)
+
+    def test_undecodable_upload_is_kept(self):
+        upload = SimpleUploadedFile('photo.jpg', b'not really a jpeg')
+        with self.assertLogs('accounts.image_pipeline', 'WARNING'):
+            photo, original = image_pipeline.prepare_photo(upload)
+        self.assertIs(photo, upload)
+        self.assertIsNone(original)
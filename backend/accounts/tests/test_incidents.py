@@ -0,0 +1,149 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..incidents import assign_incident, detach_incident, recluster
+from ..models import Incident, WasteReport
+from .helpers import TEST_CACHES, make_report
+
+
+@override_settings(CACHES=TEST_CACHES)
+class IncidentClusteringTests(TestCase):
+    """Incremental clustering of duplicate reports (accounts.incidents)."""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch('accounts.geo_index.index_report'),
+            mock.patch('accounts.geo_index.remove_report'),
+            mock.patch('accounts.alert_stream.publish'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+
+    def report(self, lat, lon, **fields):
+        report = make_report(self.user, lat, lon, **fields)
+        assign_incident(report)
+        return report
+
+    def test_reports_within_radius_join(self):
+        first = self.report(19.0760, 72.8777)
+        # ~22 m north
+        second = self.report(19.0762, 72.8777)
+        self.assertEqual(first.incident_id, second.incident_id)
+
+        incident = Incident.objects.get()
+        self.assertEqual(incident.member_count, 2)
+        self.assertAlmostEqual(incident.latitude, 19.0761)
+        self.assertAlmostEqual(incident.longitude, 72.8777)
+
+    def test_reports_beyond_radius_or_category_split(self):
+        first = self.report(19.0760, 72.8777)
+        # ~110 m north
+        far = self.report(19.0770, 72.8777)
+        other = self.report(19.0760, 72.8777, issue_type='Illegal Dumping')
+        self.assertEqual(len({first.incident_id, far.incident_id, other.incident_id}), 3)
+
+    def test_reports_outside_the_window_split(self):
+        first = self.report(19.0760, 72.8777)
+        later = make_report(self.user, 19.0760, 72.8777)
+        WasteReport.objects.filter(pk=later.pk).update(created_at=first.created_at + timedelta(hours=100))
+        later.refresh_from_db()
+        assign_incident(later)
+        self.assertNotEqual(first.incident_id, later.incident_id)
+
+    def test_detach_updates_centroid(self):
+        first = self.report(19.0760, 72.8777)
+        self.report(19.0762, 72.8777)
+        self.report(19.0764, 72.8777)
+
+        detach_incident(first)
+        incident = Incident.objects.get()
+        self.assertEqual(incident.member_count, 2)
+        self.assertAlmostEqual(incident.latitude, 19.0763)
+        self.assertIsNone(WasteReport.objects.get(pk=first.pk).incident_id)
+
+    def test_deleting_last_report_deletes_incident(self):
+        first = self.report(19.0760, 72.8777)
+        second = self.report(19.0762, 72.8777)
+
+        first.delete()
+        self.assertEqual(Incident.objects.get().member_count, 1)
+        second.delete()
+        self.assertFalse(Incident.objects.exists())
+
+    def test_classification_reclusters(self):
+        plastic = self.report(19.0760, 72.8777, category='plastic')
+        report = self.report(19.0761, 72.8777)
+        self.assertNotEqual(report.incident_id, plastic.incident_id)
+        unclassified_incident = report.incident_id
+
+        report.category = 'plastic'
+        with self.captureOnCommitCallbacks(execute=True):
+            report.save()
+
+        report.refresh_from_db()
+        self.assertEqual(report.incident_id, plastic.incident_id)
+        self.assertEqual(Incident.objects.get(pk=plastic.incident_id).member_count, 2)
+        self.assertFalse(Incident.objects.filter(pk=unclassified_incident).exists())
+
+    def test_invalid_reports_leave_their_incident(self):
+        first = self.report(19.0760, 72.8777)
+        second = self.report(19.0762, 72.8777)
+
+        second.status = 'invalid'
+        recluster(second)
+        self.assertIsNone(second.incident_id)
+        incident = Incident.objects.get(pk=first.incident_id)
+        self.assertEqual(incident.member_count, 1)
+        self.assertAlmostEqual(incident.latitude, 19.0760)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class IncidentListTests(TestCase):
+    """Paginated incident listing (accounts.views.get_incidents)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', 'viewer@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        self.incidents = [
+            Incident.objects.create(
+                category='plastic', latitude=19.0 + i * 0.01, longitude=72.8, member_count=1,
+                first_reported_at=now, last_reported_at=now - timedelta(minutes=i % 2),
+            )
+            for i in range(5)
+        ]
+
+    def test_pages_follow_cursor(self):
+        seen = []
+        params = {'limit': 2}
+        while True:
+            response = self.client.get('/auth/api/incidents/', params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(incident['id'] for incident in response.data['incidents'])
+            if response.data['next_cursor'] is None:
+                break
+            params['cursor'] = response.data['next_cursor']
+
+        expected = Incident.objects.order_by('-last_reported_at', '-id').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_bbox_filter(self):
+        response = self.client.get('/auth/api/incidents/', {'bbox': '72.7,19.015,72.9,19.035'})
+        self.assertEqual(
+            sorted(incident['id'] for incident in response.data['incidents']),
+            [self.incidents[2].id, self.incidents[3].id],
+        )
+
+    def test_malformed_cursor_rejected(self):
+        for cursor in ('abc', '12', '12:x'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/auth/api/incidents/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.data['error'])
@@ -0,0 +1,109 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..utils import (
+    grid_cell, grid_cells_within, grid_ring, grid_ring_covers_band, grid_ring_radius_km, grid_rings_for_radius,
+)
+from ..views import NEAREST_MAX_RADIUS_KM, _nearest_open_reports
+from .helpers import TEST_CACHES, make_report
+
+
+@override_settings(CACHES=TEST_CACHES)
+class NearestOpenReportsTests(TestCase):
+    """k-nearest ring search over the grid index (accounts.views.nearest_open_reports)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_nearest_first_and_paged(self):
+        far = make_report(self.user, 19.0900, 72.8777)
+        near = make_report(self.user, 19.0765, 72.8777)
+        nearest = make_report(self.user, 19.0761, 72.8777, status='in-progress')
+        make_report(self.user, 19.0762, 72.8777, status='resolved')
+
+        response = self.client.get('/auth/api/reports/nearest/', {'lat': 19.0760, 'lon': 72.8777, 'k': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['id'] for r in response.data['reports']], [nearest.id, near.id])
+
+        response = self.client.get('/auth/api/reports/nearest/', {
+            'lat': 19.0760, 'lon': 72.8777, 'k': 2, 'cursor': response.data['next_cursor'],
+        })
+        self.assertEqual([r['id'] for r in response.data['reports']], [far.id])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_out_of_range_coordinates_rejected(self):
+        for lat, lon in ((95, 0), (-90.5, 0), (0, 181), ('nan', 0)):
+            with self.subTest(lat=lat, lon=lon):
+                response = self.client.get('/auth/api/reports/nearest/', {'lat': lat, 'lon': lon})
+                self.assertEqual(response.status_code, 400)
+
+    def test_search_is_bounded_near_the_poles(self):
+        # Fewer open reports than k: the search must end on its ring bound
+        make_report(self.user, 0.0, 0.0)
+        rings = grid_rings_for_radius(NEAREST_MAX_RADIUS_KM)
+        for lat in (90.0, 89.5, -89.99, 0.0):
+            with self.subTest(lat=lat), CaptureQueriesContext(connection) as queries:
+                _nearest_open_reports(lat, 0.0, 5, max_radius_km=NEAREST_MAX_RADIUS_KM)
+            self.assertLessEqual(len(queries), rings + 1)
+
+    def test_max_radius_is_capped(self):
+        rings = grid_rings_for_radius(NEAREST_MAX_RADIUS_KM)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/auth/api/reports/nearest/', {
+                'lat': 89.9, 'lon': 0, 'k': 100, 'max_radius': 1e9,
+            })
+        self.assertEqual(response.status_code, 200)
+        # Plus the user lookup for authentication
+        self.assertLessEqual(len(queries), rings + 2)
+
+    def test_searched_radius_helpers(self):
+        self.assertGreater(grid_ring_radius_km(45.0, 2), grid_ring_radius_km(45.0, 1))
+        # Cells at the pole have no width, so no radius is guaranteed covered...
+        self.assertAlmostEqual(grid_ring_radius_km(90.0, 5), 0.0)
+        # ...until a ring spans every longitude
+        self.assertFalse(grid_ring_covers_band(100))
+        self.assertTrue(grid_ring_covers_band(18000))
+        self.assertEqual(grid_ring_radius_km(90.0, 18000), 18000 * 0.01 * 111.32)
+
+    def test_malformed_cursor_rejected(self):
+        make_report(self.user, 19.0761, 72.8777)
+        for cursor in ('abc', '1.5', '1.5:x', 'nan:3', '-1:3'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/auth/api/reports/nearest/', {
+                    'lat': 19.0760, 'lon': 72.8777, 'cursor': cursor,
+                })
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.data['error'])
+
+    def test_search_crosses_the_antimeridian(self):
+        west = make_report(self.user, 0.0, -179.995)
+        make_report(self.user, 0.0, 179.5)
+        response = self.client.get('/auth/api/reports/nearest/', {'lat': 0.0, 'lon': 179.995, 'k': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['id'] for r in response.data['reports']], [west.id])
+        self.assertAlmostEqual(response.data['reports'][0]['distance_km'], 1.11, places=2)
+
+
+class GridWrapTests(TestCase):
+    """Grid cells wrap around at the antimeridian."""
+
+    def test_ring_wraps_columns(self):
+        self.assertIn(grid_cell(0.0, -179.995), grid_ring(0.0, 179.995, 1))
+        self.assertIn(grid_cell(0.0, 179.995), grid_ring(0.0, -179.995, 1))
+
+    def test_longitude_180_is_minus_180(self):
+        self.assertEqual(grid_cell(10.0, 180.0), grid_cell(10.0, -180.0))
+
+    def test_cells_within_wrap(self):
+        cells = grid_cells_within(0.0, 179.999, 2)
+        self.assertIn(grid_cell(0.0, -179.999), cells)
+        self.assertEqual(len(cells), len(set(cells)))
+
+    def test_full_band_ring_has_no_duplicates(self):
+        ring = grid_ring(89.995, 0.0, 18000)
+        self.assertEqual(len(ring), len(set(ring)))
@@ -0,0 +1,102 @@
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from .. import resumable_uploads
+from ..resumable_uploads import UploadError, merge_range, parse_content_range
+
+
+class ContentRangeTests(SimpleTestCase):
+    """Content-Range parsing and received-range bookkeeping (accounts.resumable_uploads)."""
+
+    def test_parse_content_range(self):
+        self.assertEqual(parse_content_range('bytes 0-99/1000', 1000), (0, 100))
+        self.assertEqual(parse_content_range(' bytes 900-999/* ', 1000), (900, 1000))
+
+    def test_malformed_content_range(self):
+        for header in (None, '', 'bytes=0-99/1000', 'bytes 0-/1000', 'bytes -1-5/1000', 'items 0-99/1000'):
+            with self.subTest(header=header), self.assertRaises(UploadError) as raised:
+                parse_content_range(header, 1000)
+            self.assertEqual(raised.exception.status, 400)
+
+        with self.assertRaises(UploadError) as raised:
+            parse_content_range('bytes 0-99/999', 1000)
+        self.assertEqual(raised.exception.status, 400)
+
+    def test_range_outside_the_file(self):
+        for header in ('bytes 50-10/1000', 'bytes 900-1000/1000', 'bytes 1000-1000/*'):
+            with self.subTest(header=header), self.assertRaises(UploadError) as raised:
+                parse_content_range(header, 1000)
+            self.assertEqual(raised.exception.status, 416)
+
+    def test_merge_range(self):
+        self.assertEqual(merge_range([], 10, 20), [[10, 20]])
+        # Adjacent and overlapping ranges coalesce, disjoint ones stay apart
+        self.assertEqual(merge_range([[0, 10]], 10, 20), [[0, 20]])
+        self.assertEqual(merge_range([[0, 10], [30, 40]], 5, 35), [[0, 40]])
+        self.assertEqual(merge_range([[30, 40]], 0, 10), [[0, 10], [30, 40]])
+        # Resending a chunk changes nothing
+        self.assertEqual(merge_range([[0, 10], [20, 30]], 20, 30), [[0, 10], [20, 30]])
+
+
+class UploadSessionTests(TestCase):
+    """Writing chunks into a session and assembling the finished file."""
+
+    def setUp(self):
+        session_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, session_dir, True)
+        patcher = mock.patch.object(resumable_uploads, 'UPLOAD_SESSION_DIR', session_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('uploader', 'uploader@example.com', 'pw')
+
+    def open(self, content, sha256=None):
+        return resumable_uploads.open_session(self.user, 'voice_note', 'note.webm', len(content), sha256)
+
+    def send(self, session, content, start, end):
+        return resumable_uploads.write_chunk(session, start, end, io.BytesIO(content[start:end]))
+
+    def test_out_of_order_chunks(self):
+        content = bytes(range(256)) * 40
+        session = self.open(content)
+
+        session = self.send(session, content, 8000, 10240)
+        session = self.send(session, content, 0, 3000)
+        self.assertEqual(resumable_uploads.missing_ranges(session), [[3000, 8000]])
+        self.assertFalse(resumable_uploads.is_complete(session))
+        with self.assertRaises(UploadError) as raised:
+            resumable_uploads.assemble(session)
+        self.assertEqual(raised.exception.status, 409)
+
+        session = self.send(session, content, 3000, 8000)
+        self.assertTrue(resumable_uploads.is_complete(session))
+        upload = resumable_uploads.assemble(session)
+        self.addCleanup(upload.close)
+        self.assertEqual(upload.read(), content)
+        self.assertEqual(upload.sha256, hashlib.sha256(content).hexdigest())
+
+    def test_short_chunk_is_not_recorded(self):
+        content = b'x' * 100
+        session = self.open(content)
+        with self.assertRaises(UploadError):
+            resumable_uploads.write_chunk(session, 0, 100, io.BytesIO(content[:60]))
+        session.refresh_from_db()
+        self.assertEqual(session.received_ranges, [])
+
+    def test_declared_sha256_is_checked(self):
+        content = b'recorded voice note'
+        session = self.open(content, sha256=hashlib.sha256(b'something else').hexdigest())
+        session = self.send(session, content, 0, len(content))
+        with self.assertRaises(UploadError) as raised:
+            resumable_uploads.assemble(session)
+        self.assertEqual(raised.exception.status, 422)
+
+        session = self.open(content, sha256=hashlib.sha256(content).hexdigest().upper())
+        session = self.send(session, content, 0, len(content))
+        upload = resumable_uploads.assemble(session)
+        upload.close()
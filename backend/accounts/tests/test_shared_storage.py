@@ -0,0 +1,89 @@
+import hashlib
+import importlib.util
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase
+
+from .. import classifier_client
+from ..classifier_client import ClassifierError
+
+
+def _load_image_source():
+    """The classifier service's utils/image_source.py, which lives outside the Django project."""
+    path = os.path.join(settings.BASE_DIR.parent, 'environment_classifier', 'utils', 'image_source.py')
+    spec = importlib.util.spec_from_file_location('classifier_image_source', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class SharedStorageTests(TestCase):
+    """The classifier's shared-volume path allowlist, and the client's upload fallback."""
+
+    def setUp(self):
+        self.image_source = _load_image_source()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+
+        self.sha256 = hashlib.sha256(b'photo').hexdigest()
+        for name, content in (
+            ('waste_reports/photo.jpg', b'photo'),
+            (f'waste_reports/{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}.jpg', b'photo'),
+            ('waste_reports/notes.txt', b'text'),
+            ('db.sqlite3', b'SQLite format 3'),
+            ('core/settings.py', b'SECRET_KEY = ""'),
+        ):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+
+        patcher = mock.patch.object(self.image_source, 'SHARED_MEDIA_ROOT', self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_report_images_are_readable(self):
+        for source in (
+            self.image_source.from_shared(path='waste_reports/photo.jpg'),
+            self.image_source.from_shared(sha256=self.sha256),
+        ):
+            self.assertEqual(bytes(source.data), b'photo')
+            source.close()
+
+    def test_anything_else_is_refused(self):
+        for path in (
+            'db.sqlite3',
+            'core/settings.py',
+            'waste_reports/notes.txt',
+            'waste_reports/../db.sqlite3',
+            '../etc/passwd.jpg',
+            os.path.join(self.root, 'db.sqlite3'),
+        ):
+            with self.subTest(path=path):
+                with self.assertRaises(self.image_source.ImageSourceError) as raised:
+                    self.image_source.from_shared(path=path)
+                self.assertEqual(raised.exception.status, 400)
+
+    def test_symlink_out_of_media_dirs_is_refused(self):
+        os.symlink(os.path.join(self.root, 'db.sqlite3'), os.path.join(self.root, 'waste_reports', 'db.jpg'))
+        with self.assertRaises(self.image_source.ImageSourceError):
+            self.image_source.from_shared(path='waste_reports/db.jpg')
+
+    def test_client_uploads_when_path_is_refused(self):
+        field_file = mock.Mock()
+        field_file.name = 'waste_reports/photo.jpg'
+        field_file.open.return_value = io.BytesIO(b'photo')
+        refused = ClassifierError("Classifier error 400", status=400)
+
+        with mock.patch.object(classifier_client, 'CLASSIFIER_SHARED_STORAGE', True), \
+                mock.patch.object(classifier_client, '_post', side_effect=[refused, {"category": "road"}]) as post:
+            result = classifier_client.classify_stored(field_file)
+
+        self.assertEqual(result, {"category": "road"})
+        self.assertEqual(post.call_args_list[0].kwargs['data'], {'path': 'waste_reports/photo.jpg'})
+        self.assertIn('image', post.call_args_list[1].kwargs['files'])
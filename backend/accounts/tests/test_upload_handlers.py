@@ -0,0 +1,96 @@
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http.multipartparser import MultiPartParser
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from rest_framework.test import APIClient
+
+from .. import upload_handlers
+from ..models import WasteReport
+from ..upload_handlers import StreamingReportUploadHandler
+from .helpers import TEST_CACHES
+
+
+def multipart(**fields):
+    body = encode_multipart(BOUNDARY, fields)
+    meta = {'CONTENT_TYPE': MULTIPART_CONTENT, 'CONTENT_LENGTH': str(len(body))}
+    return meta, body
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StreamingUploadHandlerTests(TestCase):
+    """Size limits and hashing of streamed uploads (accounts.upload_handlers)."""
+
+    def setUp(self):
+        upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_dir, True)
+        patcher = mock.patch.object(upload_handlers, 'STREAMING_UPLOAD_DIR', upload_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def parse(self, handler, **fields):
+        meta, body = multipart(**fields)
+        parser = MultiPartParser(meta, io.BytesIO(body), [handler])
+        data, files = parser.parse()
+        for uploaded in files.values():
+            self.addCleanup(uploaded.close)
+        return data, files
+
+    def test_file_is_hashed_while_streamed(self):
+        content = b'voice' * 1000
+        data, files = self.parse(
+            StreamingReportUploadHandler(max_file_bytes=len(content)),
+            description='Overflowing bin',
+            voice_note=SimpleUploadedFile('note.webm', content),
+        )
+        self.assertEqual(data['description'], 'Overflowing bin')
+        voice_note = files['voice_note']
+        self.assertEqual(voice_note.size, len(content))
+        self.assertEqual(voice_note.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(voice_note.read(), content)
+
+    def test_file_over_the_limit_stops_the_upload(self):
+        handler = StreamingReportUploadHandler(max_file_bytes=100)
+        _, files = self.parse(
+            handler,
+            description='Overflowing bin',
+            voice_note=SimpleUploadedFile('note.webm', b'x' * 101),
+        )
+        self.assertEqual(handler.error, 'voice_note exceeds 100 bytes')
+        self.assertNotIn('voice_note', files)
+
+    def test_request_over_the_limit_is_not_read(self):
+        handler = StreamingReportUploadHandler(max_request_bytes=100)
+        meta, body = multipart(description='Overflowing bin', voice_note=SimpleUploadedFile('note.webm', b'x' * 200))
+        stream = io.BytesIO(body)
+        data, files = MultiPartParser(meta, stream, [handler]).parse()
+
+        self.assertEqual(handler.error, 'Request body exceeds 100 bytes')
+        self.assertEqual((len(data), len(files)), (0, 0))
+        self.assertEqual(stream.tell(), 0)
+
+
+@override_settings(CACHES=TEST_CACHES, VALIDATION_WORKERS_IN_PROCESS=0)
+class ReportUploadLimitTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_oversized_request_is_413(self):
+        with mock.patch.object(upload_handlers, 'REPORT_UPLOAD_MAX_BYTES', 1024):
+            # Past 2 * REPORT_UPLOAD_MAX_BYTES + 1 MiB
+            response = self.client.post('/auth/report/', {
+                'description': 'Overflowing bin',
+                'voice_note': SimpleUploadedFile('note.webm', b'x' * (1024 * 1024 + 4096)),
+            })
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('exceeds', response.data['error'])
+        self.assertFalse(WasteReport.objects.exists())
@@ -0,0 +1,126 @@
+import importlib
+import sys
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .. import classifier_client, validation_queue
+from ..classifier_client import ClassifierError
+from ..models import ValidationJob, WasteReport
+from .helpers import TEST_CACHES, make_report
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ValidationQueueTests(TestCase):
+    """Claiming, retrying and crash recovery of validation jobs (accounts.validation_queue)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reporter', 'reporter@example.com', 'pw')
+        self.report = make_report(self.user, 19.0760, 72.8777)
+        # A stored photo name is all the queue needs; the classifier call is mocked
+        WasteReport.objects.filter(id=self.report.id).update(photo='waste_reports/photo.jpg')
+
+    def make_job(self, **fields):
+        fields.setdefault('run_after', timezone.now())
+        return ValidationJob.objects.create(report=self.report, description='Overflowing bin', **fields)
+
+    def test_job_is_claimed_once(self):
+        job = self.make_job()
+
+        claimed = validation_queue.claim_next('worker-a')
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), ('running', 'worker-a', 1))
+        self.assertIsNone(validation_queue.claim_next('worker-b'))
+
+    def test_jobs_not_due_are_left(self):
+        self.make_job(run_after=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(validation_queue.claim_next('worker-a'))
+
+    def test_stale_lock_is_recovered(self):
+        stale = self.make_job(
+            status='running', locked_by='dead-worker',
+            locked_at=timezone.now() - validation_queue.LOCK_TIMEOUT - timedelta(seconds=1),
+        )
+        live = self.make_job(status='running', locked_by='live-worker', locked_at=timezone.now())
+
+        self.assertEqual(validation_queue.recover_stale_jobs(), 1)
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), ('queued', None))
+        self.assertEqual(live.status, 'running')
+        self.assertEqual(validation_queue.claim_next('worker-a').id, stale.id)
+
+    def test_lock_outlasts_slowest_classifier_call(self):
+        self.assertGreater(validation_queue.LOCK_TIMEOUT.total_seconds(), classifier_client.max_call_seconds())
+
+    def run_claimed(self, result=None, error=None):
+        self.make_job()
+        job = validation_queue.claim_next('worker-a')
+        with mock.patch.object(classifier_client, 'validate_stored', return_value=result, side_effect=error):
+            validation_queue.run_job(job)
+        job.refresh_from_db()
+        self.report.refresh_from_db()
+        return job
+
+    def test_valid_result_is_applied(self):
+        job = self.run_claimed({"is_valid": True, "category": "garbage", "severity": "high", "response_time": "2h"})
+        self.assertEqual(job.status, 'done')
+        self.assertEqual((self.report.status, self.report.category), ('pending', 'garbage'))
+
+    def test_invalid_result_marks_report_invalid(self):
+        job = self.run_claimed({"is_valid": False})
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(self.report.status, 'invalid')
+
+    def test_unreachable_classifier_is_retried_with_backoff(self):
+        job = self.run_claimed(error=ClassifierError("Classifier unreachable"))
+        self.assertEqual(job.status, 'queued')
+        self.assertIsNone(job.locked_by)
+        self.assertGreater(job.run_after, timezone.now())
+
+    def test_rejected_job_fails_without_retry(self):
+        job = self.run_claimed(error=ClassifierError("Classifier error 400", status=400))
+        self.assertEqual(job.status, 'failed')
+
+    def test_fallback_answer_is_provisional(self):
+        job = self.run_claimed({"is_valid": False, "fallback": True})
+        self.assertEqual(self.report.status, 'pending')
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(
+            job.run_after,
+            timezone.now() + timedelta(seconds=validation_queue.FALLBACK_RECHECK_SECONDS - 60),
+        )
+
+    def test_finished_jobs_release_their_lock(self):
+        for result, error, status in (
+            ({"is_valid": True, "category": "garbage"}, None, 'done'),
+            (None, ClassifierError("Classifier error 400", status=400), 'failed'),
+        ):
+            with self.subTest(status=status):
+                job = self.run_claimed(result, error)
+                self.assertEqual(job.status, status)
+                self.assertEqual((job.locked_at, job.locked_by), (None, None))
+
+
+class LocalPoolStartTests(SimpleTestCase):
+    """The in-process pool starts from the server entry points only."""
+
+    def import_fresh(self, module):
+        sys.modules.pop(module, None)
+        self.addCleanup(sys.modules.pop, module, None)
+        return importlib.import_module(module)
+
+    def test_entry_points_start_pool(self):
+        for module in ('core.wsgi', 'core.asgi'):
+            with self.subTest(module=module), mock.patch.object(validation_queue, 'start_local_pool') as start:
+                self.import_fresh(module)
+            start.assert_called_once_with()
+
+    def test_disabled_pool_does_not_start(self):
+        with override_settings(VALIDATION_WORKERS_IN_PROCESS=0), \
+                mock.patch.object(validation_queue.threading, 'Thread') as thread:
+            validation_queue.start_local_pool()
+        thread.assert_not_called()
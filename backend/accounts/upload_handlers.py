@@ -0,0 +1,134 @@
+"""
+Streaming upload handling for report photos and voice notes.
+
+StreamingReportUploadHandler replaces Django's memory/temporary-file
+handlers on the report endpoints. Every file is written chunk by chunk to
+a temporary file in STREAMING_UPLOAD_DIR, which sits on the same
+filesystem as MEDIA_ROOT so storage moves it into place instead of copying
+it. While the bytes stream past, the handler
+
+- computes the SHA-256, so content-addressed storage does not read the
+  file again (accounts.storage),
+- parses the image header (format and dimensions), and
+- enforces REPORT_UPLOAD_MAX_BYTES per file, stopping the upload as soon
+  as a file grows past it instead of after reading it.
+
+Requests whose Content-Length already exceeds the limit are refused before
+any of the body is read. Nothing is buffered beyond one chunk, so memory
+per request stays flat whatever the file size.
+"""
+import hashlib
+import io
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from PIL import Image
+
+REPORT_UPLOAD_MAX_BYTES = getattr(settings, 'REPORT_UPLOAD_MAX_BYTES', 25 * 1024 * 1024)
+STREAMING_UPLOAD_DIR = getattr(settings, 'STREAMING_UPLOAD_DIR', os.path.join(settings.MEDIA_ROOT, 'upload_tmp'))
+
+# Photo bytes kept to find the image header; covers JPEGs with large EXIF blocks
+IMAGE_HEADER_BYTES = 256 * 1024
+
+
+class StreamedUploadedFile(UploadedFile):
+    """
+    An upload written to STREAMING_UPLOAD_DIR, with the sha256 and image
+    header information gathered while it was received. The file is removed
+    on close unless storage has moved it away.
+    """
+
+    def __init__(self, name, content_type, charset, content_type_extra=None):
+        _, ext = os.path.splitext(name)
+        os.makedirs(STREAMING_UPLOAD_DIR, exist_ok=True)
+        file = tempfile.NamedTemporaryFile(suffix=".upload" + ext[:10], dir=STREAMING_UPLOAD_DIR)
+        super().__init__(file, name, content_type, 0, charset, content_type_extra)
+        self.sha256 = None
+        # {"format", "width", "height"} if the header parsed as an image, else None
+        self.image_info = None
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # Moved into storage, so the temporary file is already gone
+            pass
+
+
+class StreamingReportUploadHandler(FileUploadHandler):
+    """Writes each file straight to disk, hashing and size-checking it on the way."""
+
+    def __init__(self, request=None, max_file_bytes=REPORT_UPLOAD_MAX_BYTES, max_request_bytes=None):
+        super().__init__(request)
+        self.max_file_bytes = max_file_bytes
+        self.max_request_bytes = max_request_bytes
+        # Set when the upload was refused; the view answers 413 with it
+        self.error = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if self.max_request_bytes is not None and content_length > self.max_request_bytes:
+            self.error = f"Request body exceeds {self.max_request_bytes} bytes"
+            # Short-circuit parsing: none of the body is read
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = StreamedUploadedFile(self.file_name, self.content_type, self.charset, self.content_type_extra)
+        self._sha256 = hashlib.sha256()
+        self._size = 0
+        # Sniffed for every file: bulk requests may name photo fields freely
+        self._header = bytearray()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._size += len(raw_data)
+        if self._size > self.max_file_bytes:
+            self.error = f"{self.field_name} exceeds {self.max_file_bytes} bytes"
+            # Drop the connection rather than read the rest of the body
+            raise StopUpload(connection_reset=True)
+
+        self._sha256.update(raw_data)
+        self.file.write(raw_data)
+        if self._header is not None:
+            self._sniff_image(raw_data)
+        return None
+
+    def _sniff_image(self, raw_data):
+        self._header += raw_data
+        try:
+            # Image.open only parses the header; nothing is decoded
+            with Image.open(io.BytesIO(self._header)) as image:
+                self.file.image_info = {"format": image.format, "width": image.width, "height": image.height}
+            self._header = None
+        except Exception:
+            if len(self._header) >= IMAGE_HEADER_BYTES:
+                self._header = None
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self._sha256.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+
+def install(request, max_request_bytes=None):
+    """
+    Use the streaming handler for this DRF request; call before touching
+    request.data or request.FILES. Returns the handler so the view can
+    check handler.error after parsing.
+    """
+    handler = StreamingReportUploadHandler(request._request, max_request_bytes=max_request_bytes)
+    request._request.upload_handlers = [handler]
+    return handler
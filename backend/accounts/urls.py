@@ -1,6 +1,9 @@
 from django.urls import path
 from .views import SignupView, LoginView, ProfileView, process_image, create_waste_report, get_user_reports, get_report_stats
-from .views import receive_issue, get_all_reports, check_nearby_alerts
+from .views import receive_issue, get_all_reports, check_nearby_alerts, stream_nearby_alerts, get_heatmap
+from .views import nearest_open_reports, get_incidents, get_incident, nearby_alerts_cache_stats
+from .views import validation_queue_stats, classifier_client_stats, bulk_create_waste_reports
+from .views import create_upload_session, upload_session, finalize_upload, create_waste_report_async
 
 urlpatterns = [
     path('signup/', SignupView.as_view()),
@@ -8,10 +11,23 @@ urlpatterns = [
     path('profile/', ProfileView.as_view()),
     path('process-image/', process_image, name='process_image'),
     path('report/', create_waste_report, name='create_waste_report'),
+    path('report/async/', create_waste_report_async, name='create_waste_report_async'),
+    path('report/bulk/', bulk_create_waste_reports, name='bulk_create_waste_reports'),
+    path('uploads/', create_upload_session, name='create_upload_session'),
+    path('uploads/finalize/', finalize_upload, name='finalize_upload'),
+    path('uploads/<uuid:upload_id>/', upload_session, name='upload_session'),
     path('reports/', get_user_reports, name='get_user_reports'),
     path('all-reports/', get_all_reports, name='get_all_reports'),
     path('report-stats/', get_report_stats, name='get_report_stats'),
     path("api/save-issue/", receive_issue),
     path('api/notifications/nearby/', check_nearby_alerts, name='nearby_alerts'),
+    path('api/notifications/nearby/cache-stats/', nearby_alerts_cache_stats, name='nearby_alerts_cache_stats'),
+    path('api/notifications/stream/', stream_nearby_alerts, name='nearby_alerts_stream'),
+    path('api/heatmap/', get_heatmap, name='heatmap'),
+    path('api/reports/nearest/', nearest_open_reports, name='nearest_open_reports'),
+    path('api/incidents/', get_incidents, name='get_incidents'),
+    path('api/incidents/<int:incident_id>/', get_incident, name='get_incident'),
+    path('api/validation-queue/stats/', validation_queue_stats, name='validation_queue_stats'),
+    path('api/classifier/stats/', classifier_client_stats, name='classifier_client_stats'),
 ]
 
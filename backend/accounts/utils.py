@@ -1,5 +1,17 @@
 import math
 
+import numpy as np
+
+# Size of one spatial index cell in decimal degrees (~1.1 km of latitude)
+GRID_CELL_DEG = 0.01
+
+# Above this many cells an IN (...) lookup stops being cheaper than a scan
+MAX_GRID_CELLS_PER_QUERY = 900
+
+KM_PER_DEG_LAT = 111.32
+
+EARTH_RADIUS_KM = 6371
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
     Calculate the great circle distance between two points 
@@ -14,5 +26,154 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     dlat = lat2 - lat1 
     a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
     c = 2 * math.asin(math.sqrt(a)) 
-    r = 6371 # Radius of earth in kilometers
-    return c * r
\ No newline at end of file
+    return c * EARTH_RADIUS_KM
+
+
+def haversine_many(lat, lon, lats, lons):
+    """
+    Vectorized calculate_distance.
+
+    lat/lon is one origin (scalars) or N origins (1-D arrays); lats/lons are
+    M destinations. Returns an array of M distances in kilometers for a
+    single origin, or an (N, M) array for N origins.
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.radians(np.asarray(lons, dtype=np.float64))
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+
+    if lat.ndim == 1:
+        # Broadcast N origins against M destinations
+        lat = lat[:, np.newaxis]
+        lon = lon[:, np.newaxis]
+
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    # Clip guards against a creeping a hair above 1.0 for antipodal points
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distance_matrix(lats, lons):
+    """
+    Return the symmetric (N, N) matrix of distances in kilometers between
+    N points, e.g. for route planning over a set of reports.
+    """
+    return haversine_many(lats, lons, lats, lons)
+
+
+def grid_index(lat, lon, cell_deg=GRID_CELL_DEG):
+    """
+    Return the (row, col) of the fixed grid cell containing a point.
+    """
+    return math.floor(lat / cell_deg), math.floor(lon / cell_deg)
+
+
+def wrap_col(col, cell_deg=GRID_CELL_DEG):
+    """
+    Map a column past the antimeridian back onto the grid, e.g. one cell
+    east of 179.99 is the cell at -180. Grids that do not divide 360
+    degrees evenly are not wrapped.
+    """
+    columns = round(360.0 / cell_deg)
+    if not math.isclose(columns * cell_deg, 360.0):
+        return col
+    first = math.floor(-180.0 / cell_deg)
+    return first + (col - first) % columns
+
+
+def grid_cell(lat, lon, cell_deg=GRID_CELL_DEG):
+    """
+    Return the grid cell key stored on WasteReport.grid_cell, e.g. "1897:7283".
+    Longitude 180 is the same meridian as -180 and shares its key.
+    """
+    row, col = grid_index(lat, lon, cell_deg)
+    return f"{row}:{wrap_col(col, cell_deg)}"
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Return (min_lat, max_lat, min_lon, max_lon) enclosing a circle of
+    radius_km around the point. Slightly generous, never too small.
+    """
+    lat_delta = radius_km / KM_PER_DEG_LAT
+    min_lat = max(lat - lat_delta, -90.0)
+    max_lat = min(lat + lat_delta, 90.0)
+
+    # Longitude degrees shrink towards the poles; use the widest latitude in the box
+    widest = max(abs(min_lat), abs(max_lat))
+    cos_lat = math.cos(math.radians(widest))
+    if cos_lat < 1e-6:
+        return min_lat, max_lat, -180.0, 180.0
+
+    lon_delta = min(radius_km / (KM_PER_DEG_LAT * cos_lat), 180.0)
+    return min_lat, max_lat, lon - lon_delta, lon + lon_delta
+
+
+def grid_cells_within(lat, lon, radius_km, cell_deg=GRID_CELL_DEG, max_cells=MAX_GRID_CELLS_PER_QUERY):
+    """
+    Return the keys of every grid cell overlapping the circle of radius_km
+    around the point, or None if there are more than max_cells of them.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    min_row, min_col = grid_index(min_lat, min_lon, cell_deg)
+    max_row, max_col = grid_index(max_lat, max_lon, cell_deg)
+
+    if max_cells is not None and (max_row - min_row + 1) * (max_col - min_col + 1) > max_cells:
+        return None
+
+    # A box crossing the antimeridian continues on the other side
+    cols = dict.fromkeys(wrap_col(col, cell_deg) for col in range(min_col, max_col + 1))
+    return [
+        f"{row}:{col}"
+        for row in range(min_row, max_row + 1)
+        for col in cols
+    ]
+
+
+def grid_ring(lat, lon, ring, cell_deg=GRID_CELL_DEG):
+    """
+    Return the keys of the cells exactly `ring` steps away (Chebyshev
+    distance) from the cell containing the point. Ring 0 is that cell.
+    """
+    row, col = grid_index(lat, lon, cell_deg)
+    if ring == 0:
+        return [f"{row}:{wrap_col(col, cell_deg)}"]
+
+    keys = []
+    for c in range(col - ring, col + ring + 1):
+        c = wrap_col(c, cell_deg)
+        keys.append(f"{row - ring}:{c}")
+        keys.append(f"{row + ring}:{c}")
+    west, east = wrap_col(col - ring, cell_deg), wrap_col(col + ring, cell_deg)
+    for r in range(row - ring + 1, row + ring):
+        keys.append(f"{r}:{west}")
+        keys.append(f"{r}:{east}")
+    # Once a ring spans every longitude its columns repeat
+    return list(dict.fromkeys(keys))
+
+
+def grid_ring_radius_km(lat, ring, cell_deg=GRID_CELL_DEG):
+    """
+    Distance from the point within which every location is guaranteed to
+    fall inside rings 0..ring, i.e. the radius already fully searched.
+    """
+    cell_height_km = cell_deg * KM_PER_DEG_LAT
+    if grid_ring_covers_band(ring, cell_deg):
+        # Every longitude is searched, so only the latitude reach limits it
+        return ring * cell_height_km
+
+    widest = min(abs(lat) + (ring + 1) * cell_deg, 90.0)
+    cell_width_km = cell_height_km * math.cos(math.radians(widest))
+    return ring * min(cell_height_km, cell_width_km)
+
+
+def grid_ring_covers_band(ring, cell_deg=GRID_CELL_DEG):
+    """
+    Whether rings 0..ring span all 360 degrees of longitude. Near the poles
+    cells get so narrow that no smaller radius is guaranteed to be covered.
+    """
+    return (2 * ring + 1) * cell_deg >= 360.0
+
+
+def grid_rings_for_radius(radius_km, cell_deg=GRID_CELL_DEG):
+    """Number of rings outwards whose latitude reach covers radius_km."""
+    return math.ceil(radius_km / (cell_deg * KM_PER_DEG_LAT))
@@ -0,0 +1,332 @@
+"""
+Durable, bounded queue for background AI validation of report photos.
+
+create_waste_report stores a ValidationJob row instead of starting a thread
+per photo. A fixed pool of worker threads claims due jobs, calls the
+classifier's /validate endpoint and applies the result to the report.
+Failed attempts are retried with exponential backoff. Jobs left "running"
+by a crashed process are re-queued once their lock expires, so no work is
+lost on restart.
+
+Answers from the classifier's fallback model ("fallback": true, given
+while Gemini is out of quota or unreachable) never checked the
+description. They are provisional: the report takes their category and
+stays pending, and the job runs again after FALLBACK_RECHECK_SECONDS.
+
+Workers run inside the web process (settings.VALIDATION_WORKERS_IN_PROCESS
+threads, started by the WSGI/ASGI entry points in core/ so queued and
+recovered jobs run without waiting for a new report; runserver loads the
+WSGI entry point too) and/or in a separate process via
+`manage.py run_validation_workers`.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Min
+from django.utils import timezone
+
+from . import classifier_client
+from .classifier_client import ClassifierError
+from .models import ValidationJob, WasteReport
+
+logger = logging.getLogger(__name__)
+
+# A running job whose lock is older than this is assumed orphaned by a crash.
+# It must outlast the slowest classifier call, or a live job would be run twice
+LOCK_TIMEOUT_MARGIN_SECONDS = 60
+LOCK_TIMEOUT = timedelta(seconds=classifier_client.max_call_seconds() + LOCK_TIMEOUT_MARGIN_SECONDS)
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 600
+
+POLL_INTERVAL_SECONDS = 2.0
+
+# Delay before re-asking for a full validation after a fallback answer
+FALLBACK_RECHECK_SECONDS = 900
+
+
+class PermanentValidationError(Exception):
+    """The validator rejected the job in a way retrying cannot fix."""
+
+
+def enqueue(report, description=''):
+    """Queue validation of a report's photo and wake the in-process workers."""
+    job = ValidationJob.objects.create(
+        report=report,
+        description=description or '',
+        run_after=timezone.now(),
+    )
+    transaction.on_commit(_wake_local_pool)
+    return job
+
+
+async def aenqueue(report, description=''):
+    """enqueue() for async views, which run in autocommit mode."""
+    job = await ValidationJob.objects.acreate(
+        report=report,
+        description=description or '',
+        run_after=timezone.now(),
+    )
+    # Starting the pool touches the database, so not on the event loop
+    await sync_to_async(_wake_local_pool)()
+    return job
+
+
+def enqueue_many(reports_and_descriptions):
+    """Queue validation for many (report, description) pairs with one insert."""
+    now = timezone.now()
+    jobs = ValidationJob.objects.bulk_create([
+        ValidationJob(report=report, description=description or '', run_after=now)
+        for report, description in reports_and_descriptions
+    ])
+    if jobs:
+        transaction.on_commit(_wake_local_pool)
+    return jobs
+
+
+def recover_stale_jobs():
+    """Re-queue jobs whose worker died mid-run. Returns how many were recovered."""
+    return ValidationJob.objects.filter(
+        status='running',
+        locked_at__lt=timezone.now() - LOCK_TIMEOUT,
+    ).update(status='queued', locked_at=None, locked_by=None, run_after=timezone.now())
+
+
+def claim_next(worker_id):
+    """
+    Atomically move the next due job to "running" for this worker.
+    Uses a conditional UPDATE, so it is safe across threads and processes
+    on any database backend.
+    """
+    while True:
+        now = timezone.now()
+        job_id = ValidationJob.objects.filter(
+            status='queued', run_after__lte=now
+        ).order_by('run_after', 'id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+
+        claimed = ValidationJob.objects.filter(id=job_id, status='queued').update(
+            status='running',
+            locked_at=now,
+            locked_by=worker_id,
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+        if claimed:
+            return ValidationJob.objects.select_related('report').get(id=job_id)
+        # Lost the race to another worker; try the next job
+
+
+def _call_validator(job):
+    report = job.report
+    if not report.photo:
+        raise PermanentValidationError("Report has no photo")
+
+    try:
+        return classifier_client.validate_stored(report.photo, job.description)
+    except ClassifierError as e:
+        if e.retryable:
+            raise
+        raise PermanentValidationError(f"Validator rejected job: {e}")
+
+
+def apply_validation(report, validation_data):
+    """Store a /validate result on the report."""
+    if validation_data.get('fallback'):
+        # Provisional: show the fallback's guess but leave the verdict open
+        if validation_data.get('is_valid', False):
+            report.category = validation_data.get('category')
+            report.severity = validation_data.get('severity')
+        report.status = 'pending'
+    elif validation_data.get('is_valid', False):
+        report.category = validation_data.get('category')
+        report.severity = validation_data.get('severity')
+        report.response_time = validation_data.get('response_time')
+        report.status = 'pending'
+    else:
+        report.status = 'invalid'
+    report.save()
+
+
+def run_job(job):
+    """Run one claimed job and record its outcome."""
+    try:
+        validation_data = _call_validator(job)
+        apply_validation(job.report, validation_data)
+        if validation_data.get('fallback'):
+            _recheck_later(job)
+            return
+    except WasteReport.DoesNotExist:
+        _finish(job, 'failed', "Report no longer exists")
+    except PermanentValidationError as e:
+        _finish(job, 'failed', str(e))
+    except Exception as e:
+        if job.attempts >= job.max_attempts:
+            _finish(job, 'failed', str(e))
+        else:
+            delay = min(BACKOFF_BASE_SECONDS * 2 ** (job.attempts - 1), BACKOFF_MAX_SECONDS)
+            delay *= random.uniform(0.8, 1.2)
+            ValidationJob.objects.filter(id=job.id).update(
+                status='queued',
+                locked_at=None,
+                locked_by=None,
+                last_error=str(e),
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+            logger.warning("Validation of report %s failed (attempt %s), retrying in %.0fs: %s",
+                           job.report_id, job.attempts, delay, e)
+    else:
+        _finish(job, 'done')
+
+
+def _recheck_later(job):
+    """Re-queue a job answered by the fallback model for a full validation."""
+    if job.attempts >= job.max_attempts:
+        _finish(job, 'failed', "Only the fallback model answered; report left pending")
+        return
+    ValidationJob.objects.filter(id=job.id).update(
+        status='queued',
+        locked_at=None,
+        locked_by=None,
+        last_error="Provisional answer from the fallback model",
+        run_after=timezone.now() + timedelta(seconds=FALLBACK_RECHECK_SECONDS),
+    )
+    logger.info("Report %s has a provisional fallback answer, re-checking in %ss",
+                job.report_id, FALLBACK_RECHECK_SECONDS)
+
+
+def _finish(job, status, error=None):
+    ValidationJob.objects.filter(id=job.id).update(
+        status=status,
+        locked_at=None,
+        locked_by=None,
+        last_error=error,
+        finished_at=timezone.now(),
+    )
+    if error:
+        logger.warning("Validation of report %s %s: %s", job.report_id, status, error)
+
+
+def metrics():
+    """Queue depth by status plus wait and run latency of the last hour's jobs."""
+    now = timezone.now()
+    depth = {choice: 0 for choice, _ in ValidationJob.STATUS_CHOICES}
+    for row in ValidationJob.objects.values('status').annotate(n=Count('id')):
+        depth[row['status']] = row['n']
+
+    oldest_due = ValidationJob.objects.filter(
+        status='queued', run_after__lte=now
+    ).aggregate(oldest=Min('created_at'))['oldest']
+
+    recent = ValidationJob.objects.filter(status='done', finished_at__gte=now - timedelta(hours=1))
+    latency = recent.aggregate(
+        wait=Avg(ExpressionWrapper(F('started_at') - F('created_at'), output_field=DurationField())),
+        run=Avg(ExpressionWrapper(F('finished_at') - F('started_at'), output_field=DurationField())),
+        total=Avg(ExpressionWrapper(F('finished_at') - F('created_at'), output_field=DurationField())),
+    )
+
+    def seconds(value):
+        return round(value.total_seconds(), 3) if value is not None else None
+
+    return {
+        "depth": depth,
+        "oldest_due_age_seconds": seconds(now - oldest_due) if oldest_due else None,
+        "last_hour": {
+            "completed": recent.count(),
+            "avg_wait_seconds": seconds(latency['wait']),
+            "avg_run_seconds": seconds(latency['run']),
+            "avg_total_seconds": seconds(latency['total']),
+        },
+    }
+
+
+class WorkerPool:
+    """Fixed number of worker threads draining the validation queue."""
+
+    def __init__(self, size, poll_interval=POLL_INTERVAL_SECONDS, name=None):
+        self.size = size
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        close_old_connections()
+        recovered = recover_stale_jobs()
+        if recovered:
+            logger.warning("Re-queued %s orphaned validation jobs", recovered)
+
+        for index in range(self.size):
+            thread = threading.Thread(
+                target=self._run, args=(f"{self.name}#{index}",),
+                name=f"validation-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self, worker_id):
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    job = claim_next(worker_id)
+                    if job is None:
+                        # Also catches jobs orphaned by other processes
+                        recover_stale_jobs()
+                        self._wake.wait(self.poll_interval)
+                        self._wake.clear()
+                        continue
+                    run_job(job)
+                except Exception:
+                    logger.exception("Validation worker %s crashed on a job", worker_id)
+                    self._stop.wait(self.poll_interval)
+        finally:
+            close_old_connections()
+
+
+_local_pool = None
+_local_pool_lock = threading.Lock()
+
+
+def _wake_local_pool():
+    """Start the in-process pool on first use (if enabled) and wake it."""
+    global _local_pool
+    size = getattr(settings, 'VALIDATION_WORKERS_IN_PROCESS', 2)
+    if size <= 0:
+        return
+
+    with _local_pool_lock:
+        if _local_pool is None:
+            _local_pool = WorkerPool(size)
+            _local_pool.start()
+    _local_pool.wake()
+
+
+def start_local_pool():
+    """
+    Start the in-process pool when a server boots. Called by the WSGI and
+    ASGI entry points once Django is set up, never by management commands
+    other than runserver, which serves through the WSGI entry point.
+    Recovering stale jobs touches the database, so it runs on a thread.
+    """
+    if getattr(settings, 'VALIDATION_WORKERS_IN_PROCESS', 2) <= 0:
+        return
+    threading.Thread(target=_wake_local_pool, name="validation-pool-start", daemon=True).start()
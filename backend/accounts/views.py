@@ -122,6 +122,17 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import ModelOutput
 from .serializers import ModelOutputSerializer
+from . import classifier_client
+
+# Department that handles each classifier category
+CATEGORY_DEPARTMENTS = {
+    "garbage": "Solid Waste Management",
+    "road": "Road Maintenance",
+    "fire": "Fire Services",
+    "water": "Water Supply and Drainage",
+    "construction": "Building and Construction",
+    "air": "Pollution Control",
+}
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -132,11 +143,16 @@ def process_image(request):
     if not image:
         return Response({"error": "Image is required"}, status=400)
 
-    # 2️⃣ Your ML model logic here — mock output:
+    # 2️⃣ Classify it with the AI service
+    try:
+        result = classifier_client.classify(image)
+    except classifier_client.ClassifierError as e:
+        return Response({"error": str(e)}, status=503 if e.retryable else 502)
+
     output = {
-        "resolution_time": "2 days",
-        "department_allocated": "Road Maintenance",
-        "severity": "High"
+        "resolution_time": result.get("response_time", ""),
+        "department_allocated": CATEGORY_DEPARTMENTS.get(result.get("category"), "General Administration"),
+        "severity": result.get("severity", ""),
     }
 
     # 3️⃣ Save output in database
@@ -171,125 +187,86 @@ class WasteReportViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
+import logging
+
+from .incidents import assign_incident
+from . import alert_stream, image_pipeline, upload_handlers, validation_queue
+from .idempotency import idempotent
+from .report_fields import clean_report_fields
+
+logger = logging.getLogger(__name__)
+
+
+def submit_waste_report(user, data, photo=None, voice_note=None):
+    """
+    Create a waste report from request fields and uploaded files, then queue
+    its AI validation. Shared by create_waste_report and resumable uploads.
+    Raises report_fields.ReportFieldError for invalid fields.
+    """
+    fields = clean_report_fields(data)
+
+    # Create the waste report immediately
+    waste_report = WasteReport.objects.create(user=user, status='pending', **fields)
+
+    # Handle photo upload
+    photo_path = None
+    if photo is not None:
+        logger.debug("Report %s photo received: %s", waste_report.id, photo.name)
+        photo, original_photo = image_pipeline.prepare_photo(photo)
+        waste_report.photo = photo
+        if original_photo is not None:
+            waste_report.original_photo = original_photo
+        waste_report.save(update_fields=['photo', 'original_photo', 'updated_at'])
+        photo_path = waste_report.photo.path
+        logger.debug("Report %s photo saved to %s", waste_report.id, photo_path)
+    else:
+        logger.debug("Report %s has no photo", waste_report.id)
+
+    # Handle voice note upload
+    if voice_note is not None:
+        waste_report.voice_note = voice_note
+        waste_report.save(update_fields=['voice_note', 'updated_at'])
+
+    # Update user profile
+    profile = user.userprofile
+    profile.issues_reported += 1
+    profile.save()
+
+    # Group with earlier reports of the same problem
+    assign_incident(waste_report)
+
+    # Live alert, now that the photo URL is known
+    alert_stream.publish_report(waste_report)
+
+    # QUEUE BACKGROUND VALIDATION IF PHOTO EXISTS
+    if photo_path:
+        validation_queue.enqueue(waste_report, data.get('description', ''))
+        logger.info("Background validation queued for report %s", waste_report.id)
+
+    return waste_report
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent('create_waste_report')
 def create_waste_report(request):
     """Create a new waste report with async AI validation"""
+    # Stream photo and voice note straight to disk (see accounts.upload_handlers)
+    uploads = upload_handlers.install(
+        request, max_request_bytes=2 * upload_handlers.REPORT_UPLOAD_MAX_BYTES + 1024 * 1024
+    )
     try:
-        import requests
-        import threading
-        import json
-
-        # Parse location data
-        location_data = request.data.get('location', {})
-        if isinstance(location_data, str):
-            try:
-                location_data = json.loads(location_data)
-            except:
-                location_data = {}
-
-        latitude = location_data.get('lat') if isinstance(location_data, dict) else None
-        longitude = location_data.get('lon') if isinstance(location_data, dict) else None
-        location_address = location_data.get('address') if isinstance(location_data, dict) else location_data
-
-        # Create the waste report immediately
-        waste_report = WasteReport.objects.create(
-            user=request.user,
-            description=request.data.get('description'),
-            issue_type=request.data.get('issue_type', 'General Waste Issue'),
-            location=location_address,
-            latitude=latitude,
-            longitude=longitude,
-            status='pending'
+        data = request.data
+        if uploads.error:
+            return Response({"error": uploads.error}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        waste_report = submit_waste_report(
+            request.user,
+            data,
+            photo=request.FILES.get('photo'),
+            voice_note=request.FILES.get('voice_note'),
         )
 
-        # Handle photo upload
-        photo_path = None
-        if 'photo' in request.FILES:
-            print(f"Photo received: {request.FILES['photo'].name}")
-            waste_report.photo = request.FILES['photo']
-            waste_report.save()
-            photo_path = waste_report.photo.path
-            print(f"Photo saved to: {photo_path}")
-        else:
-            print("No photo in request.FILES")
-
-        # Handle voice note upload
-        if 'voice_note' in request.FILES:
-            waste_report.voice_note = request.FILES['voice_note']
-            waste_report.save()
-
-        # Update user profile
-        profile = request.user.userprofile
-        profile.issues_reported += 1
-        profile.save()
-
-        # START BACKGROUND VALIDATION IF PHOTO EXISTS
-        if photo_path:
-            description = request.data.get('description', '')
-            report_id = waste_report.id
-
-            def validate_in_background(report_id, photo_path, description):
-                """Run validation in background thread"""
-                try:
-                    print(f"[BG] Starting validation for report {report_id}")
-                    validator_url = "http://localhost:8001/validate"
-
-                    # FIX: Keep file open during the request
-                    with open(photo_path, 'rb') as img_file:
-                        files = {'image': img_file}
-                        data = {'description': description}
-                        validator_response = requests.post(
-                            validator_url,
-                            files=files,
-                            data=data,
-                            timeout=120
-                        )
-
-                    print(f"[BG] Validator response: {validator_response.status_code}")
-
-                    if validator_response.status_code == 200:
-                        validation_data = validator_response.json()
-                        print(f"[BG] Validation data: {validation_data}")
-
-                        from .models import WasteReport
-                        try:
-                            report = WasteReport.objects.get(id=report_id)
-
-                            if validation_data.get('is_valid', False):
-                                report.category = validation_data.get('category')
-                                report.severity = validation_data.get('severity')
-                                report.response_time = validation_data.get('response_time')
-                                report.status = 'pending'
-                                print(f"[BG] Valid report: category={report.category}")
-                            else:
-                                report.status = 'invalid'
-                                print(f"[BG] Invalid: {validation_data.get('reason')}")
-
-                            report.save()
-                        except WasteReport.DoesNotExist:
-                            print(f"[BG] Report {report_id} not found")
-
-                    else:
-                        print(f"[BG] Validator error: {validator_response.status_code}")
-                        try:
-                            print(f"[BG] Error details: {validator_response.json()}")
-                        except:
-                            print(f"[BG] Error text: {validator_response.text}")
-
-                except Exception as e:
-                    print(f"[BG] Validation error: {str(e)}")
-
-            # Start background thread
-            thread = threading.Thread(
-                target=validate_in_background,
-                args=(report_id, photo_path, description)
-            )
-            thread.daemon = True
-            thread.start() 
-
-            print(f"[MAIN] Background validation started for report {report_id}")
-
         serializer = WasteReportSerializer(waste_report)
         return Response({
             "message": "Report submitted! Validation in progress...",
@@ -299,6 +276,147 @@ def create_waste_report(request):
     except Exception as e:
         return Response({"error": str(e)}, status=400)
 
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from .models import UploadSession
+from . import resumable_uploads
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload_session(request):
+    """
+    Start a resumable upload of a report photo or voice note.
+    Body: field ("photo" or "voice_note"), filename, size, optional sha256.
+    """
+    try:
+        session = resumable_uploads.open_session(
+            request.user,
+            request.data.get('field'),
+            request.data.get('filename'),
+            request.data.get('size'),
+            request.data.get('sha256'),
+        )
+    except resumable_uploads.UploadError as e:
+        return Response({"error": str(e)}, status=e.status)
+    return Response(resumable_uploads.describe(session), status=status.HTTP_201_CREATED)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_session(request, upload_id):
+    """
+    GET: received and missing byte ranges of an upload.
+    PUT: store one chunk; the raw body holds the bytes named by Content-Range.
+    DELETE: abandon the upload.
+    """
+    session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+
+    if request.method == 'DELETE':
+        resumable_uploads.discard(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if request.method == 'PUT':
+        try:
+            start, end = resumable_uploads.parse_content_range(
+                request.META.get('HTTP_CONTENT_RANGE'), session.total_size
+            )
+            content_length = request.META.get('CONTENT_LENGTH')
+            if content_length and int(content_length) != end - start:
+                raise resumable_uploads.UploadError("Content-Length does not match Content-Range")
+            session = resumable_uploads.write_chunk(session, start, end, request.stream)
+        except resumable_uploads.UploadError as e:
+            return Response({"error": str(e)}, status=e.status)
+
+    return Response(resumable_uploads.describe(session), status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent('finalize_upload')
+def finalize_upload(request):
+    """
+    Create a waste report from completed uploads. Takes the create_waste_report
+    fields plus photo_upload and/or voice_note_upload session ids.
+    """
+    try:
+        with transaction.atomic():
+            sessions = {}
+            for field in ('photo', 'voice_note'):
+                upload_id = request.data.get(f'{field}_upload')
+                if upload_id:
+                    session = UploadSession.objects.select_for_update().filter(
+                        id=upload_id, user=request.user, field=field
+                    ).first()
+                    if session is None:
+                        return Response({"error": f"Unknown {field} upload {upload_id}"}, status=404)
+                    sessions[field] = session
+
+            files = {field: resumable_uploads.assemble(session) for field, session in sessions.items()}
+            try:
+                waste_report = submit_waste_report(
+                    request.user, request.data,
+                    photo=files.get('photo'),
+                    voice_note=files.get('voice_note'),
+                )
+            finally:
+                for uploaded in files.values():
+                    uploaded.close()
+
+            for session in sessions.values():
+                resumable_uploads.discard(session)
+    except resumable_uploads.UploadError as e:
+        return Response({"error": str(e)}, status=e.status)
+    except Exception as e:
+        return Response({"error": str(e)}, status=400)
+
+    serializer = WasteReportSerializer(waste_report)
+    return Response({
+        "message": "Report submitted! Validation in progress...",
+        "report": serializer.data
+    }, status=status.HTTP_201_CREATED)
+
+from . import bulk_reports
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent('bulk_create_waste_reports')
+def bulk_create_waste_reports(request):
+    """
+    Create many waste reports in one request (see accounts.bulk_reports for
+    the multipart and NDJSON formats). Returns a result per item.
+    """
+    try:
+        if request.content_type.startswith('application/x-ndjson'):
+            entries = bulk_reports.items_from_ndjson(request.stream)
+        else:
+            uploads = upload_handlers.install(request, max_request_bytes=bulk_reports.BULK_REPORT_MAX_BYTES)
+            data = request.data
+            if uploads.error:
+                return Response({"error": uploads.error}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            entries = bulk_reports.items_from_form(data, request.FILES)
+        results, reports = bulk_reports.submit(request.user, entries)
+    except Exception as e:
+        return Response({"error": str(e)}, status=400)
+
+    serialized = iter(WasteReportSerializer(reports, many=True).data)
+    for result in results:
+        if result["status"] == "created":
+            result["report"] = next(serialized)
+
+    created = len(reports)
+    failed = len(results) - created
+    if created and failed:
+        response_status = status.HTTP_207_MULTI_STATUS
+    elif created:
+        response_status = status.HTTP_201_CREATED
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+
+    return Response({
+        "message": f"{created} reports submitted, {failed} rejected. Validation in progress...",
+        "created": created,
+        "failed": failed,
+        "results": results,
+    }, status=response_status)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_reports(request):
@@ -339,6 +457,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import CivicIssue, WasteReport
 from .serializers import CivicIssueSerializer, WasteReportSerializer
+from .geocoding import geocode
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -388,6 +507,7 @@ def get_all_reports(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny]) 
+@idempotent('receive_issue')
 def receive_issue(request):
     """
     Receives structured output from Vapi (via Node.js) 
@@ -406,13 +526,18 @@ def receive_issue(request):
                 "missing": missing
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        # Resolve the spoken address against the local gazetteer
+        latitude, longitude = geocode(data["address"])
+
         # Save to SQLite
         issue = CivicIssue.objects.create(
             issue=data["issue"],
             description=data["description"],
             name=data["name"],
             phone=data["phone"],
-            address=data["address"]
+            address=data["address"],
+            latitude=latitude,
+            longitude=longitude
         )
 
         return Response({
@@ -431,7 +556,73 @@ from .models import WasteReport
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .utils import calculate_distance
+from rest_framework.permissions import IsAdminUser
+from .utils import bounding_box, grid_cells_within, haversine_many
+from . import alert_cache, geo_index
+
+def find_recent_alerts(lat, lon, radius_km, exclude_user_id=None):
+    """
+    Alert payloads (geo_index.alert_payload fields plus "distance_km") for
+    non-invalid reports within radius_km of the point created in the last
+    24 hours, newest first. Served from the Redis GEO index when it is
+    populated, otherwise from the database.
+    """
+    # 1. Answer from the live Redis GEO index when it is populated
+    indexed = geo_index.search_nearby(lat, lon, radius_km, exclude_user_id=exclude_user_id)
+    if indexed is not None:
+        return indexed
+
+    # 2. Otherwise get recent reports (last 24 hours) from the database
+    time_threshold = timezone.now() - timedelta(hours=24)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+
+    # Filter: 
+    # - Created recently
+    # - Inside the radius' bounding box (implies valid coordinates)
+    # - NOT invalid status
+    recent_reports = WasteReport.objects.filter(
+        created_at__gte=time_threshold,
+        latitude__range=(min_lat, max_lat),
+        longitude__isnull=False
+    ).exclude(status='invalid')
+
+    # - NOT created by the requesting user (exclude self)
+    if exclude_user_id is not None:
+        recent_reports = recent_reports.exclude(user_id=exclude_user_id)
+
+    # A box crossing the antimeridian cannot be expressed as one range
+    if min_lon >= -180 and max_lon <= 180:
+        recent_reports = recent_reports.filter(longitude__range=(min_lon, max_lon))
+
+    # Only touch the grid cells overlapping the search circle.
+    # Very large radii fall back to the plain bounding-box scan.
+    cells = grid_cells_within(lat, lon, radius_km)
+    if cells is not None:
+        recent_reports = recent_reports.filter(grid_cell__in=cells)
+
+    # Fetch only the columns the alert payload needs
+    candidates = list(recent_reports.values(
+        'id', 'user_id', 'issue_type', 'description', 'severity',
+        'latitude', 'longitude', 'created_at', 'photo'
+    ))
+    photo_storage = WasteReport._meta.get_field('photo').storage
+
+    # 3. Calculate exact distances for the boxed candidates in one vectorized pass
+    distances = haversine_many(
+        lat, lon,
+        [report['latitude'] for report in candidates],
+        [report['longitude'] for report in candidates]
+    )
+
+    alerts = []
+    for report, distance in zip(candidates, distances):
+        if distance <= radius_km:
+            photo = report.pop('photo')
+            report['image_url'] = photo_storage.url(photo) if photo else None
+            report['distance_km'] = round(float(distance), 2)
+            alerts.append(report)
+    return alerts
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -453,45 +644,23 @@ def check_nearby_alerts(request):
         user_lat = float(user_lat)
         user_lon = float(user_lon)
 
-        # 2. Get recent reports (last 24 hours)
-        time_threshold = timezone.now() - timedelta(hours=24)
-        
-        # Filter: 
-        # - Created recently
-        # - Has valid coordinates
-        # - NOT invalid status
-        # - NOT created by the current user (exclude self) <--- NEW CHANGE
-        recent_reports = WasteReport.objects.filter(
-            created_at__gte=time_threshold,
-            latitude__isnull=False,
-            longitude__isnull=False
-        ).exclude(status='invalid').exclude(user=request.user) 
-
-        nearby_alerts = []
-
-        # 3. Calculate distance
-        for report in recent_reports:
-            try:
-                distance = calculate_distance(
-                    user_lat, user_lon, 
-                    report.latitude, report.longitude
-                )
+        # 2. Shared per-tile result (cached), narrowed down to this user and point
+        alerts = alert_cache.nearby_alerts(
+            user_lat, user_lon, radius_km, request.user.id, loader=find_recent_alerts
+        )
 
-                if distance <= radius_km:
-                    nearby_alerts.append({
-                        "id": report.id,
-                        "type": "Waste Report",
-                        "issue_type": report.issue_type,
-                        "description": report.description,
-                        "severity": report.severity,
-                        "distance_km": round(distance, 2),
-                        "latitude": report.latitude,
-                        "longitude": report.longitude,
-                        "created_at": report.created_at,
-                        "image_url": report.photo.url if report.photo else None
-                    })
-            except Exception:
-                continue 
+        nearby_alerts = [{
+            "id": alert["id"],
+            "type": "Waste Report",
+            "issue_type": alert["issue_type"],
+            "description": alert["description"],
+            "severity": alert["severity"],
+            "distance_km": alert["distance_km"],
+            "latitude": alert["latitude"],
+            "longitude": alert["longitude"],
+            "created_at": alert["created_at"],
+            "image_url": alert["image_url"]
+        } for alert in alerts]
 
         return Response({
             "count": len(nearby_alerts),
@@ -501,4 +670,489 @@ def check_nearby_alerts(request):
     except ValueError:
         return Response({"error": "Invalid coordinates format"}, status=400)
     except Exception as e:
-        return Response({"error": str(e)}, status=500)
\ No newline at end of file
+        return Response({"error": str(e)}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def nearby_alerts_cache_stats(request):
+    """Hit/miss counters of the nearby alerts tile cache"""
+    return Response(alert_cache.stats(), status=status.HTTP_200_OK)
+
+
+# Live nearby alerts (push over ASGI instead of polling)
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from . import alert_stream
+
+
+async def _authenticate_async(request, allow_query_token=False):
+    """
+    Resolve the JWT user for a plain async view. Browsers' EventSource cannot
+    send headers, so streams pass allow_query_token to also accept the access
+    token as ?token=; other views take the header only, keeping tokens out
+    of URLs and access logs.
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    if header:
+        raw_token = authenticator.get_raw_token(header)
+    else:
+        raw_token = request.GET.get('token') if allow_query_token else None
+    if not raw_token:
+        return None
+
+    try:
+        validated_token = authenticator.get_validated_token(raw_token)
+        return await sync_to_async(authenticator.get_user)(validated_token)
+    except AuthenticationFailed:
+        return None
+
+
+@require_GET
+async def stream_nearby_alerts(request):
+    """
+    Server-Sent Events stream of new and validated reports within 'radius'
+    km of lat/lon, excluding the user's own. Subscribe once instead of
+    polling check_nearby_alerts; each event carries one alert in the same
+    shape. Serve through core.asgi - under WSGI every stream pins a worker.
+    """
+    user = await _authenticate_async(request, allow_query_token=True)
+    if user is None:
+        return JsonResponse({"error": "Authentication credentials were not provided or are invalid"}, status=401)
+
+    try:
+        user_lat = request.GET.get('lat')
+        user_lon = request.GET.get('lon')
+        radius_km = float(request.GET.get('radius', 5.0))
+
+        if not user_lat or not user_lon:
+            return JsonResponse({"error": "Latitude and Longitude required"}, status=400)
+
+        user_lat = float(user_lat)
+        user_lon = float(user_lon)
+    except ValueError:
+        return JsonResponse({"error": "Invalid coordinates format"}, status=400)
+
+    response = StreamingHttpResponse(
+        alert_stream.event_stream(user_lat, user_lon, radius_km, user_id=user.id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Heatmap (pre-aggregated report density)
+from django.db.models import Sum
+from .models import HeatmapCell
+from . import heatmap
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_heatmap(request):
+    """
+    Report counts per grid cell for the map, read from HeatmapCell.
+    Query params:
+    - zoom (web map zoom) or level (0 = finest); defaults to the coarsest level
+    - bbox=min_lon,min_lat,max_lon,max_lat (defaults to the whole world)
+    - category, severity: comma-separated filters
+    - hours: time window, default 168 (one week)
+    The level is coarsened until the box fits in MAX_HEATMAP_CELLS cells.
+    """
+    try:
+        params = request.query_params
+        max_level = len(heatmap.HEATMAP_LEVELS) - 1
+
+        if params.get('level') is not None:
+            level = min(max(int(params['level']), 0), max_level)
+        elif params.get('zoom') is not None:
+            level = heatmap.level_for_zoom(float(params['zoom']))
+        else:
+            level = max_level
+
+        if params.get('bbox'):
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in params['bbox'].split(','))
+        else:
+            min_lon, min_lat, max_lon, max_lat = -180.0, -90.0, 180.0, 90.0
+
+        hours = float(params.get('hours', 168))
+
+        while True:
+            min_row, max_row, min_col, max_col = heatmap.cells_spanned(level, min_lat, max_lat, min_lon, max_lon)
+            spanned = (max_row - min_row + 1) * (max_col - min_col + 1)
+            if spanned <= heatmap.MAX_HEATMAP_CELLS or level == max_level:
+                break
+            level += 1
+
+        buckets = HeatmapCell.objects.filter(
+            level=level,
+            hour__gte=heatmap.hour_bucket(timezone.now() - timedelta(hours=hours)),
+            row__range=(min_row, max_row),
+            col__range=(min_col, max_col),
+        )
+        if params.get('category'):
+            buckets = buckets.filter(category__in=params['category'].split(','))
+        if params.get('severity'):
+            buckets = buckets.filter(severity__in=params['severity'].split(','))
+
+        cell_deg = heatmap.HEATMAP_LEVELS[level]
+        cells = [
+            {
+                "lat": round((bucket['row'] + 0.5) * cell_deg, 6),
+                "lon": round((bucket['col'] + 0.5) * cell_deg, 6),
+                "count": bucket['total'],
+            }
+            for bucket in buckets.values('row', 'col').annotate(total=Sum('count')).filter(total__gt=0)
+        ]
+
+        return Response({
+            "level": level,
+            "cell_size_deg": cell_deg,
+            "hours": hours,
+            "total": sum(cell["count"] for cell in cells),
+            "count": len(cells),
+            "cells": cells,
+        }, status=status.HTTP_200_OK)
+
+    except ValueError:
+        return Response({"error": "Invalid heatmap parameters"}, status=400)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+# Nearest open reports (k-nearest neighbours over the grid index)
+import math
+
+from .utils import grid_ring, grid_ring_covers_band, grid_ring_radius_km, grid_rings_for_radius
+
+OPEN_REPORT_STATUSES = ('pending', 'in-progress')
+
+# Hard cap on ?max_radius=; the ring search costs one query per ~1.1 km
+NEAREST_MAX_RADIUS_KM = 100.0
+
+
+def _parse_cursor(cursor):
+    """
+    Cursor is "<distance_km>:<report id>" of the last item of the previous
+    page. Raises ValueError for anything else.
+    """
+    if not cursor:
+        return None
+    distance, separator, report_id = cursor.partition(':')
+    distance = float(distance) if separator else math.nan
+    if not math.isfinite(distance) or distance < 0:
+        raise ValueError(f"invalid cursor {cursor!r}")
+    return distance, int(report_id)
+
+
+def _nearest_open_reports(lat, lon, k, after=None, max_radius_km=50.0):
+    """
+    Search the grid ring by ring outwards from (lat, lon) until k open
+    reports beyond `after` are known to be the closest ones, or the search
+    radius reaches max_radius_km. Returns [(distance, row), ...] sorted by
+    (distance, id); the work done depends on k, not on the table size.
+
+    The number of rings is bounded by max_radius_km's latitude reach, so the
+    loop ends even near the poles, where narrow cells add almost no radius.
+    """
+    photo_storage = WasteReport._meta.get_field('photo').storage
+    found = []
+    last_ring = grid_rings_for_radius(max_radius_km)
+
+    for ring in range(last_ring + 1):
+        rows = list(WasteReport.objects.filter(
+            grid_cell__in=grid_ring(lat, lon, ring),
+            status__in=OPEN_REPORT_STATUSES,
+        ).values(
+            'id', 'issue_type', 'description', 'status', 'category', 'severity',
+            'latitude', 'longitude', 'created_at', 'photo'
+        ))
+
+        distances = haversine_many(lat, lon, [r['latitude'] for r in rows], [r['longitude'] for r in rows])
+        for row, distance in zip(rows, distances):
+            key = (round(float(distance), 6), row['id'])
+            if after is None or key > after:
+                row['image_url'] = photo_storage.url(row['photo']) if row['photo'] else None
+                found.append((key, row))
+
+        searched_km = grid_ring_radius_km(lat, ring)
+        confirmed = sum(1 for (distance, _), _ in found if distance <= searched_km)
+        if confirmed >= k or searched_km >= max_radius_km or grid_ring_covers_band(ring):
+            break
+
+    found.sort(key=lambda item: item[0])
+    # Anything further than the fully searched radius may have a closer unseen rival
+    limit_km = min(searched_km, max_radius_km)
+    return [(key, row) for key, row in found if key[0] <= limit_km][:k]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def nearest_open_reports(request):
+    """
+    The k open (pending / in-progress) reports closest to lat/lon, sorted
+    by distance. Pass the returned next_cursor as ?cursor= for the next page.
+    Query params: lat, lon, k (default 20, max 100), max_radius (km, default
+    50, at most NEAREST_MAX_RADIUS_KM).
+    """
+    try:
+        user_lat = request.query_params.get('lat')
+        user_lon = request.query_params.get('lon')
+        if not user_lat or not user_lon:
+            return Response({"error": "Latitude and Longitude required"}, status=400)
+
+        user_lat = float(user_lat)
+        user_lon = float(user_lon)
+        if not (-90 <= user_lat <= 90 and -180 <= user_lon <= 180):
+            return Response({"error": "Latitude must be within ±90 and longitude within ±180"}, status=400)
+
+        k = min(max(int(request.query_params.get('k', 20)), 1), 100)
+        max_radius_km = float(request.query_params.get('max_radius', 50.0))
+        if not max_radius_km > 0:
+            return Response({"error": "max_radius must be positive"}, status=400)
+        max_radius_km = min(max_radius_km, NEAREST_MAX_RADIUS_KM)
+        try:
+            after = _parse_cursor(request.query_params.get('cursor'))
+        except ValueError:
+            return Response({"error": "Invalid cursor; pass next_cursor from the previous page"}, status=400)
+
+        results = _nearest_open_reports(user_lat, user_lon, k, after=after, max_radius_km=max_radius_km)
+
+        reports = [{
+            "id": row['id'],
+            "type": "Waste Report",
+            "issue_type": row['issue_type'],
+            "description": row['description'],
+            "status": row['status'],
+            "category": row['category'],
+            "severity": row['severity'],
+            "distance_km": round(distance, 2),
+            "latitude": row['latitude'],
+            "longitude": row['longitude'],
+            "created_at": row['created_at'],
+            "image_url": row['image_url']
+        } for (distance, _), row in results]
+
+        next_cursor = None
+        if len(results) == k:
+            (distance, report_id), _ = results[-1]
+            next_cursor = f"{distance}:{report_id}"
+
+        return Response({
+            "count": len(reports),
+            "reports": reports,
+            "next_cursor": next_cursor,
+        }, status=status.HTTP_200_OK)
+
+    except ValueError:
+        return Response({"error": "Invalid coordinates, k or cursor"}, status=400)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+# Incidents (clusters of duplicate reports)
+from datetime import datetime, timezone as dt_timezone
+from django.db.models import Q
+from .models import Incident
+from .serializers import IncidentSerializer
+
+INCIDENTS_DEFAULT_LIMIT = 50
+INCIDENTS_MAX_LIMIT = 200
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _incident_cursor(incident):
+    """Cursor of an incident, "<last_reported_at in epoch microseconds>:<id>": exact and URL-safe."""
+    return f"{(incident.last_reported_at - _EPOCH) // timedelta(microseconds=1)}:{incident.id}"
+
+
+def _parse_incident_cursor(cursor):
+    """Inverse of _incident_cursor; raises ValueError for anything else."""
+    if not cursor:
+        return None
+    microseconds, separator, incident_id = cursor.partition(':')
+    if not separator:
+        raise ValueError(f"invalid cursor {cursor!r}")
+    return _EPOCH + timedelta(microseconds=int(microseconds)), int(incident_id)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_incidents(request):
+    """
+    List incidents, most recently reported first, instead of every
+    duplicate report. Query params:
+    - category, hours (reported within): filters
+    - bbox=min_lon,min_lat,max_lon,max_lat: only incidents inside the box
+    - limit (default 50, max 200); pass the returned next_cursor as
+      ?cursor= for the next page
+    """
+    try:
+        params = request.query_params
+        incidents = Incident.objects.order_by('-last_reported_at', '-id')
+        if params.get('category'):
+            incidents = incidents.filter(category=params['category'])
+        if params.get('hours'):
+            since = timezone.now() - timedelta(hours=float(params['hours']))
+            incidents = incidents.filter(last_reported_at__gte=since)
+        if params.get('bbox'):
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in params['bbox'].split(','))
+            incidents = incidents.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon))
+
+        try:
+            after = _parse_incident_cursor(params.get('cursor'))
+        except (ValueError, OverflowError):
+            return Response({"error": "Invalid cursor; pass next_cursor from the previous page"}, status=400)
+        if after is not None:
+            reported_at, incident_id = after
+            incidents = incidents.filter(
+                Q(last_reported_at__lt=reported_at) | Q(last_reported_at=reported_at, id__lt=incident_id)
+            )
+
+        limit = min(max(int(params.get('limit', INCIDENTS_DEFAULT_LIMIT)), 1), INCIDENTS_MAX_LIMIT)
+        page = list(incidents[:limit])
+
+        next_cursor = None
+        if len(page) == limit:
+            next_cursor = _incident_cursor(page[-1])
+
+        serializer = IncidentSerializer(page, many=True)
+        return Response({
+            "count": len(serializer.data),
+            "incidents": serializer.data,
+            "next_cursor": next_cursor,
+        }, status=status.HTTP_200_OK)
+    except ValueError:
+        return Response({"error": "Invalid hours, bbox, limit or cursor"}, status=400)
+    except Exception as e:
+        return Response({"error": str(e)}, status=400)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_incident(request, incident_id):
+    """Get one incident together with its member reports"""
+    try:
+        incident = Incident.objects.get(id=incident_id)
+    except Incident.DoesNotExist:
+        return Response({"error": "Incident not found"}, status=404)
+
+    reports = incident.reports.select_related('user').order_by('-created_at')
+    return Response({
+        "incident": IncidentSerializer(incident).data,
+        "reports": WasteReportSerializer(reports, many=True).data
+    }, status=status.HTTP_200_OK)
+
+
+# Background validation queue
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def validation_queue_stats(request):
+    """Depth and latency metrics of the background validation queue"""
+    return Response(validation_queue.metrics(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def classifier_client_stats(request):
+    """Call latency and pooled connections of the classifier client in this process"""
+    return Response(classifier_client.metrics(), status=status.HTTP_200_OK)
+
+
+# Async report creation (ASGI)
+import json
+from django.db.models import F
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .models import UserProfile
+
+
+def _store_report_files(waste_report, files):
+    """Write uploaded files to storage without saving the report row."""
+    for field, content in files.items():
+        getattr(waste_report, field).save(content.name, content, save=False)
+
+
+async def asubmit_waste_report(user, data, photo=None, voice_note=None):
+    """
+    submit_waste_report for async views. Database work uses the async ORM;
+    image optimization and file writes run in worker threads so they block
+    neither the event loop nor the thread shared by sync views.
+    """
+    fields = clean_report_fields(data)
+
+    waste_report = await WasteReport.objects.acreate(user=user, status='pending', **fields)
+
+    files = {}
+    if photo is not None:
+        files['photo'], original_photo = await sync_to_async(image_pipeline.prepare_photo, thread_sensitive=False)(photo)
+        if original_photo is not None:
+            files['original_photo'] = original_photo
+    if voice_note is not None:
+        files['voice_note'] = voice_note
+
+    if files:
+        await sync_to_async(_store_report_files, thread_sensitive=False)(waste_report, files)
+        await waste_report.asave(update_fields=list(files) + ['updated_at'])
+
+    await UserProfile.objects.filter(user=user).aupdate(issues_reported=F('issues_reported') + 1)
+
+    # Group with earlier reports of the same problem
+    await sync_to_async(assign_incident)(waste_report)
+
+    # Live alert, now that the photo URL is known
+    await sync_to_async(alert_stream.publish_report)(waste_report)
+
+    if waste_report.photo:
+        await validation_queue.aenqueue(waste_report, data.get('description', ''))
+
+    return waste_report
+
+
+@csrf_exempt
+@require_POST
+async def create_waste_report_async(request):
+    """
+    Async twin of create_waste_report, with the same request and response.
+    Serve through core.asgi: the sync view holds the single thread Django
+    runs sync views on under ASGI for its whole duration, this one only for
+    its short database calls.
+    """
+    user = await _authenticate_async(request)
+    if user is None:
+        return JsonResponse({"error": "Authentication credentials were not provided or are invalid"}, status=401)
+
+    uploads = upload_handlers.StreamingReportUploadHandler(
+        request, max_request_bytes=2 * upload_handlers.REPORT_UPLOAD_MAX_BYTES + 1024 * 1024
+    )
+    request.upload_handlers = [uploads]
+
+    try:
+        if request.content_type == 'application/json':
+            data, files = json.loads(request.body), {}
+        else:
+            # Parsing reads the spooled body and writes the files: blocking I/O
+            data, files = await sync_to_async(lambda: (request.POST, request.FILES), thread_sensitive=False)()
+        if uploads.error:
+            return JsonResponse({"error": uploads.error}, status=413)
+
+        waste_report = await asubmit_waste_report(
+            user,
+            data,
+            photo=files.get('photo'),
+            voice_note=files.get('voice_note'),
+        )
+
+        serializer = WasteReportSerializer(waste_report)
+        return JsonResponse({
+            "message": "Report submitted! Validation in progress...",
+            "report": serializer.data
+        }, status=201)
+
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=400)
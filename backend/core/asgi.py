@@ -3,6 +3,10 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Long-lived endpoints such as the live alert stream
+(``/api/notifications/stream/``) should be served through this entry point,
+e.g. ``uvicorn core.asgi:application``, so idle subscribers do not pin workers.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +18,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Serving processes run the in-process validation workers
+# (settings.VALIDATION_WORKERS_IN_PROCESS); management commands do not
+from accounts.validation_queue import start_local_pool
+
+start_local_pool()
@@ -80,6 +80,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Writers come from request threads, async views and validation
+        # workers at once: take the write lock up front and wait for it
+        # instead of failing with "database is locked" on lock upgrade
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -139,6 +146,60 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR
 
+# Uploaded media is stored once per distinct content (see accounts.storage)
+STORAGES = {
+    "default": {
+        "BACKEND": "accounts.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Offline gazetteer used to geocode CivicIssue addresses (CSV: name,latitude,longitude)
+GAZETTEER_PATH = BASE_DIR / 'data' / 'gazetteer.csv'
+
+# FastAPI classifier service (see accounts.classifier_client)
+CLASSIFIER_URL = 'http://localhost:8001'
+CLASSIFIER_CONNECT_TIMEOUT_SECONDS = 3
+CLASSIFIER_READ_TIMEOUT_SECONDS = 120
+# Extra attempts after connection failures and 502/503/504 answers
+CLASSIFIER_RETRIES = 2
+# Keep-alive connections per process; at least the number of validation workers
+CLASSIFIER_POOL_SIZE = 10
+# The classifier mounts MEDIA_ROOT as its SHARED_MEDIA_ROOT: send stored photos
+# by path instead of uploading them. It only reads images under waste_reports/
+# (its SHARED_MEDIA_DIRS)
+CLASSIFIER_SHARED_STORAGE = False
+
+# AI validation of report photos (see accounts.validation_queue)
+# Worker threads started inside each web process; set to 0 when running
+# `manage.py run_validation_workers` separately
+VALIDATION_WORKERS_IN_PROCESS = 2
+
+# Report photos are re-encoded on upload (see accounts.image_pipeline)
+REPORT_PHOTO_MAX_DIMENSION = 1600
+REPORT_PHOTO_FORMAT = 'WEBP'
+REPORT_PHOTO_QUALITY = 80
+# Also store the photo exactly as uploaded
+REPORT_PHOTO_KEEP_ORIGINAL = False
+# Encode in this many worker processes instead of the request thread (0 = inline)
+REPORT_PHOTO_PROCESS_WORKERS = 0
+
+# Resumable chunked uploads (see accounts.resumable_uploads); keep the
+# directory on the same filesystem as MEDIA_ROOT so finished files are moved
+UPLOAD_SESSION_DIR = BASE_DIR / 'upload_sessions'
+UPLOAD_SESSION_TTL_HOURS = 24
+RESUMABLE_UPLOAD_MAX_BYTES = 50 * 1024 * 1024
+
+# Report endpoints stream uploads to disk (see accounts.upload_handlers);
+# keep the directory on the same filesystem as MEDIA_ROOT
+STREAMING_UPLOAD_DIR = BASE_DIR / 'upload_tmp'
+REPORT_UPLOAD_MAX_BYTES = 25 * 1024 * 1024
+
+# Responses replayed for repeated Idempotency-Key headers (see accounts.idempotency)
+IDEMPOTENCY_TTL_HOURS = 24
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Serving processes run the in-process validation workers
+# (settings.VALIDATION_WORKERS_IN_PROCESS); management commands do not
+from accounts.validation_queue import start_local_pool
+
+start_local_pool()
@@ -0,0 +1,242 @@
+"""
+Model backends behind /classify and /validate.
+
+A backend turns an image (utils.image_source.ImageSource) into the model's
+raw answer: {"category", "severity"} for classify, {"is_valid",
+"category", "severity", "reason"} for validate. main.py checks categories
+and severities and adds response times, so every backend answers the same
+way.
+
+classify_batch/validate_batch answer many images at once, in order, with
+the exception raised for an item in place of its answer. The Backend base
+class makes one call per image; backends that can pack several images
+into one model call override them, using at most BATCH_MAX_IMAGES_PER_CALL
+images per call.
+
+Each backend also has check(), a cheap call that raises if the model
+cannot be reached; main.py runs it in the background for /health/ready.
+
+Backends are async: they must never block the event loop. Blocking client
+calls go through run_blocking(), a thread pool bounded by
+CLASSIFIER_MODEL_THREADS.
+
+CLASSIFIER_BACKEND picks one:
+
+- gemini:  Google Gemini (default)
+- local:   ONNX Runtime model on CPU, for offline deployments
+- standin: fixed-latency fake for benchmarks and local development
+
+CLASSIFIER_FALLBACK (e.g. "local") names a second backend that answers
+whenever the primary refuses a call for quota (QuotaExceeded) or cannot
+be reached (BackendUnavailable), and for every call while the primary's
+health check fails. Its answers carry "fallback": true; clients should
+treat them as provisional (the Django validation queue re-checks them).
+"local" needs a trained model at LOCAL_MODEL_PATH: if the fallback cannot
+be built, the service logs why and runs on the primary alone.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+CLASSIFIER_BACKEND = os.environ.get("CLASSIFIER_BACKEND", "gemini")
+CLASSIFIER_FALLBACK = os.environ.get("CLASSIFIER_FALLBACK", "")
+CLASSIFIER_MODEL_THREADS = int(os.environ.get("CLASSIFIER_MODEL_THREADS", "16"))
+BATCH_MAX_IMAGES_PER_CALL = int(os.environ.get("BATCH_MAX_IMAGES_PER_CALL", "8"))
+
+CATEGORIES = ["garbage", "road", "fire", "water", "construction", "air"]
+SEVERITIES = ["low", "medium", "high"]
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=CLASSIFIER_MODEL_THREADS, thread_name_prefix="model")
+
+
+class QuotaExceeded(Exception):
+    """The model refused the call for quota reasons, even after retrying."""
+
+    def __init__(self, message, retry_after_seconds):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+class BackendUnavailable(Exception):
+    """The model service could not be reached or is down."""
+
+
+class InvalidModelResponse(Exception):
+    """The model answered with something that is not the JSON we asked for."""
+
+    def __init__(self, message, raw_response):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on the bounded model thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, lambda: fn(*args, **kwargs))
+
+
+async def map_chunks(items, fn, size=None):
+    """
+    Call fn on consecutive chunks of items concurrently and join the answer
+    lists. A chunk whose call raised answers with that exception per item.
+    """
+    size = size or BATCH_MAX_IMAGES_PER_CALL
+    chunks = [items[start:start + size] for start in range(0, len(items), size)]
+    answers = await asyncio.gather(*(fn(chunk) for chunk in chunks), return_exceptions=True)
+    results = []
+    for chunk, chunk_answers in zip(chunks, answers):
+        if isinstance(chunk_answers, BaseException):
+            results.extend([chunk_answers] * len(chunk))
+        else:
+            results.extend(chunk_answers)
+    return results
+
+
+class Backend:
+    name = None
+    # Model and prompt revision behind the answers; bump prompt_version when
+    # a prompt changes so cached answers to the old one are not served
+    model_name = None
+    prompt_version = None
+
+    def __init__(self):
+        # Model calls made and images sent in them, for /model/stats
+        self.calls = 0
+        self.images = 0
+
+    @property
+    def cache_id(self):
+        """Identity of this backend's answers, part of every result cache key."""
+        return f"{self.name}/{self.model_name or '-'}/{self.prompt_version or '-'}"
+
+    async def check(self):
+        pass
+
+    async def classify_batch(self, sources):
+        return await asyncio.gather(*(self.classify(source) for source in sources), return_exceptions=True)
+
+    async def validate_batch(self, sources, descriptions):
+        return await asyncio.gather(
+            *(self.validate(source, description) for source, description in zip(sources, descriptions)),
+            return_exceptions=True,
+        )
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "model_calls": self.calls,
+            "images": self.images,
+            "images_per_call": round(self.images / self.calls, 2) if self.calls else None,
+        }
+
+
+class FallbackBackend(Backend):
+    """Primary backend, with a fallback for quota refusals and outages."""
+
+    # Errors that send a call to the fallback; anything else is the primary's answer
+    FALLBACK_ERRORS = (QuotaExceeded, BackendUnavailable)
+
+    def __init__(self, primary, fallback):
+        super().__init__()
+        self.name = f"{primary.name}+{fallback.name}"
+        self.primary = primary
+        self.fallback = fallback
+        self.primary_ready = True
+        self.fallback_answers = 0
+
+    @property
+    def cache_id(self):
+        # Only the primary's answers are cached
+        return self.primary.cache_id
+
+    async def check(self):
+        try:
+            await self.primary.check()
+            self.primary_ready = True
+        except Exception:
+            # Ready as long as the fallback can answer
+            self.primary_ready = False
+            await self.fallback.check()
+
+    def _mark(self, answer):
+        if isinstance(answer, dict):
+            self.fallback_answers += 1
+            return {**answer, "fallback": True}
+        return answer
+
+    async def classify(self, source):
+        if self.primary_ready:
+            try:
+                return await self.primary.classify(source)
+            except self.FALLBACK_ERRORS as e:
+                logger.warning("Primary backend failed, using %s: %s", self.fallback.name, e)
+        return self._mark(await self.fallback.classify(source))
+
+    async def validate(self, source, description):
+        if self.primary_ready:
+            try:
+                return await self.primary.validate(source, description)
+            except self.FALLBACK_ERRORS as e:
+                logger.warning("Primary backend failed, using %s: %s", self.fallback.name, e)
+        return self._mark(await self.fallback.validate(source, description))
+
+    async def _batch(self, primary_call, fallback_call, count):
+        answers = await primary_call(range(count)) if self.primary_ready else [BackendUnavailable()] * count
+        retry = [index for index, answer in enumerate(answers) if isinstance(answer, self.FALLBACK_ERRORS)]
+        if retry:
+            answers = list(answers)
+            for index, answer in zip(retry, await fallback_call(retry)):
+                answers[index] = self._mark(answer)
+        return answers
+
+    async def classify_batch(self, sources):
+        return await self._batch(
+            lambda indexes: self.primary.classify_batch([sources[i] for i in indexes]),
+            lambda indexes: self.fallback.classify_batch([sources[i] for i in indexes]),
+            len(sources),
+        )
+
+    async def validate_batch(self, sources, descriptions):
+        return await self._batch(
+            lambda indexes: self.primary.validate_batch([sources[i] for i in indexes], [descriptions[i] for i in indexes]),
+            lambda indexes: self.fallback.validate_batch([sources[i] for i in indexes], [descriptions[i] for i in indexes]),
+            len(sources),
+        )
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "primary_ready": self.primary_ready,
+            "fallback_answers": self.fallback_answers,
+            "primary": self.primary.stats(),
+            "fallback": self.fallback.stats(),
+        }
+
+
+def _create(name):
+    if name == "gemini":
+        from .gemini import GeminiBackend
+        return GeminiBackend()
+    if name == "local":
+        from .local_onnx import LocalOnnxBackend
+        return LocalOnnxBackend()
+    if name == "standin":
+        from .standin import StandInBackend
+        return StandInBackend()
+    raise ValueError(f"Unknown classifier backend: {name}")
+
+
+def get_backend(name=CLASSIFIER_BACKEND, fallback=CLASSIFIER_FALLBACK):
+    primary = _create(name)
+    if not fallback or fallback == name:
+        return primary
+    try:
+        secondary = _create(fallback)
+    except Exception as e:
+        # A missing fallback model must not take the primary down with it
+        logger.warning("Fallback backend %s unavailable, running without it: %s", fallback, e)
+        return primary
+    return FallbackBackend(primary, secondary)
@@ -0,0 +1,231 @@
+"""
+Google Gemini backend.
+
+Generation uses the client's async methods; file uploads and status polls
+have no async variant and run on the bounded model thread pool. Waits
+(file processing, quota back-off) use asyncio.sleep, so a slow request
+never holds up the others.
+
+Batches send up to BATCH_MAX_IMAGES_PER_CALL images in one generate call
+and ask for a JSON array with one answer per image, in order.
+"""
+import asyncio
+import base64
+import json
+import re
+
+import google.generativeai as genai
+
+from . import Backend, BackendUnavailable, InvalidModelResponse, QuotaExceeded, map_chunks, run_blocking
+
+# Use Gemini 2.0 Flash - latest model with vision support
+MODEL_NAME = "gemini-2.5-flash"
+
+# Bump when any prompt below changes, so cached answers to the old one are dropped
+PROMPT_VERSION = "1"
+
+API_KEY_FILE = "apikey.txt"
+
+MAX_RETRIES = 3
+RETRY_DELAY_SECONDS = 2
+FILE_POLL_SECONDS = 1
+
+CLASSIFY_PROMPT = """Analyze this image and classify the civic issue shown.
+
+You must return ONLY a valid JSON object with no additional text, markdown, or explanation.
+
+Categories (choose one):
+- garbage: litter, trash piles, waste dumping
+- road: potholes, damaged roads, broken pavement
+- fire: fires, smoke, burning
+- water: leaks, flooding, water damage, broken pipes
+- construction: illegal construction, building issues, debris
+- air: pollution, dust, smoke (non-fire)
+
+Severity levels:
+- high: immediate danger, urgent action needed
+- medium: significant issue, needs attention soon
+- low: minor issue, routine maintenance
+
+Return format:
+{"category": "one_of_the_categories", "severity": "high_medium_or_low"}
+
+Example: {"category": "road", "severity": "high"}"""
+
+VALIDATE_PROMPT = """
+Analyze this image and the following description to validate if it represents a genuine civic/environmental issue.
+
+DESCRIPTION: "{description}"
+
+Return ONLY JSON:
+{{
+ "is_valid": true/false,
+ "category": "garbage/road/fire/water/construction/air",
+ "severity": "low/medium/high",
+ "reason": "explanation"
+}}
+"""
+
+CLASSIFY_BATCH_PROMPT = """You are given {count} images, each introduced by its number.
+Classify the civic issue shown in each one.
+
+Categories (choose one per image): garbage, road, fire, water, construction, air
+Severity levels: high (immediate danger), medium (needs attention soon), low (routine maintenance)
+
+Return ONLY a JSON array of exactly {count} objects, one per image in the same order, with no other text:
+[{{"category": "one_of_the_categories", "severity": "high_medium_or_low"}}, ...]"""
+
+VALIDATE_BATCH_PROMPT = """You are given {count} images, each introduced by its number and the user's description of it.
+For each image, validate whether it represents a genuine civic/environmental issue matching its description.
+
+Return ONLY a JSON array of exactly {count} objects, one per image in the same order, with no other text:
+[{{
+ "is_valid": true/false,
+ "category": "garbage/road/fire/water/construction/air",
+ "severity": "low/medium/high",
+ "reason": "explanation"
+}}, ...]"""
+
+
+def _is_quota_error(error):
+    error_str = str(error)
+    return "429" in error_str or "RESOURCE_EXHAUSTED" in error_str
+
+
+def _is_unavailable(error):
+    """Network failures and server-side outages, as opposed to bad requests."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return type(error).__name__ in ("ServiceUnavailable", "DeadlineExceeded", "InternalServerError", "RetryError")
+
+
+def _parse_json(raw_text, pattern, message):
+    # Remove markdown code blocks if present
+    raw_text = re.sub(r'```json\s*|\s*```', '', raw_text.strip()).strip()
+    try:
+        return json.loads(raw_text)
+    except json.JSONDecodeError:
+        # Try to extract JSON from text
+        match = re.search(pattern, raw_text, flags=re.DOTALL)
+        if match:
+            try:
+                return json.loads(match.group())
+            except json.JSONDecodeError:
+                pass
+        raise InvalidModelResponse(message, raw_text)
+
+
+def _parse_json_array(raw_text, count):
+    answers = _parse_json(raw_text, r"\[.*\]", "Model returned invalid JSON for the batch")
+    if not isinstance(answers, list) or len(answers) != count:
+        raise InvalidModelResponse(f"Model did not return {count} answers", raw_text)
+    return [answer if isinstance(answer, dict) else {} for answer in answers]
+
+
+class GeminiBackend(Backend):
+    name = "gemini"
+    model_name = MODEL_NAME
+    prompt_version = PROMPT_VERSION
+
+    def __init__(self):
+        super().__init__()
+        with open(API_KEY_FILE) as f:
+            genai.configure(api_key=f.read().strip())
+        # Built once and shared by all requests; it holds no per-call state
+        self.model = genai.GenerativeModel(MODEL_NAME)
+
+    async def check(self):
+        """Cheap reachability check: fetches model metadata, spends no generation quota."""
+        await run_blocking(genai.get_model, f"models/{MODEL_NAME}")
+
+    async def _generate(self, contents):
+        """generate_content with back-off on quota errors."""
+        retry_delay = RETRY_DELAY_SECONDS
+        for attempt in range(MAX_RETRIES):
+            try:
+                self.calls += 1
+                return await self.model.generate_content_async(contents)
+            except Exception as api_error:
+                if _is_unavailable(api_error):
+                    raise BackendUnavailable(str(api_error))
+                if not _is_quota_error(api_error):
+                    raise
+                # Extract retry delay from error if available
+                delay_match = re.search(r'retry in (\d+\.?\d*)', str(api_error).lower())
+                if delay_match:
+                    retry_delay = float(delay_match.group(1))
+                if attempt == MAX_RETRIES - 1:
+                    raise QuotaExceeded("API quota exceeded", retry_delay)
+                await asyncio.sleep(retry_delay)
+
+    async def _upload(self, source):
+        # source.path may write a temp file first, so resolve it off the loop too
+        path = await run_blocking(lambda: source.path)
+        try:
+            uploaded_file = await run_blocking(genai.upload_file, path, mime_type=source.mime_type)
+
+            # Wait for file processing (important for large files)
+            while uploaded_file.state.name == "PROCESSING":
+                await asyncio.sleep(FILE_POLL_SECONDS)
+                uploaded_file = await run_blocking(genai.get_file, uploaded_file.name)
+        except Exception as e:
+            if _is_unavailable(e):
+                raise BackendUnavailable(str(e))
+            if _is_quota_error(e):
+                raise QuotaExceeded("API quota exceeded", RETRY_DELAY_SECONDS)
+            raise
+
+        if uploaded_file.state.name == "FAILED":
+            raise RuntimeError("File processing failed")
+        return uploaded_file
+
+    async def classify(self, source):
+        # Upload to Gemini straight from disk (a temp file only for multipart uploads)
+        uploaded_file = await self._upload(source)
+        self.images += 1
+        response = await self._generate([uploaded_file, CLASSIFY_PROMPT])
+        return _parse_json(response.text, r'\{[^}]+\}', "Invalid JSON response from AI")
+
+    async def validate(self, source, description):
+        # Inline the image as base64 (encoded straight from the mapped file)
+        img_b64 = await run_blocking(lambda: base64.b64encode(source.data).decode())
+        self.images += 1
+        response = await self._generate([
+            {"mime_type": source.mime_type, "data": img_b64},
+            VALIDATE_PROMPT.format(description=description),
+        ])
+        return _parse_json(response.text, r"\{.*\}", "Model returned invalid JSON")
+
+    async def classify_batch(self, sources):
+        return await map_chunks(sources, self._classify_chunk)
+
+    async def _classify_chunk(self, sources):
+        uploads = await asyncio.gather(*(self._upload(source) for source in sources), return_exceptions=True)
+        results = list(uploads)
+        uploaded = [(index, file) for index, file in enumerate(uploads) if not isinstance(file, BaseException)]
+        if not uploaded:
+            return results
+
+        contents = []
+        for number, (_, file) in enumerate(uploaded, start=1):
+            contents += [f"Image {number}:", file]
+        self.images += len(uploaded)
+        response = await self._generate(contents + [CLASSIFY_BATCH_PROMPT.format(count=len(uploaded))])
+        for (index, _), answer in zip(uploaded, _parse_json_array(response.text, len(uploaded))):
+            results[index] = answer
+        return results
+
+    async def validate_batch(self, sources, descriptions):
+        return await map_chunks(list(zip(sources, descriptions)), self._validate_chunk)
+
+    async def _validate_chunk(self, items):
+        contents = []
+        for number, (source, description) in enumerate(items, start=1):
+            img_b64 = await run_blocking(lambda: base64.b64encode(source.data).decode())
+            contents += [
+                f'Image {number}, DESCRIPTION: "{description}"',
+                {"mime_type": source.mime_type, "data": img_b64},
+            ]
+        self.images += len(items)
+        response = await self._generate(contents + [VALIDATE_BATCH_PROMPT.format(count=len(items))])
+        return _parse_json_array(response.text, len(items))
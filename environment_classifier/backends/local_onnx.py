@@ -0,0 +1,144 @@
+"""
+Local CPU backend: a small (typically int8-quantized) image model run
+with ONNX Runtime.
+
+Used as the primary backend in offline deployments (CLASSIFIER_BACKEND=
+local), or as the fallback when Gemini refuses calls for quota or cannot
+be reached (CLASSIFIER_FALLBACK=local).
+
+The model at LOCAL_MODEL_PATH takes one float32 input of shape
+[N, 3, S, S] (S = LOCAL_MODEL_INPUT_SIZE, RGB, ImageNet-normalized) and
+has two outputs: "category" logits [N, 6] in CATEGORIES order and
+"severity" logits [N, 3] in SEVERITIES order. A batch is one run.
+
+No trained model ships with the service: LOCAL_MODEL_PATH must point at
+one (bench_local_model.py --make-test-model writes an untrained one with
+the right shape for trying the pipeline).
+
+The model only sees the image, so /validate accepts a report when the
+category is predicted with at least LOCAL_MODEL_MIN_CONFIDENCE and does
+not check the description. As a fallback its answers are provisional.
+
+LOCAL_MODEL_THREADS sets ONNX Runtime's intra-op threads. Runs are
+serialized on one thread, so that is also the number of cores used for
+inference.
+"""
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import onnxruntime as ort
+from PIL import Image
+
+from . import CATEGORIES, SEVERITIES, Backend, map_chunks, run_blocking
+
+LOCAL_MODEL_PATH = os.environ.get("LOCAL_MODEL_PATH", "models/civic_issues_int8.onnx")
+LOCAL_MODEL_THREADS = int(os.environ.get("LOCAL_MODEL_THREADS", "2"))
+LOCAL_MODEL_INPUT_SIZE = int(os.environ.get("LOCAL_MODEL_INPUT_SIZE", "224"))
+LOCAL_MODEL_MIN_CONFIDENCE = float(os.environ.get("LOCAL_MODEL_MIN_CONFIDENCE", "0.5"))
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def preprocess(data, size=LOCAL_MODEL_INPUT_SIZE):
+    """Image bytes to a normalized [3, size, size] float32 array."""
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("RGB", (size, size))
+        image = image.convert("RGB").resize((size, size), Image.BILINEAR)
+    pixels = np.asarray(image, dtype=np.float32) / 255.0
+    return ((pixels - IMAGENET_MEAN) / IMAGENET_STD).transpose(2, 0, 1)
+
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class LocalOnnxBackend(Backend):
+    name = "local"
+
+    def __init__(self, model_path=LOCAL_MODEL_PATH, threads=LOCAL_MODEL_THREADS):
+        super().__init__()
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        with open(model_path, "rb") as f:
+            # Retrained weights under the same file name must not reuse cached answers
+            self.model_name = f"{os.path.basename(model_path)}@{hashlib.sha256(f.read()).hexdigest()[:12]}"
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_size = self.session.get_inputs()[0].shape[-1]
+        if not isinstance(self.input_size, int):
+            self.input_size = LOCAL_MODEL_INPUT_SIZE
+        # One run at a time; each run already uses LOCAL_MODEL_THREADS cores
+        self._inference = ThreadPoolExecutor(max_workers=1, thread_name_prefix="onnx")
+
+    def predict(self, arrays):
+        """Category and severity probabilities for a list of preprocessed images."""
+        category_logits, severity_logits = self.session.run(
+            ["category", "severity"], {self.input_name: np.stack(arrays)}
+        )
+        return _softmax(category_logits), _softmax(severity_logits)
+
+    async def _predict(self, sources):
+        """Answers in order; an image that does not decode gets its exception instead."""
+        arrays = await asyncio.gather(
+            *(run_blocking(preprocess, source.data, self.input_size) for source in sources),
+            return_exceptions=True,
+        )
+        results = list(arrays)
+        decoded = [index for index, array in enumerate(arrays) if not isinstance(array, BaseException)]
+        if not decoded:
+            return results
+
+        loop = asyncio.get_running_loop()
+        self.calls += 1
+        self.images += len(decoded)
+        categories, severities = await loop.run_in_executor(
+            self._inference, self.predict, [arrays[index] for index in decoded]
+        )
+        for index, category, severity in zip(decoded, categories, severities):
+            results[index] = {
+                "category": CATEGORIES[int(category.argmax())],
+                "severity": SEVERITIES[int(severity.argmax())],
+                "confidence": round(float(category.max()), 4),
+                "model": self.name,
+            }
+        return results
+
+    async def _predict_one(self, source):
+        answer = (await self._predict([source]))[0]
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+
+    def _validation(self, answer):
+        if answer["confidence"] < LOCAL_MODEL_MIN_CONFIDENCE:
+            return {
+                "is_valid": False,
+                "model": self.name,
+                "reason": f"Local model is not confident this shows a civic issue ({answer['confidence']:.2f})",
+            }
+        return {
+            "is_valid": True,
+            **answer,
+            "reason": "Classified by the local model; the description was not checked",
+        }
+
+    async def classify(self, source):
+        return await self._predict_one(source)
+
+    async def validate(self, source, description):
+        return self._validation(await self._predict_one(source))
+
+    async def classify_batch(self, sources):
+        return await map_chunks(sources, self._predict)
+
+    async def validate_batch(self, sources, descriptions):
+        answers = await self.classify_batch(sources)
+        return [answer if isinstance(answer, BaseException) else self._validation(answer) for answer in answers]
@@ -0,0 +1,70 @@
+"""
+Stand-in backend: answers after a fixed delay without calling any model.
+
+Used by bench_concurrency.py and for running the service without an API
+key. The category is derived from the image bytes, so the same image always
+gets the same answer.
+
+STANDIN_LATENCY_SECONDS sets the delay of one call, and each further image
+packed into a batch call adds STANDIN_IMAGE_SECONDS. STANDIN_BLOCKING=1 waits with
+time.sleep on the event loop instead, which reproduces the old handlers
+that called blocking model methods from async endpoints.
+"""
+import asyncio
+import hashlib
+import os
+import time
+
+from . import CATEGORIES, SEVERITIES, Backend, map_chunks
+
+STANDIN_LATENCY_SECONDS = float(os.environ.get("STANDIN_LATENCY_SECONDS", "0.5"))
+STANDIN_IMAGE_SECONDS = float(os.environ.get("STANDIN_IMAGE_SECONDS", "0.05"))
+STANDIN_BLOCKING = os.environ.get("STANDIN_BLOCKING", "0") == "1"
+
+
+class StandInBackend(Backend):
+    name = "standin"
+
+    def __init__(self, latency_seconds=STANDIN_LATENCY_SECONDS, blocking=STANDIN_BLOCKING):
+        super().__init__()
+        self.latency_seconds = latency_seconds
+        self.blocking = blocking
+
+    async def _wait(self, images=1):
+        self.calls += 1
+        self.images += images
+        seconds = self.latency_seconds + STANDIN_IMAGE_SECONDS * (images - 1)
+        if self.blocking:
+            time.sleep(seconds)
+        else:
+            await asyncio.sleep(seconds)
+
+    def _answer(self, source):
+        digest = hashlib.sha256(source.data).digest()
+        return {
+            "category": CATEGORIES[digest[0] % len(CATEGORIES)],
+            "severity": SEVERITIES[digest[1] % len(SEVERITIES)],
+        }
+
+    async def classify(self, source):
+        await self._wait()
+        return self._answer(source)
+
+    async def validate(self, source, description):
+        await self._wait()
+        return {"is_valid": True, "reason": "Stand-in backend accepts every report", **self._answer(source)}
+
+    async def classify_batch(self, sources):
+        async def call(chunk):
+            await self._wait(len(chunk))
+            return [self._answer(source) for source in chunk]
+        return await map_chunks(sources, call)
+
+    async def validate_batch(self, sources, descriptions):
+        async def call(chunk):
+            await self._wait(len(chunk))
+            return [
+                {"is_valid": True, "reason": "Stand-in backend accepts every report", **self._answer(source)}
+                for source in chunk
+            ]
+        return await map_chunks(sources, call)
@@ -0,0 +1,81 @@
+"""
+Throughput of /classify/batch against single /classify calls, on the stand-in backend.
+
+Sends the same distinct images once as single calls and once as batch
+requests, and reports images per second and images per model call (the
+quota unit). The result cache is off so every image reaches the model.
+
+    python bench_batch.py --images 64 --batch-size 16 --concurrency 4
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench_concurrency import PNG_BYTES, start_service
+
+
+def image(index):
+    # Bytes after IEND are ignored by decoders but make every image's hash distinct
+    return (f"bench-{index}.png", PNG_BYTES + index.to_bytes(4, "big"), "image/png")
+
+
+def model_calls(session, url):
+    return session.get(f"{url}/model/stats").json()["model_calls"]
+
+
+def run(session, url, jobs, concurrency):
+    calls_before = model_calls(session, url)
+    failed = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for response in pool.map(lambda job: job(), jobs):
+            if response.status_code != 200:
+                failed += 1
+    elapsed = time.perf_counter() - started
+    return elapsed, model_calls(session, url) - calls_before, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=16, help="Images per /classify/batch request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stand-in latency of one model call in seconds")
+    parser.add_argument("--port", type=int, default=8012)
+    args = parser.parse_args()
+
+    process, url = start_service(args.port, {}, args.latency)
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+    try:
+        singles = [
+            lambda index=index: session.post(f"{url}/classify", files={"image": image(index)}, timeout=600)
+            for index in range(args.images)
+        ]
+        offset = args.images
+        batches = [
+            lambda start=start: session.post(
+                f"{url}/classify/batch",
+                files=[("images", image(offset + index))
+                       for index in range(start, min(start + args.batch_size, args.images))],
+                timeout=600,
+            )
+            for start in range(0, args.images, args.batch_size)
+        ]
+
+        print(f"{args.images} images, stand-in latency {args.latency * 1000:.0f} ms per call, "
+              f"concurrency {args.concurrency}")
+        print(f"{'mode':<16} {'requests':>8} {'model calls':>11} {'images/call':>11} {'images/s':>9} {'failed':>7}")
+        for label, jobs in (("single", singles), (f"batch of {args.batch_size}", batches)):
+            elapsed, calls, failed = run(session, url, jobs, args.concurrency)
+            print(f"{label:<16} {len(jobs):>8} {calls:>11} {args.images / calls if calls else 0:>11.1f} "
+                  f"{args.images / elapsed:>9.1f} {failed:>7}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Concurrency benchmark of the classifier service against the stand-in backend.
+
+Starts the service twice with CLASSIFIER_BACKEND=standin: once with
+STANDIN_BLOCKING=1 (model waits block the event loop, like the old
+handlers) and once with async waits. It then fires the same number of
+/validate requests at each, at several concurrency levels.
+
+    python bench_concurrency.py --requests 40 --concurrency 1 8 32
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# minimal 1x1 PNG
+PNG_BYTES = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde"
+    b"\x00\x00\x00\x0bIDAT\x08\xd7c```\x00\x00\x00\x04\x00\x01\x0d\n\x2dB\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+MODES = {
+    "blocking": {"STANDIN_BLOCKING": "1"},
+    "async": {"STANDIN_BLOCKING": "0"},
+}
+
+
+def start_service(port, extra_env, latency):
+    # No result cache: repeated images would skip the model, and fake answers must not reach a shared cache
+    env = dict(os.environ, CLASSIFIER_BACKEND="standin", RESULT_CACHE_BACKEND="none",
+               STANDIN_LATENCY_SECONDS=str(latency))
+    env.update(extra_env)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if requests.get(f"{url}/health/ready", timeout=1).status_code == 200:
+                return process, url
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Classifier service did not start")
+
+
+def run(url, total, concurrency):
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+    latencies = []
+
+    def call(index):
+        started = time.perf_counter()
+        response = session.post(
+            f"{url}/validate",
+            files={"image": (f"bench-{index}.png", PNG_BYTES, "image/png")},
+            data={"description": "Overflowing garbage bin"},
+            timeout=600,
+        )
+        latencies.append(time.perf_counter() - started)
+        return response.status_code == 200
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        errors = sum(not ok for ok in pool.map(call, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return total / elapsed, statistics.median(latencies) * 1000, p99 * 1000, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per mode and concurrency")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency", type=float, default=0.5, help="Stand-in model latency in seconds")
+    parser.add_argument("--port", type=int, default=8011)
+    args = parser.parse_args()
+
+    print(f"stand-in latency {args.latency * 1000:.0f} ms, {args.requests} requests per run")
+    print(f"{'mode':<9} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label, extra_env in MODES.items():
+        process, url = start_service(args.port, extra_env, args.latency)
+        try:
+            for concurrency in args.concurrency:
+                rate, p50, p99, errors = run(url, args.requests, concurrency)
+                print(f"{label:<9} {concurrency:>11} {rate:>8.1f} {p50:>8.0f} {p99:>8.0f} {errors:>7}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Latency and accuracy of the local ONNX fallback model (backends/local_onnx.py).
+
+Latency: per-image time (decode, resize, inference) and batched throughput
+for each thread count. Accuracy: run against a labelled directory laid
+out as <data>/<category>/[<severity>/]<image>; images without a severity
+folder count towards category accuracy only.
+
+    python bench_local_model.py --model models/civic_issues_int8.onnx --threads 1 2 4 --data samples/
+
+--make-test-model PATH writes an untrained, int8-quantized model with the
+expected inputs and outputs, for trying the pipeline without a trained one.
+"""
+import argparse
+import io
+import os
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from backends import CATEGORIES, SEVERITIES
+from backends.local_onnx import LOCAL_MODEL_INPUT_SIZE, LOCAL_MODEL_PATH, LocalOnnxBackend, preprocess
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+def make_test_model(path, size=LOCAL_MODEL_INPUT_SIZE, seed=0):
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    from onnxruntime.quantization import quantize_dynamic
+
+    rng = np.random.default_rng(seed)
+    weights = {
+        "conv_w": rng.normal(0, 0.1, (32, 3, 8, 8)).astype(np.float32),
+        "conv_b": np.zeros(32, dtype=np.float32),
+        "category_w": rng.normal(0, 0.1, (32, len(CATEGORIES))).astype(np.float32),
+        "category_b": np.zeros(len(CATEGORIES), dtype=np.float32),
+        "severity_w": rng.normal(0, 0.1, (32, len(SEVERITIES))).astype(np.float32),
+        "severity_b": np.zeros(len(SEVERITIES), dtype=np.float32),
+    }
+    nodes = [
+        helper.make_node("Conv", ["image", "conv_w", "conv_b"], ["conv"], strides=[8, 8]),
+        helper.make_node("Relu", ["conv"], ["relu"]),
+        helper.make_node("GlobalAveragePool", ["relu"], ["pool"]),
+        helper.make_node("Flatten", ["pool"], ["features"]),
+        helper.make_node("Gemm", ["features", "category_w", "category_b"], ["category"]),
+        helper.make_node("Gemm", ["features", "severity_w", "severity_b"], ["severity"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "civic_issues_test",
+        [helper.make_tensor_value_info("image", TensorProto.FLOAT, ["N", 3, size, size])],
+        [
+            helper.make_tensor_value_info("category", TensorProto.FLOAT, ["N", len(CATEGORIES)]),
+            helper.make_tensor_value_info("severity", TensorProto.FLOAT, ["N", len(SEVERITIES)]),
+        ],
+        [numpy_helper.from_array(value, name) for name, value in weights.items()],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    # Loadable by older ONNX Runtime releases too
+    model.ir_version = 8
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    float_path = path + ".float.onnx"
+    onnx.save(model, float_path)
+    quantize_dynamic(float_path, path)
+    os.remove(float_path)
+
+
+def synthetic_images(count, seed=0):
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, (768, 1024, 3), dtype=np.uint8)
+        output = io.BytesIO()
+        Image.fromarray(pixels).save(output, format="JPEG", quality=85)
+        images.append(output.getvalue())
+    return images
+
+
+def labelled_images(root):
+    """(bytes, category, severity or None) for every image under <root>/<category>/[<severity>/]."""
+    samples = []
+    for category in CATEGORIES:
+        for directory, _, names in os.walk(os.path.join(root, category)):
+            severity = os.path.basename(directory)
+            severity = severity if severity in SEVERITIES else None
+            for name in sorted(names):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    with open(os.path.join(directory, name), "rb") as f:
+                        samples.append((f.read(), category, severity))
+    return samples
+
+
+def measure_latency(backend, images, batch_size):
+    per_image = []
+    for data in images:
+        started = time.perf_counter()
+        backend.predict([preprocess(data, backend.input_size)])
+        per_image.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for start in range(0, len(images), batch_size):
+        backend.predict([preprocess(data, backend.input_size) for data in images[start:start + batch_size]])
+    batch_rate = len(images) / (time.perf_counter() - started)
+
+    per_image.sort()
+    p95 = per_image[min(len(per_image) - 1, int(len(per_image) * 0.95))]
+    return statistics.median(per_image) * 1000, p95 * 1000, batch_rate
+
+
+def measure_accuracy(backend, samples, batch_size):
+    category_hits = severity_hits = severity_total = 0
+    for start in range(0, len(samples), batch_size):
+        chunk = samples[start:start + batch_size]
+        categories, severities = backend.predict([preprocess(data, backend.input_size) for data, _, _ in chunk])
+        for (_, category, severity), category_probs, severity_probs in zip(chunk, categories, severities):
+            category_hits += CATEGORIES[int(category_probs.argmax())] == category
+            if severity is not None:
+                severity_total += 1
+                severity_hits += SEVERITIES[int(severity_probs.argmax())] == severity
+    return category_hits / len(samples), (severity_hits / severity_total) if severity_total else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=LOCAL_MODEL_PATH)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--images", type=int, default=32, help="Synthetic photos for latency when --data is not given")
+    parser.add_argument("--data", help="Labelled directory for accuracy (and latency)")
+    parser.add_argument("--make-test-model", metavar="PATH", help="Write an untrained test model to PATH and exit")
+    args = parser.parse_args()
+
+    if args.make_test_model:
+        make_test_model(args.make_test_model)
+        print(f"wrote untrained test model to {args.make_test_model}")
+        return
+
+    samples = labelled_images(args.data) if args.data else []
+    images = [data for data, _, _ in samples] or synthetic_images(args.images)
+
+    print(f"model: {args.model} ({os.path.getsize(args.model) / 1024:.0f} KiB), {len(images)} images")
+    print(f"{'threads':>7} {'p50 ms':>8} {'p95 ms':>8} {f'batch {args.batch_size} img/s':>16}")
+    for threads in args.threads:
+        backend = LocalOnnxBackend(args.model, threads=threads)
+        backend.predict([preprocess(images[0], backend.input_size)])  # warm up
+        p50, p95, batch_rate = measure_latency(backend, images, args.batch_size)
+        print(f"{threads:>7} {p50:>8.1f} {p95:>8.1f} {batch_rate:>16.1f}")
+
+    if samples:
+        category_accuracy, severity_accuracy = measure_accuracy(backend, samples, args.batch_size)
+        print(f"category accuracy: {category_accuracy:.1%} of {len(samples)} images")
+        if severity_accuracy is not None:
+            print(f"severity accuracy: {severity_accuracy:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,163 +1,202 @@
-import google.generativeai as genai
 from fastapi import FastAPI, File, UploadFile, Form
 from fastapi.responses import JSONResponse
 from utils.response_time import get_response_time
-import json
-import tempfile
+from utils import image_source
+from utils.image_source import ImageSourceError
+from utils.result_cache import ResultCache, classify_key, validate_key
+from backends import CATEGORIES, SEVERITIES, InvalidModelResponse, QuotaExceeded, get_backend
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import List, Optional
+import asyncio
+import logging
 import os
-import re
-import time
 import traceback
 
-with open("apikey.txt") as f:
-    api_key = f.read().strip()
+logger = logging.getLogger(__name__)
 
-genai.configure(api_key=api_key)
+# Images accepted by one /classify/batch or /validate/batch request
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "32"))
 
-# Use Gemini 2.0 Flash - latest model with vision support
-MODEL_NAME = "gemini-2.5-flash"
+# Seconds between background health checks of the model backend
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.environ.get("HEALTH_CHECK_INTERVAL_SECONDS", "60"))
 
-app = FastAPI()
+# Model behind both endpoints (CLASSIFIER_BACKEND), built once at startup;
+# every call is async, so one process serves many requests concurrently
+backend = get_backend()
 
-CATEGORIES = ["garbage", "road", "fire", "water", "construction", "air"]
+# Answers by image content hash, so repeated photos cost no model call
+cache = ResultCache()
 
-@app.post("/classify")
-async def classify(image: UploadFile = File(...)):
-    tmp_path = None
+# Last background health check, served by /health/ready without touching the model
+health = {"ready": False, "backend": backend.name, "checked_at": None, "error": "Not checked yet"}
+
+
+async def check_health():
     try:
-        # Read image bytes
-        img_bytes = await image.read()
-        
-        # Validate image
-        if len(img_bytes) == 0:
-            return JSONResponse({"error": "Empty image file"}, 400)
-        
-        # Save image temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-            tmp.write(img_bytes)
-            tmp_path = tmp.name
-        
-        # Upload to Gemini
-        uploaded_file = genai.upload_file(tmp_path)
-        
-        # Wait for file processing (important for large files)
-        while uploaded_file.state.name == "PROCESSING":
-            time.sleep(1)
-            uploaded_file = genai.get_file(uploaded_file.name)
-        
-        if uploaded_file.state.name == "FAILED":
-            return JSONResponse({"error": "File processing failed"}, 500)
-        
-        # Improved prompt with stricter JSON formatting
-        prompt = """Analyze this image and classify the civic issue shown.
+        await backend.check()
+        health.update(ready=True, error=None)
+    except Exception as e:
+        health.update(ready=False, error=str(e))
+    health["checked_at"] = datetime.now(timezone.utc).isoformat()
 
-You must return ONLY a valid JSON object with no additional text, markdown, or explanation.
 
-Categories (choose one):
-- garbage: litter, trash piles, waste dumping
-- road: potholes, damaged roads, broken pavement
-- fire: fires, smoke, burning
-- water: leaks, flooding, water damage, broken pipes
-- construction: illegal construction, building issues, debris
-- air: pollution, dust, smoke (non-fire)
+async def monitor_health():
+    while True:
+        await asyncio.sleep(HEALTH_CHECK_INTERVAL_SECONDS)
+        await check_health()
 
-Severity levels:
-- high: immediate danger, urgent action needed
-- medium: significant issue, needs attention soon
-- low: minor issue, routine maintenance
 
-Return format:
-{"category": "one_of_the_categories", "severity": "high_medium_or_low"}
+@asynccontextmanager
+async def lifespan(app):
+    # First check finishes before traffic is accepted, so readiness is accurate from the start
+    await check_health()
+    monitor = asyncio.create_task(monitor_health())
+    yield
+    monitor.cancel()
 
-Example: {"category": "road", "severity": "high"}"""
 
-        # Generate content with retry logic
-        max_retries = 3
-        retry_delay = 2
-        response = None
-        
-        for attempt in range(max_retries):
-            try:
-                model = genai.GenerativeModel(MODEL_NAME)
-                response = model.generate_content([uploaded_file, prompt])
-                break  # Success, exit retry loop
-            except Exception as api_error:
-                error_str = str(api_error)
-                # Check if it's a quota error
-                if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str:
-                    if attempt < max_retries - 1:
-                        # Extract retry delay from error if available
-                        delay_match = re.search(r'retry in (\d+\.?\d*)', error_str.lower())
-                        if delay_match:
-                            retry_delay = float(delay_match.group(1))
-                        
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        return JSONResponse({
-                            "error": "API quota exceeded",
-                            "message": "Please wait a moment and try again, or check your API quota at https://ai.dev/usage",
-                            "retry_after_seconds": retry_delay
-                        }, 429)
-                else:
-                    # Non-quota error, raise it
-                    raise
-        
-        if response is None:
-            return JSONResponse({"error": "Failed to get response from classifier"}, 500)
-        
-        # Extract and clean response
-        raw_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        raw_text = re.sub(r'```json\s*|\s*```', '', raw_text)
-        raw_text = raw_text.strip()
-        
-        # Parse JSON
-        try:
-            data = json.loads(raw_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON from text
-            json_match = re.search(r'\{[^}]+\}', raw_text)
-            if json_match:
-                data = json.loads(json_match.group())
-            else:
-                return JSONResponse({
-                    "error": "Invalid JSON response from AI",
-                    "raw_response": raw_text
-                }, 500)
-        
-        # Extract and validate category
-        category = data.get("category", "").lower().strip()
+app = FastAPI(lifespan=lifespan)
+
+
+@app.get("/health/live")
+async def live():
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def ready():
+    return JSONResponse(health, 200 if health["ready"] else 503)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return cache.stats()
+
+
+@app.get("/model/stats")
+async def model_stats():
+    return backend.stats()
+
+
+async def remember(key, result):
+    # Fallback answers are not cached, so the primary model answers the photo next time
+    if not result.get("fallback"):
+        await cache.set(key, result)
+
+
+class InvalidAnswer(Exception):
+    """The model answered, but not with a usable category/severity."""
+
+    def __init__(self, payload):
+        super().__init__(payload["error"])
+        self.payload = payload
+
+
+def provenance(data):
+    """Which model answered, passed through to clients when a backend says so."""
+    return {key: data[key] for key in ("model", "confidence", "fallback") if key in data}
+
+
+def classify_answer(data):
+    """Checked /classify result from the model's raw answer."""
+    # Extract and validate category
+    category = data.get("category", "").lower().strip()
+    if category not in CATEGORIES:
+        raise InvalidAnswer({
+            "error": f"Invalid category: {category}",
+            "valid_categories": CATEGORIES,
+            "raw_response": data
+        })
+    
+    # Extract and validate severity
+    severity = data.get("severity", "").lower().strip()
+    if severity not in SEVERITIES:
+        raise InvalidAnswer({
+            "error": f"Invalid severity: {severity}",
+            "valid_severities": SEVERITIES,
+            "raw_response": data
+        })
+    
+    # Calculate response time
+    response_time = get_response_time(severity)
+    
+    return {
+        "category": category,
+        "severity": severity,
+        "response_time": response_time,
+        **provenance(data)
+    }
+
+
+def validate_answer(data):
+    """Checked /validate result from the model's raw answer."""
+    if data.get("is_valid"):
+        category = data.get("category", "").lower()
+        severity = data.get("severity", "").lower()
+
         if category not in CATEGORIES:
-            return JSONResponse({
-                "error": f"Invalid category: {category}",
-                "valid_categories": CATEGORIES,
-                "raw_response": data
-            }, 400)
-        
-        # Extract and validate severity
-        severity = data.get("severity", "").lower().strip()
-        if severity not in ["low", "medium", "high"]:
-            return JSONResponse({
-                "error": f"Invalid severity: {severity}",
-                "valid_severities": ["low", "medium", "high"],
-                "raw_response": data
-            }, 400)
-        
-        # Calculate response time
+            return {"is_valid": False, "reason": f"Invalid category: {category}", **provenance(data)}
+
+        if severity not in SEVERITIES:
+            severity = "medium"
+
         response_time = get_response_time(severity)
-        
+
         return {
+            "is_valid": True,
             "category": category,
             "severity": severity,
-            "response_time": response_time
+            "response_time": response_time,
+            "reason": data.get("reason", ""),
+            **provenance(data)
         }
+
+    return {
+        "is_valid": False,
+        "reason": data.get("reason", "Description does not match the image"),
+        **provenance(data)
+    }
+
+
+@app.post("/classify")
+async def classify(
+    image: Optional[UploadFile] = File(None),
+    path: Optional[str] = Form(None),
+    sha256: Optional[str] = Form(None),
+):
+    source = None
+    try:
+        # Uploaded image, or a file on the shared media volume
+        try:
+            source = await image_source.load(image, path, sha256)
+        except ImageSourceError as e:
+            return JSONResponse({"error": str(e)}, e.status)
+
+        key = classify_key(backend.cache_id, source.sha256)
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+
+        data = await backend.classify(source)
+        result = classify_answer(data)
+        await remember(key, result)
+        return result
+
+    except InvalidAnswer as e:
+        return JSONResponse(e.payload, 400)
     
-    except json.JSONDecodeError as e:
+    except QuotaExceeded as e:
         return JSONResponse({
-            "error": "Failed to parse AI response as JSON",
-            "details": str(e)
+            "error": "API quota exceeded",
+            "message": "Please wait a moment and try again, or check your API quota at https://ai.dev/usage",
+            "retry_after_seconds": e.retry_after_seconds
+        }, 429)
+
+    except InvalidModelResponse as e:
+        return JSONResponse({
+            "error": str(e),
+            "raw_response": e.raw_response
         }, 500)
     
     except Exception as e:
@@ -169,12 +208,9 @@ Example: {"category": "road", "severity": "high"}"""
         }, 500)
     
     finally:
-        # Clean up temporary file
-        if tmp_path and os.path.exists(tmp_path):
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
+        # Unmap the shared file / remove the temp file
+        if source is not None:
+            source.close()
 
 
 # @app.post("/validate")
@@ -331,86 +367,192 @@ Example: {"category": "road", "severity": "high"}"""
 #             except:
 #                 pass
 @app.post("/validate")
-async def validate_report(image: UploadFile = File(...), description: str = Form(...)):
+async def validate_report(
+    description: str = Form(...),
+    image: Optional[UploadFile] = File(None),
+    path: Optional[str] = Form(None),
+    sha256: Optional[str] = Form(None),
+):
     """Validate if the image is environment-related and matches the description using base64"""
+    source = None
     try:
-        genai.GenerativeModel("gemini-2.5-flash").generate_content("hello")
-
-        img_bytes = await image.read()
-        if not img_bytes:
-            return JSONResponse({"error": "Empty image file"}, 400)
-
-        # Convert image to base64
-        import base64, mimetypes
-        img_b64 = base64.b64encode(img_bytes).decode()
-
-        # Detect MIME type safely
-        mime_type = (
-            image.content_type 
-            or mimetypes.guess_type(image.filename)[0] 
-            or "image/jpeg"
-        )
-
-        # Validation prompt
-        prompt = f"""
-Analyze this image and the following description to validate if it represents a genuine civic/environmental issue.
-
-DESCRIPTION: "{description}"
-
-Return ONLY JSON:
-{{
- "is_valid": true/false,
- "category": "garbage/road/fire/water/construction/air",
- "severity": "low/medium/high",
- "reason": "explanation"
-}}
-"""
+        # Uploaded image, or a file on the shared media volume
+        try:
+            source = await image_source.load(image, path, sha256)
+        except ImageSourceError as e:
+            return JSONResponse({"error": str(e)}, e.status)
 
-        model = genai.GenerativeModel(MODEL_NAME)
+        key = validate_key(backend.cache_id, source.sha256, description)
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
 
-        response = model.generate_content([
-            {"mime_type": mime_type, "data": img_b64},
-            prompt
-        ])
+        data = await backend.validate(source, description)
+        result = validate_answer(data)
+        await remember(key, result)
+        return result
 
-        raw = response.text.strip()
-        raw = raw.replace("```json", "").replace("```", "").strip()
+    except QuotaExceeded as e:
+        return JSONResponse({
+            "error": "API quota exceeded",
+            "message": "Please wait a moment and try again",
+            "retry_after_seconds": e.retry_after_seconds
+        }, 429)
 
-        match = re.search(r"\{.*\}", raw, flags=re.DOTALL)
-        if not match:
-            return JSONResponse({"error": "Model returned invalid JSON", "raw_response": raw}, 500)
+    except InvalidModelResponse as e:
+        return JSONResponse({"error": str(e), "raw_response": e.raw_response}, 500)
 
-        data = json.loads(match.group())
+    except Exception as e:
+        print("Validation error:", e)
+        traceback.print_exc()
+        return JSONResponse({"error": "Validation failed", "details": str(e)}, 500)
 
-        if data.get("is_valid"):
-            category = data.get("category", "").lower()
-            severity = data.get("severity", "").lower()
+    finally:
+        if source is not None:
+            source.close()
 
-            if category not in CATEGORIES:
-                return {"is_valid": False, "reason": f"Invalid category: {category}"}
 
-            if severity not in ["low", "medium", "high"]:
-                severity = "medium"
+async def load_batch(images, paths, sha256s):
+    """Sources of a batch request in order, with the ImageSourceError of any that failed to load."""
+    kinds = [items for items in (images, paths, sha256s) if items]
+    if len(kinds) != 1:
+        raise ImageSourceError("Send images, paths or sha256s, one kind per request")
+    items = kinds[0]
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ImageSourceError(f"A batch may hold at most {BATCH_MAX_ITEMS} images", 413)
 
-            response_time = get_response_time(severity)
+    sources = []
+    for item in items:
+        try:
+            if images:
+                sources.append(await image_source.load(image=item))
+            elif paths:
+                sources.append(image_source.from_shared(path=item))
+            else:
+                sources.append(image_source.from_shared(sha256=item))
+        except ImageSourceError as e:
+            sources.append(e)
+    return sources
+
+
+def item_error(index, error):
+    """Batch entry for an image that got no result."""
+    if isinstance(error, ImageSourceError):
+        entry = {"error": str(error), "status": error.status}
+    elif isinstance(error, InvalidAnswer):
+        entry = {**error.payload, "status": 400}
+    elif isinstance(error, QuotaExceeded):
+        entry = {"error": "API quota exceeded", "retry_after_seconds": error.retry_after_seconds, "status": 429}
+    elif isinstance(error, InvalidModelResponse):
+        entry = {"error": str(error), "raw_response": error.raw_response, "status": 500}
+    else:
+        logger.warning("Batch item error: %r", error)
+        entry = {"error": "Classification failed", "details": str(error), "status": 500}
+    return {"index": index, "ok": False, **entry}
+
+
+async def run_batch(sources, keys, call, answer):
+    """
+    Results for a batch in order: cached answers first, then one backend
+    batch call for the rest. 200 if every image got a result, else 207.
+    """
+    results = [None] * len(sources)
+    pending = []
+    for index, (source, key) in enumerate(zip(sources, keys)):
+        if isinstance(source, Exception):
+            results[index] = item_error(index, source)
+            continue
+        cached = await cache.get(key)
+        if cached is not None:
+            results[index] = {"index": index, "ok": True, **cached}
+        else:
+            pending.append(index)
+
+    if pending:
+        raw_answers = await call(pending)
+        for index, raw in zip(pending, raw_answers):
+            try:
+                if isinstance(raw, BaseException):
+                    raise raw
+                result = answer(raw)
+            except Exception as e:
+                results[index] = item_error(index, e)
+                continue
+            await remember(keys[index], result)
+            results[index] = {"index": index, "ok": True, **result}
+
+    failed = sum(not result["ok"] for result in results)
+    return JSONResponse({
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+    }, 207 if failed else 200)
+
+
+@app.post("/classify/batch")
+async def classify_batch(
+    images: Optional[List[UploadFile]] = File(None),
+    paths: Optional[List[str]] = Form(None),
+    sha256s: Optional[List[str]] = Form(None),
+):
+    """Classify several images in as few model calls as the backend allows"""
+    sources = []
+    try:
+        try:
+            sources = await load_batch(images, paths, sha256s)
+        except ImageSourceError as e:
+            return JSONResponse({"error": str(e)}, e.status)
+
+        keys = [
+            None if isinstance(source, Exception) else classify_key(backend.cache_id, source.sha256)
+            for source in sources
+        ]
+        return await run_batch(
+            sources, keys,
+            lambda pending: backend.classify_batch([sources[index] for index in pending]),
+            classify_answer,
+        )
 
-            return {
-                "is_valid": True,
-                "category": category,
-                "severity": severity,
-                "response_time": response_time,
-                "reason": data.get("reason", "")
-            }
+    finally:
+        for source in sources:
+            if not isinstance(source, Exception):
+                source.close()
+
+
+@app.post("/validate/batch")
+async def validate_batch(
+    descriptions: List[str] = Form(...),
+    images: Optional[List[UploadFile]] = File(None),
+    paths: Optional[List[str]] = Form(None),
+    sha256s: Optional[List[str]] = Form(None),
+):
+    """Validate several images against their descriptions (same order) in as few model calls as possible"""
+    sources = []
+    try:
+        try:
+            sources = await load_batch(images, paths, sha256s)
+        except ImageSourceError as e:
+            return JSONResponse({"error": str(e)}, e.status)
+        if len(descriptions) != len(sources):
+            return JSONResponse({"error": "Send one description per image"}, 400)
+
+        keys = [
+            None if isinstance(source, Exception) else validate_key(backend.cache_id, source.sha256, description)
+            for source, description in zip(sources, descriptions)
+        ]
+        return await run_batch(
+            sources, keys,
+            lambda pending: backend.validate_batch(
+                [sources[index] for index in pending], [descriptions[index] for index in pending]
+            ),
+            validate_answer,
+        )
 
-        return {
-            "is_valid": False,
-            "reason": data.get("reason", "Description does not match the image")
-        }
+    finally:
+        for source in sources:
+            if not isinstance(source, Exception):
+                source.close()
 
-    except Exception as e:
-        print("Validation error:", e)
-        traceback.print_exc()
-        return JSONResponse({"error": "Validation failed", "details": str(e)}, 500)
 
 if __name__ == "__main__":
     import uvicorn
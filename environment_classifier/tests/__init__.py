@@ -0,0 +1,13 @@
+"""
+Tests for the classifier service; run `python -m pytest tests` from
+environment_classifier. They use the stand-in backend and no shared result
+cache, so they need neither an API key, a model file nor a cache left over
+from an earlier run.
+"""
+import os
+
+os.environ.setdefault("CLASSIFIER_BACKEND", "standin")
+os.environ.setdefault("CLASSIFIER_FALLBACK", "")
+os.environ.setdefault("RESULT_CACHE_BACKEND", "none")
+os.environ.setdefault("STANDIN_LATENCY_SECONDS", "0")
+os.environ.setdefault("STANDIN_IMAGE_SECONDS", "0")
@@ -0,0 +1,94 @@
+import unittest
+
+from backends import BackendUnavailable, FallbackBackend, QuotaExceeded, get_backend, map_chunks
+from backends.standin import StandInBackend
+from utils.image_source import ImageSource
+
+
+def image(content):
+    return ImageSource(content, "image/png")
+
+
+class FlakyBackend(StandInBackend):
+    """Stand-in that refuses the images listed in failures with the given exception."""
+
+    name = "flaky"
+
+    def __init__(self, failures=None):
+        super().__init__(latency_seconds=0)
+        self.failures = failures or {}
+
+    async def classify(self, source):
+        if source.data in self.failures:
+            raise self.failures[source.data]
+        return await super().classify(source)
+
+    async def classify_batch(self, sources):
+        return [
+            self.failures.get(source.data) or self._answer(source)
+            for source in sources
+        ]
+
+
+class MapChunksTests(unittest.IsolatedAsyncioTestCase):
+    """Batch calls split into chunks (backends.map_chunks)."""
+
+    async def test_answers_keep_item_order(self):
+        async def call(chunk):
+            return [item * 10 for item in chunk]
+        self.assertEqual(await map_chunks(list(range(7)), call, size=3), [0, 10, 20, 30, 40, 50, 60])
+
+    async def test_failed_chunk_answers_each_item_with_its_error(self):
+        error = BackendUnavailable("model down")
+
+        async def call(chunk):
+            if 3 in chunk:
+                raise error
+            return chunk
+        self.assertEqual(await map_chunks(list(range(6)), call, size=2), [0, 1, error, error, 4, 5])
+
+
+class FallbackBackendTests(unittest.IsolatedAsyncioTestCase):
+    """Per-call and per-item fallback (backends.FallbackBackend)."""
+
+    def setUp(self):
+        self.fallback = StandInBackend(latency_seconds=0)
+
+    async def test_only_refused_items_use_the_fallback(self):
+        refused = QuotaExceeded("quota", 30)
+        rejected = ValueError("not an image")
+        primary = FlakyBackend({b"b": refused, b"c": rejected})
+        backend = FallbackBackend(primary, self.fallback)
+
+        answers = await backend.classify_batch([image(b"a"), image(b"b"), image(b"c"), image(b"d")])
+        self.assertEqual(answers[0], primary._answer(image(b"a")))
+        self.assertEqual(answers[1], {**self.fallback._answer(image(b"b")), "fallback": True})
+        # Errors other than quota and outages are the primary's answer
+        self.assertIs(answers[2], rejected)
+        self.assertNotIn("fallback", answers[3])
+        self.assertEqual(backend.fallback_answers, 1)
+
+    async def test_single_call_falls_back_with_a_warning(self):
+        backend = FallbackBackend(FlakyBackend({b"a": BackendUnavailable("model down")}), self.fallback)
+        with self.assertLogs("backends", "WARNING") as logs:
+            answer = await backend.classify(image(b"a"))
+        self.assertTrue(answer["fallback"])
+        self.assertIn("model down", logs.output[0])
+
+    async def test_unhealthy_primary_is_skipped(self):
+        primary = FlakyBackend()
+        backend = FallbackBackend(primary, self.fallback)
+        backend.primary_ready = False
+
+        answers = await backend.classify_batch([image(b"a"), image(b"b")])
+        self.assertTrue(all(answer["fallback"] for answer in answers))
+        self.assertEqual(primary.calls, 0)
+
+
+class GetBackendTests(unittest.TestCase):
+
+    def test_unavailable_fallback_is_logged_and_skipped(self):
+        with self.assertLogs("backends", "WARNING") as logs:
+            backend = get_backend("standin", "no-such-backend")
+        self.assertIsInstance(backend, StandInBackend)
+        self.assertIn("no-such-backend", logs.output[0])
@@ -0,0 +1,93 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from starlette.datastructures import Headers, UploadFile
+
+import main
+from backends import QuotaExceeded
+from utils.result_cache import ResultCache
+
+
+def upload(content):
+    return UploadFile(io.BytesIO(content), filename="photo.png", headers=Headers({"content-type": "image/png"}))
+
+
+class BatchTests(unittest.IsolatedAsyncioTestCase):
+    """/classify/batch and /validate/batch (main.run_batch)."""
+
+    def setUp(self):
+        patcher = mock.patch.object(main, "cache", ResultCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def classify_batch(self, contents):
+        response = await main.classify_batch(images=[upload(content) for content in contents], paths=None, sha256s=None)
+        return response.status_code, json.loads(response.body)
+
+    async def test_results_keep_request_order(self):
+        contents = [f"photo {index}".encode() for index in range(12)]
+        single = [await main.classify(image=upload(content), path=None, sha256=None) for content in contents]
+        main.cache.memory = ResultCache().memory
+
+        with mock.patch.object(main, "BATCH_MAX_ITEMS", 12):
+            status, body = await self.classify_batch(contents)
+        self.assertEqual(status, 200)
+        self.assertEqual((body["succeeded"], body["failed"]), (12, 0))
+        self.assertEqual([result["index"] for result in body["results"]], list(range(12)))
+        for result, expected in zip(body["results"], single):
+            self.assertEqual({key: result[key] for key in expected}, expected)
+
+    async def test_cached_items_are_not_sent_again(self):
+        await self.classify_batch([b"seen"])
+        with mock.patch.object(main.backend, "classify_batch", wraps=main.backend.classify_batch) as call:
+            status, body = await self.classify_batch([b"new", b"seen"])
+        self.assertEqual(status, 200)
+        self.assertEqual(len(call.call_args.args[0]), 1)
+        self.assertEqual(call.call_args.args[0][0].data, b"new")
+
+    async def test_partial_failure_is_207_per_item(self):
+        answers = [
+            {"category": "road", "severity": "low"},
+            QuotaExceeded("quota", 30),
+            {"category": "volcano", "severity": "low"},
+            RuntimeError("model crashed"),
+        ]
+        with mock.patch.object(main.backend, "classify_batch", return_value=answers), \
+                self.assertLogs("main", "WARNING") as logs:
+            status, body = await self.classify_batch([b"a", b"b", b"c", b"d", b""])
+        self.assertEqual(status, 207)
+        self.assertEqual((body["succeeded"], body["failed"]), (1, 4))
+
+        results = body["results"]
+        self.assertEqual([result["ok"] for result in results], [True, False, False, False, False])
+        self.assertEqual(results[0]["category"], "road")
+        self.assertEqual((results[1]["status"], results[1]["retry_after_seconds"]), (429, 30))
+        self.assertEqual(results[2]["status"], 400)
+        self.assertEqual((results[3]["status"], results[3]["details"]), (500, "model crashed"))
+        # The empty upload failed to load and never reached the model
+        self.assertEqual((results[4]["status"], results[4]["error"]), (400, "Empty image file"))
+        self.assertIn("model crashed", logs.output[0])
+
+        # Only the successful answer was cached
+        await self.classify_batch([b"a"])
+        self.assertEqual(main.cache.counters["memory_hits"], 1)
+
+    async def test_validate_batch_needs_one_description_per_image(self):
+        response = await main.validate_batch(
+            descriptions=["Overflowing bin"], images=[upload(b"a"), upload(b"b")], paths=None, sha256s=None,
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = await main.validate_batch(
+            descriptions=["Overflowing bin", "Pothole"], images=[upload(b"a"), upload(b"b")], paths=None, sha256s=None,
+        )
+        body = json.loads(response.body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["is_valid"] for result in body["results"]], [True, True])
+
+    async def test_oversized_batch_is_refused(self):
+        with mock.patch.object(main, "BATCH_MAX_ITEMS", 2):
+            status, body = await self.classify_batch([b"a", b"b", b"c"])
+        self.assertEqual(status, 413)
@@ -0,0 +1,45 @@
+import json
+import unittest
+from unittest import mock
+
+import main
+from backends import BackendUnavailable
+
+
+class ReadinessTests(unittest.IsolatedAsyncioTestCase):
+    """/health/ready follows the background check of the backend."""
+
+    def setUp(self):
+        saved = dict(main.health)
+        self.addCleanup(lambda: (main.health.clear(), main.health.update(saved)))
+        main.health.update(ready=False, checked_at=None, error="Not checked yet")
+
+    async def ready(self):
+        response = await main.ready()
+        return response.status_code, json.loads(response.body)
+
+    async def test_not_ready_until_a_check_succeeds(self):
+        status, body = await self.ready()
+        self.assertEqual(status, 503)
+        self.assertIsNone(body["checked_at"])
+
+        with mock.patch.object(main.backend, "check", side_effect=BackendUnavailable("model down")):
+            await main.check_health()
+        status, body = await self.ready()
+        self.assertEqual(status, 503)
+        self.assertEqual(body["error"], "model down")
+        self.assertIsNotNone(body["checked_at"])
+
+        await main.check_health()
+        status, body = await self.ready()
+        self.assertEqual(status, 200)
+        self.assertIsNone(body["error"])
+
+        # A later failure takes the service out of rotation again
+        with mock.patch.object(main.backend, "check", side_effect=BackendUnavailable("model down")):
+            await main.check_health()
+        self.assertEqual((await self.ready())[0], 503)
+
+    async def test_startup_checks_before_serving(self):
+        async with main.lifespan(main.app):
+            self.assertEqual((await self.ready())[0], 200)
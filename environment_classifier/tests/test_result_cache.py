@@ -0,0 +1,122 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from starlette.datastructures import Headers, UploadFile
+
+import main
+from backends.standin import StandInBackend
+from utils import result_cache
+from utils.result_cache import DiskStore, ResultCache, classify_key, validate_key
+
+SHA256 = "ab" * 32
+
+
+def upload(content):
+    return UploadFile(io.BytesIO(content), filename="photo.png", headers=Headers({"content-type": "image/png"}))
+
+
+def backend(name="standin", model_name=None, prompt_version=None):
+    instance = StandInBackend(latency_seconds=0)
+    instance.name, instance.model_name, instance.prompt_version = name, model_name, prompt_version
+    return instance
+
+
+class CacheKeyTests(unittest.TestCase):
+    """Result cache keys (utils.result_cache)."""
+
+    def test_keys_differ_by_backend_model_and_prompt(self):
+        cache_ids = {
+            backend().cache_id,
+            backend(name="gemini").cache_id,
+            backend(model_name="model-a").cache_id,
+            backend(model_name="model-b").cache_id,
+            backend(model_name="model-a", prompt_version="2").cache_id,
+        }
+        self.assertEqual(len(cache_ids), 5)
+        self.assertEqual(len({classify_key(cache_id, SHA256) for cache_id in cache_ids}), 5)
+        self.assertEqual(len({validate_key(cache_id, SHA256, "Overflowing bin") for cache_id in cache_ids}), 5)
+
+    def test_validate_key_normalizes_the_description(self):
+        cache_id = backend().cache_id
+        self.assertEqual(
+            validate_key(cache_id, SHA256, "  Overflowing   BIN "),
+            validate_key(cache_id, SHA256, "overflowing bin"),
+        )
+        self.assertNotEqual(
+            validate_key(cache_id, SHA256, "overflowing bin"),
+            validate_key(cache_id, SHA256, "pothole"),
+        )
+        self.assertNotEqual(classify_key(cache_id, SHA256), classify_key(cache_id, "cd" * 32))
+
+
+class ResultCacheTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.cache = ResultCache()
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.cache.shared = DiskStore(path, max_entries=10, ttl_seconds=60)
+        self.addCleanup(os.remove, path)
+        self.addCleanup(self.cache.shared._db.close)
+
+    async def test_hits_return_the_stored_answer(self):
+        answer = {"category": "road", "severity": "high", "response_time": "4 hours"}
+        self.assertIsNone(await self.cache.get("classify:x"))
+        await self.cache.set("classify:x", answer)
+        self.assertEqual(await self.cache.get("classify:x"), answer)
+
+        # A fresh process finds it in the shared layer
+        self.cache.memory = result_cache.MemoryLRU(10, 60)
+        self.assertEqual(await self.cache.get("classify:x"), answer)
+        self.assertEqual(
+            {name: self.cache.counters[name] for name in ("memory_hits", "shared_hits", "misses")},
+            {"memory_hits": 1, "shared_hits": 1, "misses": 1},
+        )
+
+    async def test_shared_layer_failures_are_logged_and_survived(self):
+        self.cache.shared = mock.Mock(**{"get.side_effect": OSError("disk gone"), "set.side_effect": OSError("disk gone")})
+        with self.assertLogs("utils.result_cache", "WARNING") as logs:
+            await self.cache.set("classify:x", {"category": "road"})
+            self.cache.memory = result_cache.MemoryLRU(10, 60)
+            self.assertIsNone(await self.cache.get("classify:x"))
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(self.cache.counters["shared_errors"], 2)
+
+    def test_redis_without_the_package_is_a_clear_error(self):
+        with mock.patch.dict("sys.modules", {"redis": None}):
+            with self.assertRaisesRegex(RuntimeError, "pip install redis"):
+                result_cache.RedisStore("redis://localhost:6379/2", 60)
+
+
+class ClassifyCacheTests(unittest.IsolatedAsyncioTestCase):
+    """/classify answers repeated photos from the cache."""
+
+    def setUp(self):
+        patcher = mock.patch.object(main, "cache", ResultCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_cache_hit_skips_the_model(self):
+        first = await main.classify(image=upload(b"photo one"), path=None, sha256=None)
+        with mock.patch.object(main.backend, "classify") as classify:
+            second = await main.classify(image=upload(b"photo one"), path=None, sha256=None)
+        classify.assert_not_called()
+        self.assertEqual(second, first)
+        self.assertEqual(main.cache.counters["memory_hits"], 1)
+
+    async def test_cached_answer_is_served_as_stored(self):
+        stored = {"category": "fire", "severity": "high", "response_time": "1 hour"}
+        source_sha256 = hashlib.sha256(b"photo two").hexdigest()
+        await main.cache.set(classify_key(main.backend.cache_id, source_sha256), stored)
+
+        self.assertEqual(await main.classify(image=upload(b"photo two"), path=None, sha256=None), stored)
+        # The key includes the backend, so another model's answers are not reused
+        with mock.patch.object(type(main.backend), "prompt_version", "next"), \
+                mock.patch.object(main.backend, "classify", return_value={"category": "road", "severity": "low"}) as classify:
+            answer = await main.classify(image=upload(b"photo two"), path=None, sha256=None)
+        classify.assert_called_once()
+        self.assertEqual(answer["category"], "road")
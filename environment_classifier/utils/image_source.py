@@ -0,0 +1,161 @@
+"""
+Where the image of a /classify or /validate request comes from.
+
+Remote callers upload the image as multipart form data. When Django and the
+classifier share a media volume, a caller can instead send the file's
+storage path (relative to SHARED_MEDIA_ROOT) or its SHA-256 content hash,
+and the file is memory-mapped where it lies: nothing is copied into the
+request body, and nothing is written to a temp file before upload. Only
+image files under SHARED_MEDIA_DIRS can be read this way.
+"""
+import glob
+import hashlib
+import mimetypes
+import mmap
+import os
+import re
+import tempfile
+
+# Root of the media volume shared with Django (its MEDIA_ROOT); unset disables path/hash requests
+SHARED_MEDIA_ROOT = os.environ.get("SHARED_MEDIA_ROOT")
+# Subdirectories of the root that may be read: the report photo upload_to
+# directories. MEDIA_ROOT can hold far more (the database, settings)
+SHARED_MEDIA_DIRS = [
+    directory.strip().strip("/")
+    for directory in os.environ.get("SHARED_MEDIA_DIRS", "waste_reports").split(",")
+    if directory.strip()
+]
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".heic", ".heif")
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ImageSourceError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ImageSource:
+    """
+    Image bytes plus a path on disk. data is a bytes object or a read-only
+    mmap; path is the shared file itself, or a temp file written on demand
+    for uploads. Call close() when done.
+    """
+
+    def __init__(self, data, mime_type, path=None, mapped=None, sha256=None):
+        self.data = data
+        self.mime_type = mime_type
+        self._path = path
+        self._mapped = mapped
+        self._tmp_path = None
+        self._sha256 = sha256
+
+    @property
+    def sha256(self):
+        """Hex SHA-256 of the image, hashed only if the caller did not name it."""
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.data).hexdigest()
+        return self._sha256
+
+    @property
+    def path(self):
+        if self._path is None:
+            suffix = mimetypes.guess_extension(self.mime_type) or ".jpg"
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                tmp.write(self.data)
+                self._tmp_path = self._path = tmp.name
+        return self._path
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+        if self._tmp_path and os.path.exists(self._tmp_path):
+            try:
+                os.unlink(self._tmp_path)
+            except OSError:
+                pass
+            self._tmp_path = None
+
+
+async def from_upload(image):
+    img_bytes = await image.read()
+    if not img_bytes:
+        raise ImageSourceError("Empty image file")
+    mime_type = (
+        image.content_type
+        or mimetypes.guess_type(image.filename or "")[0]
+        or "image/jpeg"
+    )
+    return ImageSource(img_bytes, mime_type)
+
+
+def _shared_root():
+    if not SHARED_MEDIA_ROOT:
+        raise ImageSourceError("Shared storage is not enabled on this classifier; upload the image instead")
+    return os.path.realpath(SHARED_MEDIA_ROOT)
+
+
+def _is_allowed(root, full_path):
+    """Whether a resolved path is an image inside one of SHARED_MEDIA_DIRS."""
+    if not full_path.lower().endswith(IMAGE_EXTENSIONS):
+        return False
+    for directory in SHARED_MEDIA_DIRS:
+        allowed = os.path.join(root, directory)
+        if os.path.commonpath([allowed, full_path]) == allowed:
+            return True
+    return False
+
+
+def _resolve_path(path):
+    root = _shared_root()
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not _is_allowed(root, full_path):
+        raise ImageSourceError(f"path must be an image under {', '.join(SHARED_MEDIA_DIRS)}/ in the shared media root")
+    return full_path
+
+
+def _resolve_sha256(sha256):
+    sha256 = sha256.lower()
+    if not _SHA256.match(sha256):
+        raise ImageSourceError("sha256 must be a hex SHA-256 digest")
+    root = _shared_root()
+    # Django's content-addressed layout: <upload_to>/<aa>/<bb>/<sha256><ext>
+    for directory in SHARED_MEDIA_DIRS:
+        pattern = os.path.join(root, directory, sha256[:2], sha256[2:4], sha256 + ".*")
+        for match in glob.glob(pattern):
+            full_path = os.path.realpath(match)
+            if _is_allowed(root, full_path):
+                return full_path
+    raise ImageSourceError(f"No stored image with sha256 {sha256}", status=404)
+
+
+def from_shared(path=None, sha256=None):
+    """Map a file on the shared volume, named by storage path or content hash."""
+    if path:
+        full_path = _resolve_path(path)
+        # Content-addressed storage names files by their hash
+        name = os.path.splitext(os.path.basename(full_path))[0]
+        sha256 = name if _SHA256.match(name) else None
+    else:
+        full_path = _resolve_sha256(sha256)
+        sha256 = sha256.lower()
+    try:
+        with open(full_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ImageSourceError("Empty image file")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        raise ImageSourceError(f"No stored file at {path or sha256}", status=404)
+    mime_type = mimetypes.guess_type(full_path)[0] or "image/jpeg"
+    return ImageSource(mapped, mime_type, path=full_path, mapped=mapped, sha256=sha256)
+
+
+async def load(image=None, path=None, sha256=None):
+    """The request's image: an upload, or a shared file by path or sha256."""
+    if image is not None:
+        return await from_upload(image)
+    if path or sha256:
+        return from_shared(path, sha256)
+    raise ImageSourceError("Send an image file, or the path or sha256 of a stored one")
@@ -0,0 +1,218 @@
+"""
+Result cache for /classify and /validate, keyed by image content hash.
+
+Duplicate reports, client retries and re-validation send the same photo
+again; a cached answer costs no model call. Keys are the backend's
+cache_id (backend, model and prompt version, so answers from different
+models never mix) and the image's SHA-256, plus the normalized
+description for /validate. Only successful answers are stored, never
+errors or quota refusals.
+
+Two layers:
+
+- an in-process LRU of RESULT_CACHE_MEMORY_ENTRIES answers, served
+  straight from the event loop, and
+- a shared layer (RESULT_CACHE_BACKEND): "disk", a SQLite file at
+  RESULT_CACHE_PATH holding at most RESULT_CACHE_DISK_ENTRIES answers, or
+  "redis" at RESULT_CACHE_REDIS_URL (bound its size with maxmemory and an
+  LRU eviction policy; needs the optional redis package). "none" keeps
+  only the in-process layer.
+
+Entries live RESULT_CACHE_TTL_SECONDS in both layers. stats() returns
+hit, miss and eviction counters for /cache/stats.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from backends import run_blocking
+
+RESULT_CACHE_BACKEND = os.environ.get("RESULT_CACHE_BACKEND", "disk")
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+RESULT_CACHE_MEMORY_ENTRIES = int(os.environ.get("RESULT_CACHE_MEMORY_ENTRIES", "2048"))
+RESULT_CACHE_DISK_ENTRIES = int(os.environ.get("RESULT_CACHE_DISK_ENTRIES", "100000"))
+RESULT_CACHE_PATH = os.environ.get(
+    "RESULT_CACHE_PATH", os.path.join(tempfile.gettempdir(), "classifier_result_cache.sqlite3")
+)
+RESULT_CACHE_REDIS_URL = os.environ.get("RESULT_CACHE_REDIS_URL", "redis://localhost:6379/2")
+
+KEY_PREFIX = "classifier:result:"
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_description(description):
+    return re.sub(r"\s+", " ", (description or "").strip().lower())
+
+
+def classify_key(cache_id, sha256):
+    return f"classify:{cache_id}:{sha256}"
+
+
+def validate_key(cache_id, sha256, description):
+    digest = hashlib.sha256(normalize_description(description).encode("utf-8")).hexdigest()
+    return f"validate:{cache_id}:{sha256}:{digest}"
+
+
+class MemoryLRU:
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskStore:
+    """SQLite table of JSON answers; oldest-used rows go first when it is full."""
+
+    def __init__(self, path, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # A lost cache write only costs a model call; skip the fsync per commit
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)")
+        self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM results WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE results SET used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl_seconds, now),
+            )
+            self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            overflow = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            self._db.commit()
+
+
+class RedisStore:
+    def __init__(self, url, ttl_seconds):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "RESULT_CACHE_BACKEND=redis needs the redis package (pip install redis)"
+            ) from e
+        self.ttl_seconds = ttl_seconds
+        self.evictions = None
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._redis.get(KEY_PREFIX + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        self._redis.set(KEY_PREFIX + key, json.dumps(value), ex=self.ttl_seconds)
+
+
+def _shared_store():
+    if RESULT_CACHE_BACKEND == "disk":
+        return DiskStore(RESULT_CACHE_PATH, RESULT_CACHE_DISK_ENTRIES, RESULT_CACHE_TTL_SECONDS)
+    if RESULT_CACHE_BACKEND == "redis":
+        return RedisStore(RESULT_CACHE_REDIS_URL, RESULT_CACHE_TTL_SECONDS)
+    if RESULT_CACHE_BACKEND == "none":
+        return None
+    raise ValueError(f"Unknown RESULT_CACHE_BACKEND: {RESULT_CACHE_BACKEND}")
+
+
+class ResultCache:
+    def __init__(self):
+        self.memory = MemoryLRU(RESULT_CACHE_MEMORY_ENTRIES, RESULT_CACHE_TTL_SECONDS)
+        self.shared = _shared_store()
+        self.counters = {"memory_hits": 0, "shared_hits": 0, "misses": 0, "shared_errors": 0}
+
+    async def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return value
+
+        if self.shared is not None:
+            try:
+                value = await run_blocking(self.shared.get, key)
+            except Exception as e:
+                self.counters["shared_errors"] += 1
+                logger.warning("Result cache read failed: %s", e)
+            if value is not None:
+                self.counters["shared_hits"] += 1
+                self.memory.set(key, value)
+                return value
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key, value):
+        self.memory.set(key, value)
+        if self.shared is not None:
+            try:
+                await run_blocking(self.shared.set, key, value)
+            except Exception as e:
+                self.counters["shared_errors"] += 1
+                logger.warning("Result cache write failed: %s", e)
+
+    def stats(self):
+        hits = self.counters["memory_hits"] + self.counters["shared_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            "backend": RESULT_CACHE_BACKEND,
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "shared_evictions": getattr(self.shared, "evictions", None),
+        }
@@ -80,11 +80,18 @@ app.post("/vapi/webhook", async (req, res) => {
       // ---------------------------
       // Send to Django
       // ---------------------------
+      // Vapi re-delivers webhooks it thinks failed; the call id lets Django
+      // recognise a repeat and replay its first answer instead of saving again
+      const headers = { "Content-Type": "application/json" };
+      if (message.call?.id) {
+        headers["Idempotency-Key"] = `vapi-call-${message.call.id}`;
+      }
+
       try {
         await axios.post(
           "http://localhost:8000/api/save-issue/",
           mapped,
-          { headers: { "Content-Type": "application/json" } }
+          { headers }
         );
 
         console.log("📨 Sent structured output to Django successfully!");